@@ -0,0 +1,73 @@
+"""
+Compares the Arrow conversion path of the DatasetConverter against the classic one.
+
+Run it from the project root, with a local Spark available:
+
+    python benchmarks/bench_dataset_converter.py --rows 100000 1000000
+"""
+import argparse
+import time
+from typing import Callable, List
+
+import numpy as np
+import pandas as pd
+from pyspark.sql import SparkSession
+
+from datamanager.utils import DatasetConverter
+
+
+def transactions(num_rows: int, seed: int = 42) -> pd.DataFrame:
+    """A synthetic frame shaped like our transaction datasets"""
+    rng = np.random.default_rng(seed)
+
+    return pd.DataFrame({
+        "transaction_id": np.arange(num_rows, dtype="int64"),
+        "account_id": rng.integers(0, 100_000, num_rows, dtype="int32"),
+        "amount": rng.normal(100, 25, num_rows),
+        "is_refund": rng.random(num_rows) < 0.05,
+        "currency": pd.Categorical(rng.choice(["EUR", "USD", "GBP"], num_rows)),
+        "description": rng.choice(["groceries", "rent", "fuel", "travel"], num_rows).astype(object),
+        "created_at": pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 86_400 * 365, num_rows), unit="s"),
+    })
+
+
+def best_of(fn: Callable[[], None], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+def main(rows: List[int], repeat: int, batch_size: int):
+    spark = SparkSession.builder.master("local[*]").getOrCreate()
+    converters = {
+        "classic": DatasetConverter(spark=spark, use_arrow=False),
+        "arrow": DatasetConverter(spark=spark, use_arrow=True, arrow_batch_size=batch_size),
+    }
+
+    print(f"{'rows':>10} {'converter':>10} {'pandas->spark':>15} {'spark->pandas':>15}")
+    for num_rows in rows:
+        pandas_df = transactions(num_rows)
+        spark_df = converters["arrow"].pandas_to_spark(pandas_df).cache()
+        spark_df.count()
+
+        for name, converter in converters.items():
+            # count() forces Spark to materialize the data, otherwise we would only time the planning
+            to_spark = best_of(lambda: converter.pandas_to_spark(pandas_df).count(), repeat)
+            to_pandas = best_of(lambda: converter.spark_to_pandas(spark_df), repeat)
+            print(f"{num_rows:>10} {name:>10} {to_spark:>14.3f}s {to_pandas:>14.3f}s")
+
+        spark_df.unpersist()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args()
+
+    main(args.rows, args.repeat, args.batch_size)
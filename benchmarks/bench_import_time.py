@@ -0,0 +1,65 @@
+"""
+Measures how long importing datamanager takes, and checks that a pandas-only script never imports pyspark.
+Exits with an error if it does, or if the import is slower than --max-seconds.
+
+    python benchmarks/bench_import_time.py --max-seconds 2
+"""
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+
+PANDAS_ONLY_SCRIPT = """
+import sys
+from datamanager.data_managers import PandasBasePathDataManager
+
+PandasBasePathDataManager(base_path={base_path!r})
+print(",".join(module for module in ("pyspark", "py4j") if module in sys.modules))
+"""
+
+
+def import_time(repeat: int) -> float:
+    """Best wall time of importing datamanager in a fresh interpreter, minus the interpreter startup"""
+    def run(code: str) -> float:
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        return time.perf_counter() - start
+
+    startup = min(run("pass") for _ in range(repeat))
+    with_import = min(run("import datamanager") for _ in range(repeat))
+
+    return with_import - startup
+
+
+def spark_modules_in_pandas_script() -> str:
+    with tempfile.TemporaryDirectory() as base_path:
+        script = PANDAS_ONLY_SCRIPT.format(base_path=base_path)
+        result = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True)
+
+    return result.stdout.strip()
+
+
+def main(repeat: int, max_seconds: float) -> int:
+    seconds = import_time(repeat)
+    print(f"import datamanager: {seconds:.3f}s")
+
+    spark_modules = spark_modules_in_pandas_script()
+    if spark_modules:
+        print(f"A pandas-only data manager imported: {spark_modules}")
+        return 1
+
+    if seconds > max_seconds:
+        print(f"Importing datamanager is slower than {max_seconds:.3f}s")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=float("inf"))
+    args = parser.parse_args()
+
+    sys.exit(main(args.repeat, args.max_seconds))
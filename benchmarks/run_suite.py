@@ -0,0 +1,272 @@
+"""
+Runs the benchmarks of the data manager hot paths on synthetic data, and saves the results as JSON so runs can be
+compared against each other:
+
+- routing: CompositeDataManager routing with many data managers and keys, cold (first lookup) and warm
+- io: PandasStorageManager save and load, per file format
+- converter: DatasetConverter conversions on a local SparkSession (skipped if pyspark isn't installed)
+- base_path: BasePathResourceManager startup and lookups on large directories
+
+Run it from the project root:
+
+    python benchmarks/run_suite.py --output benchmarks/results/main.json
+    python benchmarks/run_suite.py --only io routing --compare benchmarks/results/main.json --max-slowdown 1.2
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+from pyhocon import ConfigFactory
+
+from datamanager.data_managers import CompositeDataManager
+from datamanager.data_managers.pandas_base_path_data_manager import PandasBasePathDataManager
+from datamanager.data_managers.pandas_configured_data_manager import PandasConfiguredDataManager
+from datamanager.types import DataContext
+
+FORMATS = ["csv", "parquet", "feather", "json"]
+RESULTS = Dict[str, float]
+
+
+def transactions(num_rows: int, seed: int = 42) -> pd.DataFrame:
+    """A synthetic frame shaped like our transaction datasets"""
+    rng = np.random.default_rng(seed)
+
+    return pd.DataFrame({
+        "transaction_id": np.arange(num_rows, dtype="int64"),
+        "account_id": rng.integers(0, 100_000, num_rows, dtype="int32"),
+        "amount": rng.normal(100, 25, num_rows),
+        "is_refund": rng.random(num_rows) < 0.05,
+        "currency": rng.choice(["EUR", "USD", "GBP"], num_rows).astype(object),
+        "created_at": pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 86_400 * 365, num_rows), unit="s"),
+    })
+
+
+def best_of(fn: Callable[[], None], repeat: int, setup: Optional[Callable[[], None]] = None) -> float:
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+def bench_routing(args: argparse.Namespace, work_dir: str) -> RESULTS:
+    results = dict()
+
+    def composite() -> CompositeDataManager:
+        data_managers = dict()
+        for dm_index in range(args.managers):
+            config = ConfigFactory.from_dict({"data": {"local": {
+                f"dataset_{dm_index}_{key_index}": {"path": os.path.join(work_dir, f"{dm_index}_{key_index}.parquet")}
+                for key_index in range(args.keys)
+            }}})
+            data_managers[f"dm_{dm_index}"] = PandasConfiguredDataManager(config=config)
+
+        return CompositeDataManager(data_managers)
+
+    # The last data manager's keys are the worst case: every other data manager is asked first
+    keys = [f"dataset_{args.managers - 1}_{key_index}" for key_index in range(args.keys)]
+    name = f"routing[managers={args.managers},keys={args.keys}]"
+
+    for context in (None, DataContext.WRITE):
+        dm = composite()
+        context_name = context.name.lower() if context is not None else "any"
+        start = time.perf_counter()
+        for key in keys:
+            dm._get_data_manager(key, context)
+        results[f"{name}.cold.{context_name}"] = time.perf_counter() - start
+        results[f"{name}.warm.{context_name}"] = best_of(lambda: [dm._get_data_manager(key, context) for key in keys], args.repeat)
+
+    dm = composite()
+    # The merged resources are cached until a data manager changes, so the cache is dropped before each run
+    results[f"{name}.resources"] = best_of(lambda: dm.resources, args.repeat, setup=lambda: dm._invalidate_route(keys[0]))
+
+    return results
+
+
+def bench_io(args: argparse.Namespace, work_dir: str) -> RESULTS:
+    results = dict()
+
+    for num_rows in args.rows:
+        df = transactions(num_rows)
+        config = ConfigFactory.from_dict({"data": {"local": {
+            file_format: {
+                "path": os.path.join(work_dir, f"io_{num_rows}.{file_format}"),
+                "type": file_format,
+                "options": {"lines": True} if file_format == "json" else {},
+                "save_options": {"orient": "records", "lines": True} if file_format == "json" else (
+                    {"index": False} if file_format == "csv" else {}
+                ),
+            }
+            for file_format in FORMATS
+        }}})
+        dm = PandasConfiguredDataManager(config=config)
+
+        for file_format in FORMATS:
+            name = f"io.{file_format}[rows={num_rows}]"
+            results[f"{name}.save"] = best_of(lambda: dm.save(file_format, df), args.repeat)
+            results[f"{name}.load"] = best_of(lambda: dm.load(file_format), args.repeat)
+
+    return results
+
+
+def bench_converter(args: argparse.Namespace, work_dir: str) -> RESULTS:
+    try:
+        from pyspark.sql import SparkSession
+    except ImportError:
+        print("pyspark is not installed, skipping the converter benchmarks")
+        return dict()
+
+    from datamanager.utils import DatasetConverter
+
+    results = dict()
+    spark = SparkSession.builder.master("local[*]").getOrCreate()
+    converters = {
+        "classic": DatasetConverter(spark=spark, use_arrow=False),
+        "arrow": DatasetConverter(spark=spark, use_arrow=True),
+    }
+
+    for num_rows in args.rows:
+        pandas_df = transactions(num_rows)
+        spark_df = converters["arrow"].pandas_to_spark(pandas_df).cache()
+        spark_df.count()
+
+        for converter_name, converter in converters.items():
+            name = f"converter.{converter_name}[rows={num_rows}]"
+            # count() forces Spark to materialize the data, otherwise we would only time the planning
+            results[f"{name}.pandas_to_spark"] = best_of(lambda: converter.pandas_to_spark(pandas_df).count(), args.repeat)
+            results[f"{name}.spark_to_pandas"] = best_of(lambda: converter.spark_to_pandas(spark_df), args.repeat)
+
+        spark_df.unpersist()
+
+    return results
+
+
+def bench_base_path(args: argparse.Namespace, work_dir: str) -> RESULTS:
+    results = dict()
+
+    for num_files in args.files:
+        base_path = os.path.join(work_dir, f"base_path_{num_files}")
+        os.makedirs(base_path)
+        for file_index in range(num_files):
+            open(os.path.join(base_path, f"dataset_{file_index}.parquet"), "w").close()
+
+        name = f"base_path[files={num_files}]"
+        keys = [f"dataset_{file_index}" for file_index in range(0, num_files, max(1, num_files // 1000))]
+        dm = None
+
+        def startup():
+            nonlocal dm
+            dm = PandasBasePathDataManager(base_path=base_path, refresh_interval=60)
+            dm.has(keys[0])
+
+        results[f"{name}.startup"] = best_of(startup, args.repeat)
+        results[f"{name}.has"] = best_of(lambda: [dm.has(key) for key in keys], args.repeat) / len(keys)
+        results[f"{name}.prefix"] = best_of(lambda: dm.keys_with_prefix("dataset_1"), args.repeat)
+
+        def add_file():
+            open(os.path.join(base_path, f"new_{time.perf_counter_ns()}.parquet"), "w").close()
+
+        results[f"{name}.refresh"] = best_of(dm.refresh, args.repeat, setup=add_file)
+
+    return results
+
+
+BENCHMARKS = {
+    "routing": bench_routing,
+    "io": bench_io,
+    "converter": bench_converter,
+    "base_path": bench_base_path,
+}
+
+
+def metadata() -> Dict[str, str]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def compare(results: RESULTS, baseline_file: str, max_slowdown: Optional[float]) -> int:
+    """Prints the results next to the ones of a previous run. Returns 1 if anything got slower than max_slowdown"""
+    with open(baseline_file) as f:
+        baseline = json.load(f)["results"]
+
+    regressions = []
+    print(f"\n{'benchmark':<60} {'baseline':>12} {'current':>12} {'ratio':>7}")
+    for name, seconds in results.items():
+        if name not in baseline:
+            continue
+
+        ratio = seconds / baseline[name] if baseline[name] > 0 else float("inf")
+        print(f"{name:<60} {baseline[name]:>11.6f}s {seconds:>11.6f}s {ratio:>6.2f}x")
+
+        if max_slowdown is not None and ratio > max_slowdown:
+            regressions.append(name)
+
+    if regressions:
+        print(f"\nSlower than {max_slowdown:.2f}x the baseline: {regressions}")
+        return 1
+
+    return 0
+
+
+def main(args: argparse.Namespace) -> int:
+    results = dict()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for benchmark in args.only:
+            print(f"Running the {benchmark} benchmarks")
+            benchmark_dir = os.path.join(work_dir, benchmark)
+            os.makedirs(benchmark_dir)
+            results.update(BENCHMARKS[benchmark](args, benchmark_dir))
+
+    for name, seconds in results.items():
+        print(f"{name:<60} {seconds:>11.6f}s")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({"metadata": metadata(), "results": results}, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+    if args.compare:
+        return compare(results, args.compare, args.max_slowdown)
+
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--managers", type=int, default=10)
+    parser.add_argument("--keys", type=int, default=1_000)
+    parser.add_argument("--files", type=int, nargs="+", default=[1_000, 20_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="JSON file to save the results to")
+    parser.add_argument("--compare", help="JSON file of a previous run to compare the results with")
+    parser.add_argument("--max-slowdown", type=float, help="With --compare, fail if a benchmark is slower than this ratio")
+    args = parser.parse_args()
+
+    sys.exit(main(args))
@@ -1,3 +1,3 @@
-from .utils import DatasetConverter
-from .data_managers import CompositeDataManager, DataManagerFactory
+from .utils import DatasetConverter, MetricsAggregator, SQLiteCatalog
+from .data_managers import AsyncDataManager, CachingDataManager, CompositeDataManager, DataManagerFactory, PrefetchingDataManager
 
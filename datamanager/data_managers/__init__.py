@@ -2,5 +2,9 @@ from .pandas_base_path_data_manager import PandasBasePathDataManager
 from .pandas_configured_data_manager import PandasConfiguredDataManager
 from .spark_base_path_data_manager import SparkBasePathDataManager
 from .spark_configured_data_manager import SparkConfiguredDataManager
+from .arrow_configured_data_manager import ArrowConfiguredDataManager
 from .composite_data_manager import CompositeDataManager
+from .caching_data_manager import CachingDataManager
+from .prefetching_data_manager import PrefetchingDataManager
+from .async_data_manager import AsyncDataManager
 from .data_manager_factory import DataManagerFactory
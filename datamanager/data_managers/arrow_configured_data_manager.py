@@ -0,0 +1,30 @@
+from typing import Any, Optional
+
+from ..interfaces.data_manager import DataManager
+from ..mixins.arrow_storage_manager import ArrowStorageManager
+from ..mixins.configured_resource_manager import ConfiguredResourceManager
+from ..mixins.logger import Logger
+from ..mixins.string_path_resolver import StringPathResolver
+
+
+class ArrowConfiguredDataManager(StringPathResolver, ArrowStorageManager, ConfiguredResourceManager, DataManager, Logger):
+    @property
+    def _config_root(self) -> Optional[str]:
+        """"
+        The config root, if set the subkey to use as the base config for the resources.
+        This can be useful if you want to have multiple resource types within the
+        same config tree.
+        """
+        return "data.lazy"
+    
+    @property
+    def id(self) -> str:
+        return "arrow-configured"
+
+    def save(self, key: str, dataset: Any, **kwargs) -> bool:
+        saved = super().save(key, dataset, **kwargs)
+
+        if saved:
+            self.record_stats(key, dataset)
+
+        return saved
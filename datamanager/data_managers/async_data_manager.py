@@ -0,0 +1,102 @@
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from ..exceptions import BatchOperationError
+from ..interfaces.data_manager import DataManager
+from ..mixins.logger import Logger
+from ..types import DataContext
+from ..utils.concurrency import ordered
+
+
+class AsyncDataManager(Logger):
+    """
+    An asyncio facade over a data manager (usually a :class:`CompositeDataManager`).
+
+    The blocking calls of the data manager run in an executor, so they don't block the event loop.
+    By default, that's a thread pool of ``max_concurrency`` threads, which also bounds how many
+    operations run at the same time. Concurrent ``aload`` calls for the same key and arguments share
+    a single read.
+    """
+    def __init__(self, data_manager: DataManager, max_concurrency: int = 8, executor: Optional[Executor] = None, **kwargs):
+        super().__init__(**kwargs)
+        self._data_manager = data_manager
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="datamanager")
+        self._inflight_loads: Dict[Tuple[str, str], "asyncio.Future[Any]"] = dict()
+
+    @property
+    def data_manager(self) -> DataManager:
+        return self._data_manager
+
+    def has(self, key: str, context: Optional[DataContext] = None, **kwargs) -> bool:
+        """Checks whether a resource is defined. This only looks at the configuration, so it doesn't block"""
+        return self._data_manager.has(key, context, **kwargs)
+
+    async def aexists(self, key: str, **kwargs) -> bool:
+        return await self._run(partial(self._data_manager.exists, key, **kwargs))
+
+    async def aload(self, key: str, **kwargs) -> Any:
+        """Loads the dataset linked to the provided key, joining any load of the same key that is still running"""
+        load_key = (key, repr(sorted(kwargs.items())))
+        load = self._inflight_loads.get(load_key)
+
+        if load is None:
+            load = asyncio.ensure_future(self._run(partial(self._data_manager.load, key, **kwargs)))
+            self._inflight_loads[load_key] = load
+            load.add_done_callback(lambda _: self._forget_load(load_key, load))
+        else:
+            self.logger.debug(f"Joining the load of dataset '{key}' already in progress")
+
+        # Shielded, so a waiter being cancelled doesn't cancel the load for the others
+        return await asyncio.shield(load)
+
+    async def aload_many(self, keys: Iterable[str], raise_errors: bool = True, **kwargs) -> Dict[str, Any]:
+        """Loads several datasets concurrently. Errors are handled as in :func:`DataManager.load_many`"""
+        keys = list(keys)
+        outcomes = await asyncio.gather(*(self.aload(key, **kwargs) for key in keys), return_exceptions=True)
+
+        results = {key: outcome for key, outcome in zip(keys, outcomes) if not isinstance(outcome, BaseException)}
+        errors = {key: outcome for key, outcome in zip(keys, outcomes) if isinstance(outcome, BaseException)}
+
+        if errors and raise_errors:
+            raise BatchOperationError(errors, results)
+
+        return ordered({**results, **errors}, keys)
+
+    async def asave(self, key: str, dataset: Any, **kwargs) -> bool:
+        # Loads started before the save would return the old data to new waiters
+        self._forget_loads(key)
+
+        return await self._run(partial(self._data_manager.save, key, dataset, **kwargs))
+
+    async def adelete(self, key: str, **kwargs) -> bool:
+        self._forget_loads(key)
+
+        return await self._run(partial(self._data_manager.delete, key, **kwargs))
+
+    def close(self):
+        """Shuts down the executor, if it was created by this data manager"""
+        if self._owns_executor:
+            self._executor.shutdown(wait=True)
+
+    async def __aenter__(self) -> "AsyncDataManager":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        # Shutting down waits for the operations in progress, which would block the event loop
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    async def _run(self, fn: Callable[[], Any]) -> Any:
+        loop = asyncio.get_running_loop()
+
+        return await loop.run_in_executor(self._executor, fn)
+
+    def _forget_load(self, load_key: Tuple[str, str], load: "asyncio.Future[Any]"):
+        if self._inflight_loads.get(load_key) is load:
+            del self._inflight_loads[load_key]
+
+    def _forget_loads(self, key: str):
+        for load_key in [load_key for load_key in self._inflight_loads if load_key[0] == key]:
+            del self._inflight_loads[load_key]
@@ -0,0 +1,167 @@
+import os
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Tuple
+
+from pyhocon import ConfigTree
+
+from ..interfaces.data_manager import DataManager
+from ..mixins.instrumented import OBSERVER
+from ..mixins.logger import Logger
+from ..types import DataContext
+from ..utils.dataset_meta import VersionInfo
+from ..utils.lru_cache import LRUCache
+from ..utils.memory import memory_usage
+
+
+class CachingDataManager(DataManager, Logger):
+    """
+    Wraps another data manager (a single one or a composite), keeping the datasets it loads in memory.
+
+    Entries are keyed on the resource key, the resolved path, the read options and the modification
+    time and size of the underlying file, so a file changed by another process is read again. Saving
+    or deleting a key through this data manager drops its entries. Datasets whose path can't be
+    checked locally (e.g. on HDFS) are not cached.
+
+    The cache is bounded by number of entries and/or by memory, as reported by
+    ``DataFrame.memory_usage(deep=True)``. Cached datasets are shared between callers unless
+    ``copy=True``, so don't modify them in place.
+    """
+    def __init__(self, data_manager: DataManager, max_entries: Optional[int] = 32, max_bytes: Optional[int] = None,
+                 copy: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self._data_manager = data_manager
+        self._copy = copy
+        self._cache: LRUCache[Tuple[Hashable, ...], Any] = LRUCache(
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            sizeof=memory_usage,
+        )
+
+        data_manager.add_listener(self._on_resource_change)
+
+    @property
+    def id(self) -> str:
+        return f"cached({self._data_manager.id})"
+
+    @property
+    def data_manager(self) -> DataManager:
+        return self._data_manager
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Hits, misses, evictions, number of entries and bytes used by the cache"""
+        return self._cache.stats
+
+    @property
+    def resources(self) -> Dict[str, ConfigTree]:
+        return self._data_manager.resources
+
+    def add_observer(self, observer: OBSERVER):
+        super().add_observer(observer)
+        self._data_manager.add_observer(observer)
+
+    def remove_observer(self, observer: OBSERVER):
+        super().remove_observer(observer)
+        self._data_manager.remove_observer(observer)
+
+    def resource(self, key: str, **kwargs) -> ConfigTree:
+        return self._data_manager.resource(key, **kwargs)
+
+    def resolve(self, key: str, **kwargs) -> str:
+        return self._data_manager.resolve(key, **kwargs)
+
+    def has(self, key: str, context: Optional[DataContext] = None, **kwargs) -> bool:
+        return self._data_manager.has(key, context, **kwargs)
+
+    def exists(self, key: str, **kwargs) -> bool:
+        return self._data_manager.exists(key, **kwargs)
+
+    def add(self, key: str, *args, **kwargs):
+        return self._data_manager.add(key, *args, **kwargs)
+
+    def remove(self, key: str, **kwargs):
+        return self._data_manager.remove(key, **kwargs)
+
+    def load(self, key: str, **kwargs) -> Any:
+        """Loads a dataset, from the cache if it's there and the underlying file didn't change"""
+        with self._span("load", "cache", key) as span:
+            fingerprint = self._fingerprint(key, kwargs)
+            cache_key = (key, _freeze(kwargs), fingerprint)
+            dataset = self._cache.get(cache_key) if fingerprint is not None else None
+            span.set(hit=dataset is not None)
+
+        if fingerprint is None:
+            self.logger.debug(f"Can't fingerprint dataset '{key}', loading it without cache")
+            return self._data_manager.load(key, **kwargs)
+
+        if dataset is None:
+            dataset = self._data_manager.load(key, **kwargs)
+            # Entries for older versions of the same file won't be hit again
+            self._cache.pop_where(lambda other: other[:2] == cache_key[:2])
+            self._cache.put(cache_key, dataset)
+        else:
+            self.logger.debug(f"Dataset '{key}' loaded from cache")
+
+        return dataset.copy() if self._copy and hasattr(dataset, "copy") else dataset
+
+    def load_iter(self, key: str, chunk_size: Optional[int] = None, **kwargs) -> Iterator[Any]:
+        return self._data_manager.load_iter(key, chunk_size=chunk_size, **kwargs)
+
+    def save(self, key: str, dataset: Any, **kwargs) -> bool:
+        self.invalidate(key)
+
+        return self._data_manager.save(key, dataset, **kwargs)
+
+    def delete(self, key: str, **kwargs) -> bool:
+        self.invalidate(key)
+
+        return self._data_manager.delete(key, **kwargs)
+
+    def rollback(self, key: str, **kwargs) -> bool:
+        self.invalidate(key)
+
+        return self._data_manager.rollback(key, **kwargs)
+
+    def versions(self, key: str, **kwargs) -> List[VersionInfo]:
+        return self._data_manager.versions(key, **kwargs)
+
+    def compact_files(self, key: str, **kwargs) -> Dict[str, int]:
+        self.invalidate(key)
+
+        return self._data_manager.compact_files(key, **kwargs)
+
+    def unpersist(self, key: str, **kwargs):
+        self.invalidate(key)
+        self._data_manager.unpersist(key, **kwargs)
+
+    def unpersist_all(self):
+        self.invalidate()
+        self._data_manager.unpersist_all()
+
+    def invalidate(self, key: Optional[str] = None):
+        """Drops the cached datasets for the given key, or all of them if no key is given"""
+        if key is None:
+            self._cache.clear()
+        else:
+            self._cache.pop_where(lambda cache_key: cache_key[0] == key)
+
+    def _on_resource_change(self, key: str):
+        self.invalidate(key)
+        self._notify_resource_change(key)
+
+    def _fingerprint(self, key: str, kwargs: Dict[str, Any]) -> Optional[Tuple[Hashable, ...]]:
+        routing_kwargs = {"data_manager_key": kwargs["data_manager_key"]} if kwargs.get("data_manager_key") else dict()
+
+        path = self._data_manager.resolve(key, **routing_kwargs)
+
+        try:
+            stat = os.stat(path)
+        except (OSError, TypeError, ValueError):
+            return None
+
+        options = self._data_manager.resource(key, **routing_kwargs).get("options", default=None)
+
+        return str(path), repr(options), stat.st_mtime_ns, stat.st_size
+
+
+def _freeze(kwargs: Dict[str, Any]) -> str:
+    return repr(sorted(kwargs.items()))
@@ -1,10 +1,14 @@
-from typing import Any, Dict, List, Optional
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
 
 from pyhocon import ConfigTree
 
 from ..interfaces.data_manager import DataManager
+from ..mixins.instrumented import OBSERVER
 from ..mixins.logger import Logger
 from ..types import DataContext
+from ..utils.concurrency import ordered
+from ..utils.dataset_meta import VersionInfo
 
 
 class CompositeDataManager(DataManager, Logger):
@@ -18,6 +22,13 @@ class CompositeDataManager(DataManager, Logger):
         super().__init__(**kwargs)
         self._data_managers = data_managers
         self._data_manager_order = data_manager_order or list(data_managers.keys())
+        # Routing index: for each context, the key of the data manager that handles each resource key
+        self._routes: Dict[Optional[DataContext], Dict[str, str]] = {context: dict() for context in (None, *DataContext)}
+        # Merged resources of all data managers, rebuilt after any of them changes
+        self._resources: Optional[Dict[str, ConfigTree]] = None
+
+        for dm in self._data_managers.values():
+            dm.add_listener(self._invalidate_route)
 
     @property
     def id(self) -> str:
@@ -26,13 +37,27 @@ class CompositeDataManager(DataManager, Logger):
     @property
     def resources(self) -> Dict[str, ConfigTree]:
         """Returns a list of all resources that the data manager has"""
-        resources = {}
+        if self._resources is None:
+            resources = {}
+
+            for dm_id, dm in self._data_managers.items():
+                self.logger.debug(f"Adding resources from data manager {dm_id}")
+                resources.update(dm.resources)
+
+            self._resources = resources
 
-        for dm_id, dm in self._data_managers.items():
-            self.logger.debug(f"Adding resources from data manager {dm_id}")
-            resources = {**resources, **dm.resources}
+        return self._resources
 
-        return resources
+    def add_observer(self, observer: OBSERVER):
+        """Registers an observer for the spans of this data manager (routing) and of all its data managers"""
+        super().add_observer(observer)
+        for dm in self._data_managers.values():
+            dm.add_observer(observer)
+
+    def remove_observer(self, observer: OBSERVER):
+        super().remove_observer(observer)
+        for dm in self._data_managers.values():
+            dm.remove_observer(observer)
 
     def resource(self, key: str, data_manager_key: Optional[str] = None, **kwargs) -> ConfigTree:
         """Returns the configuration linked to a resource"""
@@ -40,25 +65,40 @@ class CompositeDataManager(DataManager, Logger):
         
         return data_manager.resource(key=key, **kwargs)
 
-    def _available_data_managers(self, key: str, context: Optional[DataContext] = None) -> Dict[str, DataManager]:
-        self.logger.debug(f"Getting available data managers for key '{key}'")
-        available_dms = {dm_key: dm for dm_key, dm in self._data_managers.items() if dm.has(key, context)}
-        num_dms = len(available_dms)
-        str_dm = "data manager" if num_dms == 1 else "data managers"
-        self.logger.debug(f"Found {str_dm} available for resource '{key}': [{', '.join(available_dms.keys())}]")
+    def _find_data_manager_key(self, key: str, context: Optional[DataContext] = None) -> Optional[str]:
+        """Returns the key of the first data manager, in order of priority, that has the resource"""
+        routes = self._routes[context]
+        data_manager_key = routes.get(key)
+        if data_manager_key is not None:
+            return data_manager_key
+
+        for data_manager_key in self._data_manager_order:
+            if self._data_managers[data_manager_key].has(key, context):
+                self.logger.debug(f"Routing resource '{key}' to data manager '{data_manager_key}'")
+                routes[key] = data_manager_key
+                return data_manager_key
+
+        return None
+
+    def _invalidate_route(self, key: str):
+        for routes in self._routes.values():
+            routes.pop(key, None)
+
+        self._resources = None
+
+        self._notify_resource_change(key)
+
+    def _get_data_manager_key(self, key: str, context: Optional[DataContext] = None) -> str:
+        data_manager_key = self._find_data_manager_key(key, context)
+
+        if data_manager_key is None:
+            raise RuntimeError(f"No data manager found for resource '{key}'")
 
-        return available_dms
+        return data_manager_key
 
     def _get_data_manager(self, key: str, context: Optional[DataContext] = None, data_manager_key: Optional[str] = None) -> DataManager:
         if not data_manager_key:
-            self.logger.debug(f"Didn't get a data manager for resource '{key}', trying to determine one")
-            available_dms = self._available_data_managers(key, context)
-            for data_manager_key in self._data_manager_order:
-                if data_manager_key in available_dms:
-                    self.logger.debug(f"Using data manager '{data_manager_key}' for resource '{key}'")
-                    return available_dms[data_manager_key]
-            
-            raise RuntimeError(f"No data manager found for resource '{key}'")
+            data_manager_key = self._get_data_manager_key(key, context)
 
         return self._data_managers[data_manager_key]
 
@@ -76,40 +116,115 @@ class CompositeDataManager(DataManager, Logger):
         """This method is similar to :func:`DataManager.has`, but it will also check if resource actually
         exists in the underlying data store.
         """
-        has_resource = self.has(key, data_manager_key=data_manager_key)
+        if data_manager_key:
+            data_manager = self._data_managers[data_manager_key]
+            return data_manager.has(key) and data_manager.exists(key)
 
-        if not has_resource:
+        with self._span("exists", "route", key):
+            data_manager_key = self._find_data_manager_key(key)
+        if data_manager_key is None:
             return False
-        
-        data_manager = self._get_data_manager(key, data_manager_key=data_manager_key)
-        
-        return data_manager.exists(key)
+
+        return self._data_managers[data_manager_key].exists(key)
+
+    def exists_many(self, keys: Iterable[str], data_manager_key: Optional[str] = None) -> Dict[str, bool]:
+        """Checks which resources exist, with one bulk check per data manager"""
+        keys = list(keys)
+        exists = dict()
+        keys_by_data_manager = defaultdict(list)
+
+        for key in keys:
+            key_data_manager = data_manager_key or self._find_data_manager_key(key)
+            if key_data_manager is None:
+                exists[key] = False
+            else:
+                keys_by_data_manager[key_data_manager].append(key)
+
+        for key_data_manager, data_manager_keys in keys_by_data_manager.items():
+            exists.update(self._data_managers[key_data_manager].exists_many(data_manager_keys))
+
+        return ordered(exists, keys)
 
     def load(self, key: str, data_manager_key: str = None, **kwargs) -> Optional[Any]:
         """Loads the dataset linked to the provided key."""
-        data_manager = self._get_data_manager(key=key, context=DataContext.READ, data_manager_key=data_manager_key)
+        with self._span("load", "route", key):
+            data_manager = self._get_data_manager(key=key, context=DataContext.READ, data_manager_key=data_manager_key)
 
         return data_manager.load(key=key, **kwargs)
 
+    def load_iter(self, key: str, chunk_size: Optional[int] = None, data_manager_key: str = None, **kwargs) -> Iterator[Any]:
+        """Loads the dataset linked to the provided key in chunks."""
+        data_manager = self._get_data_manager(key=key, context=DataContext.READ, data_manager_key=data_manager_key)
+
+        return data_manager.load_iter(key=key, chunk_size=chunk_size, **kwargs)
+
+    def _read_task(self, key: str, data_manager_key: Optional[str] = None, **kwargs) -> Optional[Callable[[], Any]]:
+        data_manager = self._get_data_manager(key=key, context=DataContext.READ, data_manager_key=data_manager_key)
+
+        return data_manager._read_task(key=key, **kwargs)
+
     def save(self, key: str, dataset: Any, overwrite: Optional[bool] = True, data_manager_key: Optional[str] = None, **kwargs) -> bool:
         """Writes a dataset to the underlying data source."""
-        data_manager = self._get_data_manager(key=key, context=DataContext.WRITE, data_manager_key=data_manager_key)
+        with self._span("save", "route", key):
+            data_manager = self._get_data_manager(key=key, context=DataContext.WRITE, data_manager_key=data_manager_key)
 
         return data_manager.save(key=key, dataset=dataset, overwrite=overwrite, **kwargs)
 
     def delete(self, key: str, data_manager_key: Optional[str] = None, **kwargs) -> bool:
         """Deletes a resource from underlying data source."""
-        data_manager = self._get_data_manager(key=key, context=DataContext.WRITE, data_manager_key=data_manager_key)
+        with self._span("delete", "route", key):
+            data_manager = self._get_data_manager(key=key, context=DataContext.WRITE, data_manager_key=data_manager_key)
 
         return data_manager.delete(key=key, **kwargs)
 
+    def rollback(self, key: str, data_manager_key: Optional[str] = None) -> bool:
+        """Restores the previous version of a dataset."""
+        data_manager = self._get_data_manager(key=key, context=DataContext.WRITE, data_manager_key=data_manager_key)
+
+        return data_manager.rollback(key)
+
+    def versions(self, key: str, data_manager_key: Optional[str] = None) -> List[VersionInfo]:
+        """Returns the kept versions of a dataset."""
+        data_manager = self._get_data_manager(key=key, context=DataContext.READ, data_manager_key=data_manager_key)
+
+        return data_manager.versions(key)
+
+    def compact_files(self, key: str, target_file_size_mb: Optional[float] = None, data_manager_key: Optional[str] = None) -> Dict[str, int]:
+        """Rewrites the small files of a dataset into larger ones."""
+        data_manager = self._get_data_manager(key=key, context=DataContext.WRITE, data_manager_key=data_manager_key)
+
+        return data_manager.compact_files(key, target_file_size_mb=target_file_size_mb)
+
+    def unpersist(self, key: str, data_manager_key: Optional[str] = None):
+        """Releases the datasets of a key kept in memory by the data manager that reads it."""
+        data_manager = self._get_data_manager(key=key, context=DataContext.READ, data_manager_key=data_manager_key)
+        data_manager.unpersist(key)
+
+    def unpersist_all(self):
+        """Releases the datasets kept in memory by all the data managers."""
+        for data_manager in self._data_managers.values():
+            data_manager.unpersist_all()
+
+    def delete_many(self, keys: Iterable[str], data_manager_key: Optional[str] = None, **kwargs) -> Dict[str, bool]:
+        """Deletes several resources, with one bulk delete per data manager"""
+        keys = list(keys)
+        deleted = dict()
+        keys_by_data_manager = defaultdict(list)
+
+        for key in keys:
+            if data_manager_key:
+                keys_by_data_manager[data_manager_key].append(key)
+            else:
+                keys_by_data_manager[self._get_data_manager_key(key, DataContext.WRITE)].append(key)
+
+        for key_data_manager, data_manager_keys in keys_by_data_manager.items():
+            deleted.update(self._data_managers[key_data_manager].delete_many(data_manager_keys, **kwargs))
+
+        return ordered(deleted, keys)
+
     def has(self, key: str, context: Optional[DataContext] = None, data_manager_key: Optional[str] = None) -> bool:
         """Checks whether a resource is defined."""
         if not data_manager_key:
-            for dm_key, dm in self._data_managers.items():
-                if dm.has(key, context):
-                    self.logger.debug(f"Data Manager {dm_key} has resource {key}")
-                    return True
-            return False
+            return self._find_data_manager_key(key, context) is not None
 
         return self._data_managers[data_manager_key].has(key, context)
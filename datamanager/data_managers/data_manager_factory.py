@@ -1,16 +1,44 @@
+import os
 from pathlib import Path
 from typing import Optional, Union
 
-from pyhocon import ConfigTree
+from pyhocon import ConfigFactory, ConfigTree
 
+from .arrow_configured_data_manager import ArrowConfiguredDataManager
 from .composite_data_manager import CompositeDataManager
 from .pandas_configured_data_manager import PandasConfiguredDataManager
 from .pandas_base_path_data_manager import PandasBasePathDataManager
 from .spark_configured_data_manager import SparkConfiguredDataManager
 from .spark_base_path_data_manager import SparkBasePathDataManager
+from ..utils.feather_cache import FeatherCache
+from ..utils.sqlite_catalog import SQLiteCatalog
+
+# The catalog namespace (data manager id) of each configured data manager, and the config tree of its resources
+_CONFIGURED_NAMESPACES = {
+    "spark-configured": "data.hdfs",
+    "pandas-configured": "data.local",
+    "arrow-configured": "data.lazy",
+}
 
 
 class DataManagerFactory:
+    @staticmethod
+    def disk_cache(config: Optional[ConfigTree]) -> Optional[FeatherCache]:
+        """
+        Builds the on-disk cache for parsed pandas datasets, if the config has a "cache.disk" tree, e.g.:
+        cache.disk { dir: /tmp/datamanager_cache, max_size_mb: 10240, hash_source: false }
+        """
+        if config is None or config.get("cache.disk", default=None) is None:
+            return None
+
+        max_size_mb = config.get_int("cache.disk.max_size_mb", default=None)
+
+        return FeatherCache(
+            cache_dir=config.get_string("cache.disk.dir"),
+            max_bytes=max_size_mb * 1024 * 1024 if max_size_mb is not None else None,
+            hash_source=config.get_bool("cache.disk.hash_source", default=False),
+        )
+
     @staticmethod
     def local(config: Optional[ConfigTree] = None, base_dir: Optional[Union[str, Path]] = None) -> CompositeDataManager:
         """
@@ -24,7 +52,7 @@ class DataManagerFactory:
         data_manager_order = []
 
         if config is not None:
-            pd_configured_dm = PandasConfiguredDataManager(config=config)
+            pd_configured_dm = PandasConfiguredDataManager(config=config, disk_cache=DataManagerFactory.disk_cache(config))
             data_managers[pd_configured_dm.id] = pd_configured_dm
             data_manager_order.append(pd_configured_dm.id)
 
@@ -36,20 +64,63 @@ class DataManagerFactory:
         return CompositeDataManager(data_managers, data_manager_order)
     
     @staticmethod
-    def all(config: Optional[ConfigTree] = None, local_base_dir: Optional[Union[str, Path]] = None, hdfs_base_dir: Optional[Union[str, Path]] = None) -> CompositeDataManager:
+    def from_file(config_file: Union[str, Path], catalog: Optional[SQLiteCatalog] = None, **kwargs) -> CompositeDataManager:
+        """
+        Parses a HOCON config file and gives you the data managers from :func:`all`. With a catalog, the resources
+        are stored in it, and as long as the file doesn't change, the next calls build the data managers from the
+        catalog instead of parsing the file again. Note that changes in included files are not detected.
+        """
+        config_file = os.path.abspath(config_file)
+        stat = os.stat(config_file)
+        fingerprint = f"{stat.st_mtime_ns}:{stat.st_size}"
+
+        if catalog is not None and catalog.fingerprint(config_file) == fingerprint:
+            settings = ConfigFactory.from_dict(catalog.payload(config_file) or dict())
+
+            return DataManagerFactory.all(config=settings, catalog=catalog, **kwargs)
+
+        config = ConfigFactory.parse_file(config_file)
+
+        if catalog is not None:
+            # Resources removed from the config file must not come back from the catalog
+            for namespace, config_root in _CONFIGURED_NAMESPACES.items():
+                if config.get(config_root, default=None) is None and namespace in catalog.namespaces():
+                    catalog.drop(namespace)
+
+        data_manager = DataManagerFactory.all(config=config, catalog=catalog, **kwargs)
+
+        if catalog is not None:
+            # Everything but the resources, which are already in the catalog
+            settings = {key: value for key, value in config.as_plain_ordered_dict().items() if key != "data"}
+            catalog.record_source(config_file, fingerprint, settings)
+
+        return data_manager
+
+    @staticmethod
+    def all(config: Optional[ConfigTree] = None, local_base_dir: Optional[Union[str, Path]] = None, hdfs_base_dir: Optional[Union[str, Path]] = None,
+            catalog: Optional[SQLiteCatalog] = None) -> CompositeDataManager:
         """
         Gives you a data manager with one or more of the following data managers, with this order of priority:
         - If config is provided and has a "data.hdfs" tree: A SparkConfiguredDataManager is added
         - If config is provided and has a "data.local" tree: A PandasConfiguredDataManager is added
+        - If config is provided and has a "data.lazy" tree: An ArrowConfiguredDataManager is added, which loads
+          datasets as lazy Arrow datasets, for datasets that don't fit in memory
         - If hdfs_base_dir is provided or if config has an "hdfs_path" element: A SparkBasePathDataManager (which doesn't require config)
         - If local_base_dir is provided or if config has an "local_path" element: A PandasBasePathDataManager (which doesn't require config)
 
         Note that if both a SparkBasePathDataManager and a PandasBasePathDataManager, you will only be able to write
         to the pandas one if you explicitely provide the data manager key when saving.
+
+        With a catalog, the configured data managers read and write their resources through it. If the config has no
+        "data" tree at all, their resources come from the catalog alone.
         """
 
-        if not config or local_base_dir or hdfs_base_dir:
-            raise ValueError("You need to provide either a config or a base_dir")
+        if config is None and catalog is None and local_base_dir is None and hdfs_base_dir is None:
+            raise ValueError("You need to provide either a config, a catalog or a base_dir")
+
+        config = config if config is not None else ConfigTree()
+        # A config with resources is the source of truth, the catalog may still have the ones removed from it
+        catalog_namespaces = set(catalog.namespaces()) if catalog is not None and config.get("data", default=None) is None else set()
         
         if local_base_dir is None and config.get_string("local_path", default=None) is not None:
             local_base_dir = config.get_string("local_path", default=None)
@@ -60,16 +131,31 @@ class DataManagerFactory:
         data_managers = dict()
         data_manager_order = []
 
-        if config.get("data.hdfs", default=None) is not None:
-            spark_configured_dm = SparkConfiguredDataManager(config=config)
+        if config.get("data.hdfs", default=None) is not None or "spark-configured" in catalog_namespaces:
+            spark_configured_dm = SparkConfiguredDataManager(
+                config=config if config.get("data.hdfs", default=None) is not None else None,
+                catalog=catalog,
+            )
             data_managers[spark_configured_dm.id] = spark_configured_dm
             data_manager_order.append(spark_configured_dm.id)
 
-        if config.get("data.local", default=None) is not None:
-            pd_configured_dm = PandasConfiguredDataManager(config=config)
+        if config.get("data.local", default=None) is not None or "pandas-configured" in catalog_namespaces:
+            pd_configured_dm = PandasConfiguredDataManager(
+                config=config if config.get("data.local", default=None) is not None else None,
+                catalog=catalog,
+                disk_cache=DataManagerFactory.disk_cache(config),
+            )
             data_managers[pd_configured_dm.id] = pd_configured_dm
             data_manager_order.append(pd_configured_dm.id)
 
+        if config.get("data.lazy", default=None) is not None or "arrow-configured" in catalog_namespaces:
+            arrow_configured_dm = ArrowConfiguredDataManager(
+                config=config if config.get("data.lazy", default=None) is not None else None,
+                catalog=catalog,
+            )
+            data_managers[arrow_configured_dm.id] = arrow_configured_dm
+            data_manager_order.append(arrow_configured_dm.id)
+
         if hdfs_base_dir is not None:
             spark_dir_dm = SparkBasePathDataManager(base_path=hdfs_base_dir)
             data_managers[spark_dir_dm.id] = spark_dir_dm
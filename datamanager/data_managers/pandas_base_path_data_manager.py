@@ -1,4 +1,3 @@
-from pyhocon import ConfigFactory
 
 from ..interfaces.data_manager import DataManager
 from ..mixins.pandas_storage_manager import PandasStorageManager
@@ -12,7 +11,7 @@ class PandasBasePathDataManager(StringPathResolver, PandasStorageManager, BasePa
         return "pandas-base_path"
 
     def save(self, key: str, *args, **kwargs) -> bool:
-        saved = super().save(*args, key=key, **kwargs)
+        saved = super().save(key, *args, **kwargs)
 
         if saved:
             self.add(key)
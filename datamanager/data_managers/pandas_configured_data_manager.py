@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Any, Optional
 
 from ..interfaces.data_manager import DataManager
 from ..mixins.pandas_storage_manager import PandasStorageManager
@@ -20,4 +20,12 @@ class PandasConfiguredDataManager(StringPathResolver, PandasStorageManager, Conf
     
     @property
     def id(self) -> str:
-        return "pandas-configured"
\ No newline at end of file
+        return "pandas-configured"
+
+    def save(self, key: str, dataset: Any, **kwargs) -> bool:
+        saved = super().save(key, dataset, **kwargs)
+
+        if saved:
+            self.record_stats(key, dataset)
+
+        return saved
@@ -0,0 +1,290 @@
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from threading import RLock
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from pyhocon import ConfigTree
+
+from ..interfaces.data_manager import DataManager
+from ..mixins.instrumented import OBSERVER
+from ..mixins.logger import Logger
+from ..types import DataContext
+from ..utils.dataset_meta import VersionInfo
+from ..utils.memory import memory_usage
+
+# A dataset to prefetch: its key, and the arguments it will be loaded with
+_PrefetchKey = Tuple[str, str]
+
+
+class PrefetchingDataManager(DataManager, Logger):
+    """
+    Wraps another data manager (a single one or a composite), reading ahead the datasets that are about to be loaded.
+
+    Pipelines usually load their datasets in a known order. The keys declared with :func:`prefetch` (or in a plan,
+    see :func:`prefetch_plan`) are read in background threads, in that order, and kept in a buffer until they are
+    loaded: ``load`` then returns the prefetched dataset right away (or waits for the read in progress), so the reads
+    overlap with the work done on the previous datasets.
+
+    At most ``depth`` datasets are read or waiting in the buffer at the same time, and no new read is started while
+    the buffered datasets take more than ``max_memory_mb``. The datasets still being read count with the average size
+    of the datasets prefetched before them. Each prefetched dataset is returned by a single load:
+    loading it again reads it again (wrap this data manager in a :class:`CachingDataManager` to keep it). Saving or
+    deleting a key drops it from the buffer.
+    """
+    def __init__(self, data_manager: DataManager, depth: int = 2, max_memory_mb: Optional[float] = None,
+                 plans: Optional[Mapping[str, Sequence[str]]] = None, executor: Optional[Executor] = None, **kwargs):
+        super().__init__(**kwargs)
+        if depth < 1:
+            raise ValueError(f"The prefetch depth must be at least 1, got {depth}")
+
+        self._data_manager = data_manager
+        self._depth = depth
+        self._max_bytes = int(max_memory_mb * 1024 * 1024) if max_memory_mb is not None else None
+        self._plans = {name: list(keys) for name, keys in (plans or dict()).items()}
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=depth, thread_name_prefix="datamanager-prefetch")
+        self._pending: Deque[Tuple[_PrefetchKey, Dict[str, Any]]] = deque()
+        self._buffer: Dict[_PrefetchKey, Future] = dict()
+        self._sizes: Dict[_PrefetchKey, int] = dict()
+        # To estimate the size of the datasets being read
+        self._read_bytes = 0
+        self._read_count = 0
+        self._lock = RLock()
+        self.hits = 0
+        self.misses = 0
+
+        data_manager.add_listener(self._on_resource_change)
+
+    @classmethod
+    def from_config(cls, data_manager: DataManager, config: Optional[ConfigTree], **kwargs) -> "PrefetchingDataManager":
+        """
+        Builds the prefetching data manager from the "prefetch" tree of a config, if it has one, e.g.:
+        prefetch { depth: 2, max_memory_mb: 4096, plans { daily_report: [customers, transactions] } }
+        """
+        prefetch = config.get("prefetch", default=None) if config is not None else None
+        if prefetch is None:
+            return cls(data_manager, **kwargs)
+
+        plans = prefetch.get("plans", default=ConfigTree())
+
+        return cls(
+            data_manager,
+            depth=prefetch.get_int("depth", default=2),
+            max_memory_mb=prefetch.get_float("max_memory_mb", default=None),
+            plans={name: plans.get_list(name) for name in plans.keys()},
+            **kwargs,
+        )
+
+    @property
+    def id(self) -> str:
+        return f"prefetched({self._data_manager.id})"
+
+    @property
+    def data_manager(self) -> DataManager:
+        return self._data_manager
+
+    @property
+    def plans(self) -> Dict[str, List[str]]:
+        return self._plans
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Hits, misses, datasets waiting to be read, datasets buffered (or being read) and bytes buffered"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "pending": len(self._pending),
+                "buffered": len(self._buffer),
+                "bytes": sum(self._sizes.values()),
+            }
+
+    @property
+    def resources(self) -> Dict[str, ConfigTree]:
+        return self._data_manager.resources
+
+    def add_observer(self, observer: OBSERVER):
+        super().add_observer(observer)
+        self._data_manager.add_observer(observer)
+
+    def remove_observer(self, observer: OBSERVER):
+        super().remove_observer(observer)
+        self._data_manager.remove_observer(observer)
+
+    def resource(self, key: str, **kwargs) -> ConfigTree:
+        return self._data_manager.resource(key, **kwargs)
+
+    def resolve(self, key: str, **kwargs) -> str:
+        return self._data_manager.resolve(key, **kwargs)
+
+    def has(self, key: str, context: Optional[DataContext] = None, **kwargs) -> bool:
+        return self._data_manager.has(key, context, **kwargs)
+
+    def exists(self, key: str, **kwargs) -> bool:
+        return self._data_manager.exists(key, **kwargs)
+
+    def add(self, key: str, *args, **kwargs):
+        return self._data_manager.add(key, *args, **kwargs)
+
+    def remove(self, key: str, **kwargs):
+        return self._data_manager.remove(key, **kwargs)
+
+    def prefetch(self, keys: Iterable[str], **kwargs):
+        """
+        Declares the datasets that will be loaded next, in order. They are read in the background, with the given
+        ``load`` arguments: only a ``load`` with the same arguments gets the prefetched dataset.
+        """
+        with self._lock:
+            for key in keys:
+                prefetch_key = (key, _freeze(kwargs))
+                if prefetch_key not in self._buffer and all(pending != prefetch_key for pending, _ in self._pending):
+                    self._pending.append((prefetch_key, kwargs))
+
+            self._schedule()
+
+    def prefetch_plan(self, name: str, **kwargs):
+        """Prefetches the keys of one of the plans of the config, in order"""
+        if name not in self._plans:
+            raise ValueError(f"Unknown prefetch plan '{name}', it must be one of {list(self._plans)}")
+
+        self.prefetch(self._plans[name], **kwargs)
+
+    def load(self, key: str, **kwargs) -> Any:
+        """Loads a dataset, from the prefetch buffer if it was prefetched with the same arguments"""
+        prefetch_key = (key, _freeze(kwargs))
+
+        with self._lock:
+            # Loaded now, so it doesn't have to be read ahead anymore
+            self._pending = deque(pending for pending in self._pending if pending[0] != prefetch_key)
+            future = self._buffer.pop(prefetch_key, None)
+            self._sizes.pop(prefetch_key, None)
+            self._schedule()
+
+            if future is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if future is None:
+            return self._data_manager.load(key, **kwargs)
+
+        try:
+            # Waits for the read if it's still in progress
+            with self._span("load", "prefetch", key):
+                dataset = future.result()
+        except Exception as e:
+            # The read is tried again, e.g. in case the dataset was created after it was prefetched
+            self.logger.debug(f"Prefetching dataset '{key}' failed ({e!r}), loading it again")
+            return self._data_manager.load(key, **kwargs)
+
+        self.logger.debug(f"Dataset '{key}' loaded from the prefetch buffer")
+
+        return dataset
+
+    def load_iter(self, key: str, chunk_size: Optional[int] = None, **kwargs) -> Iterator[Any]:
+        return self._data_manager.load_iter(key, chunk_size=chunk_size, **kwargs)
+
+    def save(self, key: str, dataset: Any, **kwargs) -> bool:
+        self.cancel([key])
+
+        return self._data_manager.save(key, dataset, **kwargs)
+
+    def delete(self, key: str, **kwargs) -> bool:
+        self.cancel([key])
+
+        return self._data_manager.delete(key, **kwargs)
+
+    def rollback(self, key: str, **kwargs) -> bool:
+        self.cancel([key])
+
+        return self._data_manager.rollback(key, **kwargs)
+
+    def versions(self, key: str, **kwargs) -> List[VersionInfo]:
+        return self._data_manager.versions(key, **kwargs)
+
+    def compact_files(self, key: str, **kwargs) -> Dict[str, int]:
+        self.cancel([key])
+
+        return self._data_manager.compact_files(key, **kwargs)
+
+    def unpersist(self, key: str, **kwargs):
+        self.cancel([key])
+        self._data_manager.unpersist(key, **kwargs)
+
+    def unpersist_all(self):
+        self.cancel()
+        self._data_manager.unpersist_all()
+
+    def cancel(self, keys: Optional[Iterable[str]] = None):
+        """
+        Drops the given keys (or all of them if no keys are given) from the prefetch buffer, and from the keys
+        waiting to be read. Reads already in progress finish, but their datasets are discarded.
+        """
+        keys = set(keys) if keys is not None else None
+
+        with self._lock:
+            self._pending = deque(
+                pending for pending in self._pending if keys is not None and pending[0][0] not in keys
+            )
+            for prefetch_key in [prefetch_key for prefetch_key in self._buffer if keys is None or prefetch_key[0] in keys]:
+                self._buffer.pop(prefetch_key).cancel()
+                self._sizes.pop(prefetch_key, None)
+
+            self._schedule()
+
+    def close(self):
+        """Drops the prefetched datasets, and shuts down the executor if it was created by this data manager"""
+        self.cancel()
+
+        if self._owns_executor:
+            self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "PrefetchingDataManager":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _schedule(self):
+        """Starts reading the next pending datasets, as long as the buffer has room for them. Call with the lock held"""
+        while self._pending and len(self._buffer) < self._depth and not self._is_full():
+            prefetch_key, kwargs = self._pending.popleft()
+            key = prefetch_key[0]
+
+            self.logger.debug(f"Prefetching dataset '{key}'")
+            future = self._executor.submit(self._data_manager.load, key, **kwargs)
+            self._buffer[prefetch_key] = future
+            future.add_done_callback(lambda done, prefetch_key=prefetch_key: self._on_read(prefetch_key, done))
+
+    def _on_read(self, prefetch_key: _PrefetchKey, future: Future):
+        with self._lock:
+            # The key may have been loaded or cancelled in the meantime
+            if self._buffer.get(prefetch_key) is not future:
+                return
+
+            if future.exception() is None:
+                self._sizes[prefetch_key] = memory_usage(future.result())
+                self._read_bytes += self._sizes[prefetch_key]
+                self._read_count += 1
+            else:
+                # Failed reads don't take memory, load reads them again
+                self._sizes[prefetch_key] = 0
+
+            self._schedule()
+
+    def _is_full(self) -> bool:
+        if self._max_bytes is None:
+            return False
+
+        reading = len(self._buffer) - len(self._sizes)
+        estimated_size = self._read_bytes / self._read_count if self._read_count else 0
+
+        return sum(self._sizes.values()) + reading * estimated_size >= self._max_bytes
+
+    def _on_resource_change(self, key: str):
+        self.cancel([key])
+        self._notify_resource_change(key)
+
+
+def _freeze(kwargs: Dict[str, Any]) -> str:
+    return repr(sorted(kwargs.items()))
@@ -1,12 +1,11 @@
-from typing import Optional
+from typing import Dict, Iterable
 
 from ..interfaces.data_manager import DataManager
 from ..mixins.spark_storage_manager import SparkStorageManager
 from ..mixins.base_path_resource_manager import BasePathResourceManager
 from ..mixins.logger import Logger
+from ..utils.hadoop_fs import HadoopFileSystem
 
-from pyhocon import ConfigFactory
-from pyspark.sql import DataFrame
 
 from ..mixins.string_path_resolver import StringPathResolver
 
@@ -17,7 +16,7 @@ class SparkBasePathDataManager(StringPathResolver, SparkStorageManager, BasePath
         return "spark-base_path"
 
     def save(self, key: str, *args, **kwargs) -> bool:
-        saved = super().save(*args, key=key, **kwargs)
+        saved = super().save(key, *args, **kwargs)
 
         if saved:
             self.add(key)
@@ -31,3 +30,16 @@ class SparkBasePathDataManager(StringPathResolver, SparkStorageManager, BasePath
             self.remove(key)
         
         return deleted
+
+    def _catalog_filesystem(self) -> HadoopFileSystem:
+        # hdfs://, s3a://... base paths are listed through the Hadoop file systems of the Spark session
+        return self._fs
+
+    def delete_many(self, keys: Iterable[str], **kwargs) -> Dict[str, bool]:
+        deleted = super().delete_many(keys, **kwargs)
+
+        for key, key_deleted in deleted.items():
+            if key_deleted:
+                self.remove(key)
+
+        return deleted
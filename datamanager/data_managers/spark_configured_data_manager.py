@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Any, Optional
 
 from ..interfaces.data_manager import DataManager
 from ..mixins.spark_storage_manager import SparkStorageManager
@@ -19,4 +19,12 @@ class SparkConfiguredDataManager(StringPathResolver, SparkStorageManager, Config
     
     @property
     def id(self) -> str:
-        return "spark-configured"
\ No newline at end of file
+        return "spark-configured"
+
+    def save(self, key: str, dataset: Any, **kwargs) -> bool:
+        saved = super().save(key, dataset, **kwargs)
+
+        if saved:
+            self.record_stats(key, dataset)
+
+        return saved
@@ -0,0 +1,13 @@
+from typing import Any, Dict
+
+
+class BatchOperationError(RuntimeError):
+    """
+    Raised when one or more keys of a batch operation (e.g. ``load_many``) fail.
+    The errors are available per key, together with the results of the keys that succeeded.
+    """
+    def __init__(self, errors: Dict[str, BaseException], results: Dict[str, Any]):
+        failed_keys = ", ".join(f"'{key}'" for key in errors)
+        super().__init__(f"Batch operation failed for keys: {failed_keys}")
+        self.errors = errors
+        self.results = results
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Generic, Optional, TypeVar
+from typing import Callable, Dict, Generic, List, Optional, TypeVar
 
 from ..types import DataContext
 
@@ -11,6 +11,10 @@ class AbstractResourceManager(Generic[T], ABC):
     The resource manager is responsible for handling the configuration of the datasets,
     associating the dataset keys to their configurations
     """
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._resource_listeners: List[Callable[[str], None]] = []
+
     @property
     @abstractmethod
     def resources(self) -> Dict[str, T]:
@@ -30,7 +34,13 @@ class AbstractResourceManager(Generic[T], ABC):
         """Checks if a resource with the given key is defined"""
         pass
 
+    def add_listener(self, listener: Callable[[str], None]):
+        """Registers a function that will be called with the key of every resource that is added or removed"""
+        self._resource_listeners.append(listener)
 
+    def _notify_resource_change(self, key: str):
+        for listener in self._resource_listeners:
+            listener(key)
     
     def add(self, key: str, resource: T):
         """Adds a dataset configuration to the resources"""
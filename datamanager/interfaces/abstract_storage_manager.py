@@ -1,5 +1,12 @@
 from abc import ABC, abstractmethod
-from typing import TypeVar, Generic
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TypeVar, Generic
+
+from ..exceptions import BatchOperationError
+from ..utils.concurrency import collect, ordered, submit_all
+from ..utils.dataset_meta import VersionInfo
 
 
 T = TypeVar('T')
@@ -20,6 +27,10 @@ class AbstractStorageManager(Generic[T], ABC):
         """Loads a resource from the underlying storage"""
         pass
 
+    def load_iter(self, key: str, chunk_size: Optional[int] = None, **kwargs) -> Iterator[T]:
+        """Loads a resource from the underlying storage in chunks, yielding them one by one"""
+        raise NotImplementedError("This storage manager does not support loading datasets in chunks")
+
     @abstractmethod
     def save(self, key: str, dataset: T, **kwargs) -> bool:
         """Saves a dataset to the underlying storage"""
@@ -29,3 +40,100 @@ class AbstractStorageManager(Generic[T], ABC):
     def delete(self, key: str, **kwargs) -> bool:
         """Deletes a dataset from the underlying storage"""
         pass
+
+    def rollback(self, key: str) -> bool:
+        """Restores the previous version of a dataset. Returns whether there was one"""
+        raise NotImplementedError("This storage manager does not keep previous versions of the datasets")
+
+    def versions(self, key: str) -> List[VersionInfo]:
+        """Returns the kept versions of a dataset, oldest first"""
+        raise NotImplementedError("This storage manager does not keep versions of the datasets")
+
+    def compact_files(self, key: str, target_file_size_mb: Optional[float] = None) -> Dict[str, int]:
+        """Rewrites the small files of a dataset into larger ones"""
+        raise NotImplementedError("This storage manager does not compact the files of the datasets")
+
+    def unpersist(self, key: str):
+        """Releases the datasets of a key that are kept in memory by the storage. Nothing to release by default"""
+        pass
+
+    def unpersist_all(self):
+        """Releases all the datasets kept in memory by the storage. Nothing to release by default"""
+        pass
+
+    def exists_many(self, keys: Iterable[str]) -> Dict[str, bool]:
+        """Checks which resources exist in the underlying storage"""
+        return {key: self.exists(key) for key in keys}
+
+    def delete_many(self, keys: Iterable[str], **kwargs) -> Dict[str, bool]:
+        """Deletes several datasets from the underlying storage"""
+        return {key: self.delete(key, **kwargs) for key in keys}
+
+    def load_many(self, keys: Iterable[str], max_workers: Optional[int] = None, use_processes: bool = False,
+                  raise_errors: bool = True, **kwargs) -> Dict[str, T]:
+        """
+        Loads several datasets concurrently, on a pool of at most ``max_workers`` threads.
+        With ``use_processes=True``, the datasets that can be read without the data manager (plain
+        file reads, e.g. CSV parsing) are read in a process pool instead, bypassing the GIL.
+
+        If any key fails, a :class:`BatchOperationError` is raised with the errors per key and the
+        datasets that did load. With ``raise_errors=False``, the exception is returned for those keys instead.
+        """
+        # Each key is loaded once, even if it's given several times
+        keys = list(dict.fromkeys(keys))
+        tasks = {key: partial(self.load, key, **kwargs) for key in keys}
+        process_tasks = dict()
+        task_errors = dict()
+
+        if use_processes:
+            for key in keys:
+                try:
+                    read_task = self._read_task(key, **kwargs)
+                except Exception as e:
+                    task_errors[key] = e
+                    tasks.pop(key)
+                    continue
+
+                if read_task is not None:
+                    process_tasks[key] = read_task
+                    tasks.pop(key)
+
+        with ExitStack() as stack:
+            thread_pool = stack.enter_context(ThreadPoolExecutor(max_workers=max_workers))
+            futures = submit_all(thread_pool, tasks)
+
+            if process_tasks:
+                process_pool = stack.enter_context(ProcessPoolExecutor(max_workers=max_workers))
+                futures.update(submit_all(process_pool, process_tasks))
+
+            results, errors = collect(futures)
+
+        return self._batch_results(keys, results, {**errors, **task_errors}, raise_errors)
+
+    def save_many(self, datasets: Dict[str, Any], max_workers: Optional[int] = None, raise_errors: bool = True,
+                  **kwargs) -> Dict[str, bool]:
+        """
+        Saves several datasets concurrently, on a pool of at most ``max_workers`` threads.
+        Errors are handled as in :func:`load_many`.
+        """
+        tasks = {key: partial(self.save, key, dataset, **kwargs) for key, dataset in datasets.items()}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as thread_pool:
+            results, errors = collect(submit_all(thread_pool, tasks))
+
+        return self._batch_results(list(datasets), results, errors, raise_errors)
+
+    def _read_task(self, key: str, **kwargs) -> Optional[Callable[[], T]]:
+        """
+        Returns a picklable function that reads the dataset without needing the storage manager,
+        so it can run in another process, or None if the dataset can't be read that way.
+        """
+        return None
+
+    @staticmethod
+    def _batch_results(keys: Iterable[str], results: Dict[str, Any], errors: Dict[str, BaseException],
+                       raise_errors: bool) -> Dict[str, Any]:
+        if errors and raise_errors:
+            raise BatchOperationError(ordered(errors, keys), ordered(results, keys))
+
+        return ordered({**results, **errors}, keys)
@@ -3,13 +3,16 @@ from abc import ABC, abstractmethod
 from .abstract_storage_manager import AbstractStorageManager
 from .abstract_resource_manager import AbstractResourceManager
 from .abstract_resource_resolver import AbstractResourceResolver
+from ..mixins.instrumented import Instrumented
 
 
-class DataManager(AbstractResourceResolver, AbstractStorageManager, AbstractResourceManager, ABC):
+class DataManager(Instrumented, AbstractResourceResolver, AbstractStorageManager, AbstractResourceManager, ABC):
     """
     A DataManager is the combination of:
     - A ResourceManager, that handles the configuration of the datasets
     - A StorageManager, the takes care of interactions with the underlying storage
+
+    Data managers also time the phases of their operations, see :class:`Instrumented`.
     """
     @property
     @abstractmethod
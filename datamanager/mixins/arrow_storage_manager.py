@@ -0,0 +1,233 @@
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set
+
+from ..interfaces.abstract_storage_manager import AbstractStorageManager
+from ..utils.filters import FILTERS, required_columns, resource_projection
+from ..utils.partitions import PARTITIONS, with_partition_filters
+from ..utils.resource_spec import ResourceSpec
+from ..utils.save_modes import save_mode
+from ..utils.staging import STALE_STAGING_SECONDS, cleanup_staging, link_or_copy, publish, remove, rollback, staging_path
+from .with_dataset_converter import WithDatasetConverter
+
+if TYPE_CHECKING:
+    from pyarrow.dataset import Dataset
+
+# File types of the resources, and the pyarrow.dataset format that reads them
+_FORMATS = {
+    "parquet": "parquet",
+    "feather": "ipc",
+    "ipc": "ipc",
+    "arrow": "ipc",
+    "csv": "csv",
+    "json": "json",
+    "orc": "orc",
+}
+# The formats pyarrow.dataset can write
+_WRITE_FORMATS = ("parquet", "ipc", "csv")
+
+
+class ArrowStorageManager(WithDatasetConverter, AbstractStorageManager["Dataset"]):
+    """
+    Uses Arrow datasets (``pyarrow.dataset``) as the underlying storage. Note that this storage manager
+    will only work when mixed together with a resource manager.
+
+    Loading a dataset doesn't read it: it returns a lazy ``pyarrow.dataset.Dataset``, which is only scanned, batch
+    by batch, when it's used (``to_batches``, ``scanner``, ``head``, ``count_rows``...). Datasets that don't fit
+    in memory can be filtered, aggregated in batches, or saved again with streaming writes. Saves accept Arrow
+    datasets, scanners, tables and record batch readers as they are, and convert anything else to an Arrow dataset.
+
+    Datasets are saved as directories of part files, through a staging directory (see :class:`PandasStorageManager`
+    for ``keep_previous`` and ``stale_staging_seconds``).
+    """
+    def __init__(self, keep_previous: bool = True, stale_staging_seconds: float = STALE_STAGING_SECONDS, **kwargs):
+        super().__init__(**kwargs)
+        self._keep_previous = keep_previous
+        self._stale_staging_seconds = stale_staging_seconds
+        self._cleaned_staging_dirs: Set[str] = set()
+
+    def exists(self, key: str) -> bool:
+        """Checks if the resource with the given key exists in the underlying storage"""
+        if not self.has(key):
+            self.logger.debug(f"Resource with key '{key}' is not defined in the resource manager")
+
+        with self._span("exists", "exists", key):
+            return Path(self.resolve(key)).exists()
+
+    def load(self, key: str, columns: Optional[List[str]] = None, filters: Optional[FILTERS] = None,
+             partitions: Optional[PARTITIONS] = None, **kwargs) -> "Dataset":
+        """
+        Returns a lazy dataset for a resource. Only the files are listed: nothing is read until the dataset is used.
+
+        ``columns``, ``filters`` and ``partitions`` work as in :func:`PandasStorageManager.load`, and are pushed down
+        to the scans of the returned dataset. The columns that the filters use are kept in the dataset, even if
+        they are not in ``columns``. The ``options`` of the resource are passed to ``pyarrow.dataset.dataset``.
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+
+        with self._span("load", "resolve", key):
+            spec = self.spec(key)
+
+        columns, filters = resource_projection(spec, columns, filters)
+        filters = with_partition_filters(filters, partitions)
+        options = {"partitioning": "hive", **spec.options}
+
+        self.logger.debug(f"Opening dataset '{key}' at path '{spec.path}' with options={options}")
+
+        with self._span("load", "read", key, file_type=spec.type):
+            dataset = ds.dataset(spec.path, format=self._format(spec), **options)
+
+            if columns is not None:
+                schema = pa.schema([dataset.schema.field(column) for column in required_columns(columns, filters)])
+                dataset = ds.dataset(spec.path, format=self._format(spec), schema=schema, **options)
+
+        if filters:
+            dataset = dataset.filter(pq.filters_to_expression(filters))
+
+        return dataset
+
+    def save(self, key: str, dataset: Any, overwrite: Optional[bool] = True, partition_by: Optional[List[str]] = None,
+             mode: Optional[str] = None, **kwargs) -> bool:
+        """
+        Saves a dataset to the underlying storage, streaming it batch by batch from lazy datasets. Only parquet,
+        Feather (IPC) and CSV datasets can be saved.
+
+        ``mode`` can be ``overwrite`` or ``error`` (the default, depending on ``overwrite``), or ``append``, which
+        adds new part files to the dataset (a single file dataset is turned into a directory of part files first).
+        The ``save_options`` of the resource are passed to ``pyarrow.dataset.write_dataset``, and
+        ``max_records_per_file`` limits the rows of each file.
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        with self._span("save", "resolve", key):
+            spec = self.spec(key)
+        dataset_path = Path(spec.path)
+        mode = save_mode(mode, overwrite)
+
+        if spec.read_only:
+            raise ValueError(f"Dataset '{key}' is read-only, you can't save to it!")
+
+        if mode == "upsert":
+            raise ValueError(f"Dataset '{key}' can't be upserted, Arrow datasets only support the overwrite and append modes")
+
+        file_format = self._format(spec)
+        if file_format not in _WRITE_FORMATS:
+            writable_types = [file_type for file_type, writable_format in _FORMATS.items() if writable_format in _WRITE_FORMATS]
+            raise ValueError(f"Arrow datasets can't write file type '{spec.type}', it must be one of {writable_types}")
+
+        if dataset_path.exists() and mode == "error":
+            raise ValueError(f"Path '{dataset_path}' for dataset '{key}' already exists, and overwrite=False")
+
+        if not isinstance(dataset, (ds.Dataset, ds.Scanner, pa.Table, pa.RecordBatchReader)):
+            # This will convert the dataset to Arrow, assuming we have a converter for it
+            dataset = self._convert(dataset, ds.Dataset, key)
+
+        partition_by = list(partition_by or spec.partition_by)
+        if mode == "append" and dataset_path.is_file() and partition_by:
+            raise ValueError(f"Dataset '{key}' is a single file, it can't be appended to as a partitioned dataset")
+
+        write_options: Dict[str, Any] = dict(spec.save_options)
+        if partition_by:
+            self.logger.debug(f"Partitioning dataset '{key}' by columns '{partition_by}'")
+            write_options.update(partitioning=partition_by, partitioning_flavor="hive")
+        if spec.max_records_per_file:
+            write_options.setdefault("max_rows_per_file", spec.max_records_per_file)
+            write_options.setdefault("max_rows_per_group", min(spec.max_records_per_file, 1024 * 1024))
+
+        self._cleanup_staging(dataset_path.parent)
+        staging = Path(staging_path(str(dataset_path)))
+
+        self.logger.debug(f"Writing dataset '{key}' to staging path '{staging}' with options={write_options}")
+
+        try:
+            with self._span("save", "write", key, file_type=spec.type, mode=mode):
+                ds.write_dataset(
+                    dataset,
+                    staging,
+                    format=file_format,
+                    # Unique names, so appended files never replace the existing ones
+                    basename_template=f"part-{uuid.uuid4().hex}-{{i}}.{spec.type}",
+                    **write_options,
+                )
+
+            with self._span("save", "publish", key):
+                if mode == "append" and dataset_path.is_dir():
+                    self._move_files(staging, dataset_path)
+                elif mode == "append" and dataset_path.exists():
+                    self.logger.debug(f"Turning dataset '{key}' at path '{dataset_path}' into a directory of part files")
+                    link_or_copy(str(dataset_path), str(staging / f"part-{uuid.uuid4().hex}.{spec.type}"))
+                    publish(str(staging), str(dataset_path), keep_previous=self._keeps_previous(spec))
+                else:
+                    publish(str(staging), str(dataset_path), keep_previous=self._keeps_previous(spec))
+        except BaseException:
+            remove(str(staging))
+            raise
+
+        return dataset_path.exists()
+
+    @staticmethod
+    def _move_files(source: Path, destination: Path):
+        """Moves the files of a directory into another one, keeping their relative paths. Each move is atomic"""
+        for root, _, file_names in os.walk(source):
+            for file_name in file_names:
+                file_path = Path(root) / file_name
+                destination_path = destination / file_path.relative_to(source)
+                destination_path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(file_path, destination_path)
+
+        # Files added to partition directories don't change the dataset's modification time
+        os.utime(destination)
+        remove(str(source))
+
+    def rollback(self, key: str) -> bool:
+        """
+        Swaps a dataset with the version it replaced, if it was kept.
+        Rolling back twice restores the current version.
+        """
+        spec = self.spec(key)
+        if spec.read_only:
+            raise ValueError(f"Dataset '{key}' is read-only, you can't roll it back!")
+
+        self.logger.debug(f"Rolling back dataset '{key}' at path '{spec.path}'")
+
+        return rollback(spec.path)
+
+    def delete(self, key: str, **kwargs) -> bool:
+        """Deletes a dataset from the underlying storage"""
+        spec = self.spec(key)
+        if spec.read_only:
+            raise ValueError(f"Dataset '{key}' is read-only, you can't delete it!")
+
+        dataset_path = Path(spec.path)
+
+        with self._span("delete", "delete", key):
+            if dataset_path.is_dir():
+                shutil.rmtree(dataset_path)
+            else:
+                dataset_path.unlink()
+
+        return not dataset_path.exists()
+
+    @staticmethod
+    def _format(spec: ResourceSpec) -> str:
+        if spec.type not in _FORMATS:
+            raise ValueError(f"Arrow datasets can't read file type '{spec.type}', it must be one of {list(_FORMATS)}")
+
+        return _FORMATS[spec.type]
+
+    def _keeps_previous(self, spec: ResourceSpec) -> bool:
+        return spec.keep_previous if spec.keep_previous is not None else self._keep_previous
+
+    def _cleanup_staging(self, directory: Path):
+        if str(directory) in self._cleaned_staging_dirs:
+            return
+
+        for path in cleanup_staging(str(directory), older_than=self._stale_staging_seconds):
+            self.logger.debug(f"Removed stale staging path '{path}'")
+
+        self._cleaned_staging_dirs.add(str(directory))
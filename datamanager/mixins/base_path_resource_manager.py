@@ -1,37 +1,72 @@
 from pathlib import Path
-from typing import Dict, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 
 from pyhocon import ConfigFactory, ConfigTree
 
 from ..interfaces.abstract_resource_manager import AbstractResourceManager
 from ..types import DataContext
+from ..utils.directory_catalog import DirectoryCatalog, is_local_path
+
+if TYPE_CHECKING:
+    from ..utils.hadoop_fs import HadoopFileSystem
 
 
 class BasePathResourceManager(AbstractResourceManager[ConfigTree]):
-    def __init__(self, base_path: str, **kwargs):
+    """
+    Resources are the ``<key>.<default_file_type>`` datasets in a base directory. The directory is indexed
+    on first use, and the index is refreshed when the directory changes (see :class:`DirectoryCatalog`),
+    so datasets written or deleted by other processes are picked up. Base paths with a URI scheme
+    (e.g. ``hdfs://``) are listed through the file system returned by :func:`_catalog_filesystem`.
+    """
+    def __init__(self, base_path: str, refresh_interval: float = 1.0, watch: bool = False, **kwargs):
         super().__init__(**kwargs)
-        self._base_path = Path(base_path)
-        current_files = self._base_path.glob("*")
-        resources = {
-            f.name: f
-            for f in current_files
-        }
-        self._resources = resources
+        self._base_path = Path(base_path) if is_local_path(base_path) else base_path.rstrip("/")
+        self._refresh_interval = refresh_interval
+        self._watch = watch
+        self._catalog_instance: Optional[DirectoryCatalog] = None
 
     @property
     def base_path(self) -> str:
         return self._base_path
+
+    @property
+    def _catalog(self) -> DirectoryCatalog:
+        if self._catalog_instance is None:
+            self._catalog_instance = DirectoryCatalog(
+                self._base_path,
+                suffix=f".{self.default_file_type}",
+                refresh_interval=self._refresh_interval,
+                watch=self._watch,
+                on_change=self._notify_resource_change,
+                filesystem=None if is_local_path(self._base_path) else self._catalog_filesystem(),
+            )
+
+        return self._catalog_instance
+
+    def _catalog_filesystem(self) -> "HadoopFileSystem":
+        """The file system listing base paths with a URI scheme. Managers that can access them override it"""
+        raise ValueError(f"Base path '{self._base_path}' isn't local, and this data manager can only list local directories")
     
     @property
-    def resources(self) -> Dict[str, str]:
+    def resources(self) -> Dict[str, ConfigTree]:
         """
         Returns a dictionary with all resources, where keys are the dataset keys,
         and values are the dataset configurations.
         """
-        return self._resources
+        return {key: self.resource(key) for key in self._catalog.keys()}
+
+    def keys_with_prefix(self, prefix: str) -> List[str]:
+        """Returns the (sorted) keys of the datasets starting with the given prefix"""
+        return self._catalog.keys_with_prefix(prefix)
+
+    def refresh(self):
+        """Scans the base path again, without waiting for the refresh interval"""
+        self._catalog.refresh(force=True)
     
     def _get_path(self, key: str) -> str:
-        return str(self.base_path / f"{key}.{self.default_file_type}")
+        file_name = f"{key}.{self.default_file_type}"
+
+        return str(self.base_path / file_name) if is_local_path(self.base_path) else f"{self.base_path}/{file_name}"
 
     def resource(self, key: str) -> ConfigTree:
         """Returns the configuration for a dataset"""
@@ -40,11 +75,13 @@ class BasePathResourceManager(AbstractResourceManager[ConfigTree]):
     def add(self, key: str, *args, **kwargs):
         """Adds a dataset configuration to the resources"""
 
-        self._resources[key] = self.resource(key)
+        self._catalog.add(key)
+        self._notify_resource_change(key)
     
     def remove(self, key: str):
         """Removes a dataset configuration from the resources"""
-        self._resources.pop(key, None)
+        self._catalog.discard(key)
+        self._notify_resource_change(key)
 
     def has(self, key: str, context: Optional[DataContext] = None) -> bool:
         """Checks if a resource with the given key is defined"""
@@ -53,5 +90,4 @@ class BasePathResourceManager(AbstractResourceManager[ConfigTree]):
         if context is not None and context == DataContext.WRITE:
             return True
         
-        return key in self._resources
-        
\ No newline at end of file
+        return key in self._catalog
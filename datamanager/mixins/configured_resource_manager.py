@@ -1,15 +1,38 @@
-from typing import Dict, Optional
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
 
-from pyhocon import ConfigTree
+from pyhocon import ConfigFactory, ConfigTree
 
 from ..interfaces.abstract_resource_manager import AbstractResourceManager
 from ..types import DataContext
+from ..utils.sqlite_catalog import SQLiteCatalog
 
 
 class ConfiguredResourceManager(AbstractResourceManager[ConfigTree]):
-    def __init__(self, config: ConfigTree, **kwargs):
+    """
+    Resources are defined in a config tree. With a :class:`SQLiteCatalog`, the resources are also written to
+    the catalog (under the data manager's id), and the data manager can be created without config: the resources
+    are then read from the catalog when needed, instead of parsing the whole config.
+    """
+    def __init__(self, config: Optional[ConfigTree] = None, catalog: Optional[SQLiteCatalog] = None, **kwargs):
         super().__init__(**kwargs)
-        self._config = config.get(self._config_root) if self._config_root is not None else config
+        self._resource_catalog = catalog
+
+        if config is None:
+            if catalog is None:
+                raise ValueError("You need to provide either a config or a catalog")
+
+            # Filled from the catalog as resources are used
+            self._config = ConfigTree()
+            self._all_loaded = False
+        else:
+            self._config = config.get(self._config_root) if self._config_root is not None else config
+            self._all_loaded = True
+
+            if catalog is not None:
+                self._sync_catalog()
 
     @property
     def _config_root(self) -> Optional[str]:
@@ -20,29 +43,75 @@ class ConfiguredResourceManager(AbstractResourceManager[ConfigTree]):
         """
         return None
 
+    @property
+    def _catalog_namespace(self) -> str:
+        return self.id
+
     @property
     def resources(self) -> Dict[str, ConfigTree]:
         """
         Returns a dictionary with all resources, where keys are the dataset keys,
         and values are the dataset configurations.
         """
+        if not self._all_loaded:
+            for key, definition in self._resource_catalog.definitions(self._catalog_namespace).items():
+                if key not in self._config:
+                    self._config.put(key, ConfigFactory.from_dict(definition))
+            self._all_loaded = True
+
         return self._config
 
     def resource(self, key: str) -> ConfigTree:
         """Returns the configuration for a dataset"""
+        self._load_from_catalog(key)
+
         return self._config.get(key)
 
+    def search(self, prefix: Optional[str] = None, tag: Optional[str] = None) -> List[str]:
+        """Returns the (sorted) keys of the resources starting with a prefix and/or tagged with a tag"""
+        if self._resource_catalog is not None:
+            return self._resource_catalog.search(self._catalog_namespace, prefix=prefix, tag=tag)
+
+        return sorted(
+            key
+            for key, resource in self._config.items()
+            if key.startswith(prefix or "") and (tag is None or tag in resource.get_list("tags", default=[]))
+        )
+
     def add(self, key: str, resource: ConfigTree):
         """Adds a dataset configuration to the resources"""
         self._config.put(key, resource)
+        if self._resource_catalog is not None:
+            self._resource_catalog.put(self._catalog_namespace, key, _plain(resource))
+
+        self._notify_resource_change(key)
     
     def remove(self, key: str):
         """Removes a dataset configuration from the resources"""
-        self._config.pop(key)
+        self._config.pop(key, None)
+        if self._resource_catalog is not None:
+            self._resource_catalog.delete(self._catalog_namespace, key)
+
+        self._notify_resource_change(key)
+
+    def record_stats(self, key: str, dataset: Any = None):
+        """
+        Records the stats of a stored dataset in the catalog, if there is one: its schema (from the dataset's dtypes),
+        and its size and modification time, if it's stored in the local file system.
+        """
+        if self._resource_catalog is None:
+            return
+
+        size, modified_at = _path_stats(self.resolve(key))
+        schema = {str(column): str(dtype) for column, dtype in dict(dataset.dtypes).items()} if hasattr(dataset, "dtypes") else None
+
+        self._resource_catalog.record_stats(self._catalog_namespace, key, size=size, schema=schema, modified_at=modified_at)
 
     def has(self, key: str, context: Optional[DataContext] = None) -> bool:
         """Checks if a resource with the given key is defined"""
         
+        self._load_from_catalog(key)
+
         # If we don't have a config for the resource, return False
         if key not in self._config:
             return False
@@ -53,14 +122,45 @@ class ConfiguredResourceManager(AbstractResourceManager[ConfigTree]):
           return True (perhaps we want to implement a write-only in the future?) 
         - If the context is write and the resource is not read-only, we return true
         """
-        resource = self.resource(key)
-
         if context is None or context == DataContext.READ:
             return True
-        
-        is_read_only = resource.get_bool("read_only", default=False)
 
-        return not is_read_only
+        return not self.spec(key).read_only
 
+    def _load_from_catalog(self, key: str):
+        if self._all_loaded or key in self._config:
+            return
 
-    
+        definition = self._resource_catalog.get(self._catalog_namespace, key)
+        if definition is not None:
+            self._config.put(key, ConfigFactory.from_dict(definition))
+
+    def _sync_catalog(self):
+        definitions = {key: _plain(resource) for key, resource in self._config.items()}
+        fingerprint = hashlib.sha1(json.dumps(definitions, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+        if self._resource_catalog.sync(self._catalog_namespace, definitions, fingerprint):
+            self.logger.debug(f"Synced {len(definitions)} resources to the catalog")
+
+
+def _plain(resource: Any) -> Any:
+    return resource.as_plain_ordered_dict() if isinstance(resource, ConfigTree) else resource
+
+
+def _path_stats(path: str) -> Tuple[Optional[int], Optional[float]]:
+    """Returns the size and modification time of a local file or directory, or Nones if it isn't a local path"""
+    try:
+        stat = os.stat(path)
+    except (OSError, ValueError):
+        return None, None
+
+    if not os.path.isdir(path):
+        return stat.st_size, stat.st_mtime
+
+    size = sum(
+        os.path.getsize(os.path.join(dir_path, file_name))
+        for dir_path, _, file_names in os.walk(path)
+        for file_name in file_names
+    )
+
+    return size, stat.st_mtime
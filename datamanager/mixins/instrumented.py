@@ -0,0 +1,91 @@
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+class Span:
+    """
+    The timing of one phase ("route", "resolve", "convert", "read", "write", "exists", "delete"...) of an operation
+    ("load", "save", "delete", "exists") on a dataset. Attributes hold extra data, like "rows", "bytes" or "converter".
+    """
+    __slots__ = ("operation", "phase", "key", "manager_id", "attributes", "started_at", "duration", "error")
+
+    def __init__(self, operation: str, phase: str, key: Optional[str], manager_id: Optional[str], attributes: Dict[str, Any]):
+        self.operation = operation
+        self.phase = phase
+        self.key = key
+        self.manager_id = manager_id
+        self.attributes = attributes
+        self.started_at = time.time()
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __repr__(self) -> str:
+        return (
+            f"Span(operation={self.operation!r}, phase={self.phase!r}, key={self.key!r}, manager_id={self.manager_id!r}, "
+            f"duration={self.duration}, error={self.error!r}, attributes={self.attributes})"
+        )
+
+
+class _NoopSpan:
+    """Returned when nobody observes the spans. It's falsy, so callers can skip computing attributes"""
+    __slots__ = ()
+
+    def set(self, **attributes):
+        pass
+
+    def __bool__(self) -> bool:
+        return False
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+OBSERVER = Callable[[Span], None]
+
+
+class Instrumented:
+    """
+    Emits a :class:`Span` to every registered observer for each timed phase of an operation.
+    Without observers, timing a phase is a single check and no span is created.
+    """
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._observers: List[OBSERVER] = []
+
+    def add_observer(self, observer: OBSERVER):
+        """Registers a function that will be called with every finished span"""
+        self._observers.append(observer)
+
+    def remove_observer(self, observer: OBSERVER):
+        self._observers.remove(observer)
+
+    def _span(self, operation: str, phase: str, key: Optional[str] = None, **attributes):
+        if not self._observers:
+            return _NOOP_SPAN
+
+        return self._timed_span(operation, phase, key, attributes)
+
+    @contextmanager
+    def _timed_span(self, operation: str, phase: str, key: Optional[str], attributes: Dict[str, Any]) -> Iterator[Span]:
+        span = Span(operation, phase, key, getattr(self, "id", None), attributes)
+        start = time.perf_counter()
+
+        try:
+            yield span
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            span.duration = time.perf_counter() - start
+
+            for observer in list(self._observers):
+                observer(span)
@@ -1,9 +1,23 @@
+import os
+import shutil
+import uuid
+from functools import partial
 from pathlib import Path
-from typing import Optional, TypeVar, Generic
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Set, Tuple
 
 import pandas as pd
+from pyhocon import ConfigFactory
 
 from ..interfaces.abstract_storage_manager import AbstractStorageManager 
+from ..utils.feather_cache import FeatherCache
+from ..utils.dataset_meta import VersionInfo, modified_at, pandas_fingerprint, read_meta, version_path, write_meta
+from ..utils.dtypes import compact as compact_dataset, nullable_dtype
+from ..utils.filters import FILTER, FILTERS, apply_pandas, required_columns, resource_projection
+from ..utils.memory import dataset_stats
+from ..utils.partitions import PARTITIONS, partition_paths, with_partition_filters
+from ..utils.resource_spec import ResourceSpec
+from ..utils.save_modes import save_mode, upsert_pandas
+from ..utils.staging import STALE_STAGING_SECONDS, cleanup_staging, link_or_copy, publish, remove, rollback, staging_path
 from .with_dataset_converter import WithDatasetConverter
 
 
@@ -11,73 +25,696 @@ class PandasStorageManager(WithDatasetConverter, AbstractStorageManager[pd.DataF
     """
     Uses Pandas as the underlying storage. Note that this storage manager
     will only work when mixed together with a resource manager.
+
+    Datasets are written to a staging path next to them, and then moved into place, so readers never see partial
+    files, and a killed writer leaves the current version untouched. Unless ``keep_previous`` is False (which
+    resources can override), the replaced version is kept and can be restored with :func:`rollback`. Staging
+    files older than ``stale_staging_seconds`` are removed the first time a dataset of their directory is saved.
+
+    With ``skip_unchanged`` (or ``skip_unchanged: true`` in the resource), saves are skipped when the dataset has
+    the same content as the last save, and the saved dataset wasn't modified since. Resources with ``versions: N``
+    keep their last N versions, which can be loaded with ``load(key, version=...)``. Both are tracked in a sidecar
+    meta file next to the dataset (see :class:`datamanager.utils.dataset_meta.DatasetMeta`).
     """
+    _DEFAULT_CHUNK_SIZE: int = 100_000
+
+    def __init__(self, disk_cache: Optional[FeatherCache] = None, keep_previous: bool = True,
+                 stale_staging_seconds: float = STALE_STAGING_SECONDS, skip_unchanged: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self._disk_cache = disk_cache
+        self._keep_previous = keep_previous
+        self._skip_unchanged = skip_unchanged
+        self._stale_staging_seconds = stale_staging_seconds
+        self._cleaned_staging_dirs: Set[str] = set()
+
     def exists(self, key: str) -> bool:
         """Checks if the resource with the given key exists in the underlying storage"""
         if not self.has(key):
             self.logger.debug(f"Resource with key '{key}' is not defined in the resource manager")
         
-        dataset_path = self.resolve(key)
+        with self._span("exists", "exists", key):
+            dataset_path = Path(self.resolve(key))
+
+            return dataset_path.exists()
+
+    def load(self, key: str, columns: Optional[List[str]] = None, filters: Optional[FILTERS] = None,
+             partitions: Optional[PARTITIONS] = None, compact: Optional[bool] = None, version: Optional[int] = None,
+             **kwargs) -> pd.DataFrame:
+        """
+        Loads a resource from the underlying storage. For versioned resources, ``version`` loads one of the kept
+        versions instead of the current one (see :func:`versions`).
+
+        Only the given ``columns``, and only the rows matching the ``filters`` are returned (see
+        :func:`datamanager.utils.filters.normalize_filters`). Both can also be set with the ``columns`` and
+        ``filters`` keys of the resource. Parquet files push both down to pyarrow, which skips the row groups
+        that can't match. CSV and Feather files only read the needed columns, and filter rows in memory.
+
+        For parquet datasets partitioned by the columns in the ``partition_by`` key of the resource,
+        ``partitions`` (e.g. ``{"date": ["2021-01-01", "2021-01-02"]}``) selects the ``col=value`` directories
+        to read, without listing the others. For any other dataset, it's the same as filtering by those values.
+
+        With ``compact=True``, or ``compact: true`` in the resource, columns are converted to smaller dtypes after
+        loading (see :func:`datamanager.utils.dtypes.infer_compact_dtypes`). The resource can also set the options
+        of the compact mode (``compact { category_ratio: 0.2, arrow_strings: true, save_dtypes: true }``), and a
+        ``dtypes`` map, which is used instead of inferring the dtypes. With ``save_dtypes``, the inferred dtypes
+        are saved to the resource, so later loads skip the inference.
+        """
+        with self._span("load", "resolve", key):
+            spec = self._versioned_spec(key, version)
+
+        with self._span("load", "read", key, file_type=spec.type) as span:
+            dataset = self._read(key, spec, columns, filters, partitions)
+            if span:
+                span.set(**dataset_stats(dataset))
+
+        compact_options = self._compact_options(spec, compact)
+        if compact_options is not None:
+            dataset = self._compact(key, spec, dataset, compact_options, full_dataset=columns is None and spec.columns is None)
+
+        return dataset
+
+    def _read(self, key: str, spec: ResourceSpec, columns: Optional[List[str]], filters: Optional[FILTERS],
+              partitions: Optional[PARTITIONS]) -> pd.DataFrame:
+        file_type = spec.type
+        reader = self._get_reader(file_type)
+            
+        dataset_path = spec.path
+        options = spec.options
+        columns, filters = resource_projection(spec, columns, filters)
+
+        if partitions:
+            partition_dirs, partitions = self._partition_dirs(spec, partitions)
+            filters = with_partition_filters(filters, partitions)
+
+            if partition_dirs is not None:
+                self.logger.debug(f"Reading partitions {partition_dirs} of dataset '{key}'")
+                return read_partitions(dataset_path, partition_dirs, columns, filters, options)
+
+        if self._uses_disk_cache(spec):
+            dataset = self._load_with_disk_cache(key, reader, dataset_path, options)
+            return apply_pandas(dataset, columns, filters)
+
+        read_options, columns, filters = self._pushdown(file_type, options, columns, filters)
+
+        self.logger.debug(f"Reading dataset '{key}' from path '{dataset_path}' using method '{reader.__name__}' and options={dict(read_options)}'")
+        
+        return read_dataset(reader, dataset_path, read_options, columns, filters)
+
+    @staticmethod
+    def _partition_dirs(spec: ResourceSpec, partitions: PARTITIONS) -> Tuple[Optional[List[str]], PARTITIONS]:
+        if spec.type != "parquet":
+            return None, partitions
+
+        return partition_paths(spec.path, spec.partition_by, partitions)
+
+    @staticmethod
+    def _pushdown(file_type: str, options: Mapping[str, Any], columns: Optional[List[str]], filters: Optional[List[List[FILTER]]]) -> Tuple[Dict[str, Any], Optional[List[str]], Optional[List[List[FILTER]]]]:
+        """
+        Adds the columns and filters that the reader can apply itself to the read options.
+        Returns the read options, and the columns and filters that still need to be applied in memory.
+        """
+        file_type = file_type.lower()
+        read_options = dict(options)
+
+        if file_type == "parquet":
+            if columns is not None:
+                read_options["columns"] = columns
+            if filters is not None:
+                read_options["filters"] = filters
+            return read_options, None, None
+
+        column_options = {"csv": "usecols", "feather": "columns"}
+        if columns is not None and file_type in column_options:
+            read_options[column_options[file_type]] = required_columns(columns, filters)
+
+        return read_options, columns, filters
+
+    def _uses_disk_cache(self, spec: ResourceSpec) -> bool:
+        # Feather files are already memory-mapped, caching them would only duplicate them
+        return self._disk_cache is not None and spec.type != "feather" and spec.disk_cache
+
+    def _load_with_disk_cache(self, key: str, reader: Callable, dataset_path: str, options: Mapping[str, Any]) -> pd.DataFrame:
+        fingerprint = self._disk_cache.fingerprint(dataset_path, dict(options))
+        dataset = self._disk_cache.get(fingerprint) if fingerprint is not None else None
+
+        if dataset is not None:
+            self.logger.debug(f"Dataset '{key}' loaded from the disk cache")
+            return dataset
+
+        self.logger.debug(f"Reading dataset '{key}' from path '{dataset_path}' using method '{reader.__name__}' and options={dict(options)}'")
+        dataset = reader(dataset_path, **options)
+
+        if fingerprint is not None:
+            self._disk_cache.put(fingerprint, dataset)
+
+        return dataset
+
+    def _read_task(self, key: str, columns: Optional[List[str]] = None, filters: Optional[FILTERS] = None,
+                   partitions: Optional[PARTITIONS] = None, compact: Optional[bool] = None, version: Optional[int] = None,
+                   **kwargs) -> Optional[Callable[[], pd.DataFrame]]:
+        spec = self._versioned_spec(key, version)
+
+        # The disk cache lives in this process, and compacting may save the dtypes to the resource
+        if partitions or self._uses_disk_cache(spec) or self._compact_options(spec, compact) is not None:
+            return None
+
+        columns, filters = resource_projection(spec, columns, filters)
+        read_options, columns, filters = self._pushdown(spec.type, spec.options, columns, filters)
+
+        return partial(read_dataset, self._get_reader(spec.type), spec.path, read_options, columns, filters)
+
+    @staticmethod
+    def _compact_options(spec: ResourceSpec, compact: Optional[bool]) -> Optional[Mapping[str, Any]]:
+        if compact is None:
+            return spec.compact
 
-        return dataset_path.is_file()
+        return (spec.compact or dict()) if compact else None
 
-    def load(self, key: str, **kwargs) -> pd.DataFrame:
-        """Loads a resource from the underlying storage"""
-        resource = self.resource(key)
+    def _compact(self, key: str, spec: ResourceSpec, dataset: pd.DataFrame, options: Mapping[str, Any],
+                 full_dataset: bool) -> pd.DataFrame:
+        with self._span("load", "compact", key) as span:
+            result = compact_dataset(
+                dataset,
+                dtypes=spec.dtypes,
+                category_ratio=options.get("category_ratio", 0.5),
+                arrow_strings=options.get("arrow_strings", False),
+            )
+            span.set(bytes_before=result.bytes_before, bytes_after=result.bytes_after)
 
-        file_type = resource.get("type", default=self.default_file_type)
+        self.logger.debug(
+            f"Compacted dataset '{key}' from {result.bytes_before / 2 ** 20:.1f} MB to {result.bytes_after / 2 ** 20:.1f} MB"
+        )
+
+        # The dtypes of a subset of the columns would leave out the others on later loads
+        if spec.dtypes is None and full_dataset and options.get("save_dtypes", False):
+            self.logger.debug(f"Saving the dtypes of dataset '{key}' to its resource: {result.dtypes}")
+            # As [column, dtype] pairs: keys of a map with dots or colons would be read as paths by pyhocon
+            dtypes = [[column, dtype] for column, dtype in result.dtypes.items()]
+            self.add(key, ConfigFactory.from_dict({**spec.resource.as_plain_ordered_dict(), "dtypes": dtypes}))
+
+            if self.spec(key).dtypes is None:
+                self.logger.warning(f"The resource of dataset '{key}' can't store its dtypes, they will be inferred on every load")
+
+        return result.dataset
+
+    def load_iter(self, key: str, chunk_size: Optional[int] = None, columns: Optional[List[str]] = None,
+                  filters: Optional[FILTERS] = None, partitions: Optional[PARTITIONS] = None, compact: Optional[bool] = None,
+                  version: Optional[int] = None, **kwargs) -> Iterator[pd.DataFrame]:
+        """
+        Loads a resource from the underlying storage in chunks of at most ``chunk_size`` rows.
+        The chunk size can also be set with the ``chunk_size`` key of the resource.
+
+        CSV and JSON files are read with pandas' ``chunksize`` (JSON files need ``lines: true`` in the options).
+        Parquet datasets are read batch by batch, or row group by row group when no chunk size is given.
+        Columns, filters, partitions and versions work as in :func:`load`, filters being applied to each chunk.
+        In compact mode, only the stored ``dtypes`` of the resource are applied (see :func:`_compact_chunks`).
+
+        The parquet ``options`` of the resource that apply to datasets (``partitioning``, ``filesystem``,
+        ``ignore_prefixes``, ``exclude_invalid_files``, ``schema``) and ``dtype_backend`` are used, others are ignored.
+        """
+        spec = self._versioned_spec(key, version)
+
+        chunk_size = chunk_size or spec.chunk_size
+        columns, filters = resource_projection(spec, columns, filters)
+        filters = with_partition_filters(filters, partitions)
+
+        compact_options = self._compact_options(spec, compact)
+        chunks = self._iter_chunks(key, spec, chunk_size, columns, filters)
+
+        return self._compact_chunks(key, spec, chunks, compact_options) if compact_options is not None else chunks
+
+    def _iter_chunks(self, key: str, spec: ResourceSpec, chunk_size: Optional[int], columns: Optional[List[str]],
+                     filters: Optional[List[List[FILTER]]]) -> Iterator[pd.DataFrame]:
+        file_type = spec.type
+        dataset_path = spec.path
+        options = spec.options
+
+        if file_type == "parquet":
+            ignored_options = sorted(set(options) - set(_PARQUET_DATASET_OPTIONS) - {"dtype_backend"})
+            if ignored_options:
+                self.logger.debug(f"Options {ignored_options} of dataset '{key}' are ignored when loading it in chunks")
+
+            self.logger.debug(f"Reading dataset '{key}' from path '{dataset_path}' in chunks of {chunk_size} rows")
+            return self._iter_parquet(dataset_path, chunk_size, columns, filters, options)
+
+        if file_type not in ("csv", "json"):
+            raise ValueError(f"Loading datasets in chunks is not supported for file type '{file_type}'")
+
+        if file_type == "json" and not options.get("lines", False):
+            raise ValueError(f"Dataset '{key}' needs the option 'lines: true' to be loaded in chunks")
+
+        reader = self._get_reader(file_type)
+        read_options, columns, filters = self._pushdown(file_type, options, columns, filters)
+
+        self.logger.debug(f"Reading dataset '{key}' from path '{dataset_path}' in chunks of {chunk_size} rows and options={read_options}'")
+
+        return self._iter_reader(reader, dataset_path, chunk_size or self._DEFAULT_CHUNK_SIZE, read_options, columns, filters)
+
+    def _compact_chunks(self, key: str, spec: ResourceSpec, chunks: Iterator[pd.DataFrame],
+                        options: Mapping[str, Any]) -> Iterator[pd.DataFrame]:
+        """
+        Applies the stored dtypes of the resource to each chunk. Integer dtypes are made nullable (Int8...), so a
+        chunk with missing values gets the same dtypes as the others. Dtypes inferred from a single chunk may not
+        fit the next ones, so chunks aren't compacted if the resource has no stored dtypes.
+        """
+        if spec.dtypes is None:
+            self.logger.debug(f"Dataset '{key}' has no stored dtypes, its chunks are not compacted (see 'save_dtypes')")
+            yield from chunks
+            return
+
+        dtypes = {column: nullable_dtype(dtype) for column, dtype in spec.dtypes.items()}
+
+        for chunk in chunks:
+            result = compact_dataset(chunk, dtypes=dtypes)
+            not_applied = [column for column in dtypes if column in chunk.columns and column not in result.dtypes]
+            if not_applied:
+                self.logger.warning(f"The stored dtypes of columns {not_applied} of dataset '{key}' don't fit the values of a chunk, they are left as read")
+
+            yield result.dataset
+
+    @staticmethod
+    def _iter_reader(reader: Callable, dataset_path: str, chunk_size: int, options: Mapping[str, Any],
+                     columns: Optional[List[str]], filters: Optional[List[List[FILTER]]]) -> Iterator[pd.DataFrame]:
+        with reader(dataset_path, chunksize=chunk_size, **options) as chunks:
+            for chunk in chunks:
+                yield apply_pandas(chunk, columns, filters)
+
+    @staticmethod
+    def _iter_parquet(dataset_path: str, chunk_size: Optional[int], columns: Optional[List[str]],
+                      filters: Optional[List[List[FILTER]]], options: Mapping[str, Any]) -> Iterator[pd.DataFrame]:
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+
+        dataset_options = {"partitioning": "hive"}
+        dataset_options.update((option, value) for option, value in options.items() if option in _PARQUET_DATASET_OPTIONS)
+        to_pandas_options = _arrow_to_pandas_options(options.get("dtype_backend"))
+
+        # Works for single files as well as (partitioned) directories
+        dataset = ds.dataset(dataset_path, format="parquet", **dataset_options)
+        expression = pq.filters_to_expression(filters) if filters else None
+
+        if chunk_size is None:
+            for fragment in dataset.get_fragments(filter=expression):
+                for row_group in fragment.split_by_row_group(filter=expression, schema=dataset.schema):
+                    yield row_group.to_table(columns=columns, filter=expression, schema=dataset.schema).to_pandas(**to_pandas_options)
+            return
+
+        for batch in dataset.to_batches(columns=columns, filter=expression, batch_size=chunk_size):
+            yield batch.to_pandas(**to_pandas_options)
+
+    @staticmethod
+    def _get_reader(file_type: str) -> Callable:
         read_method = f"read_{file_type.lower()}"
         if not hasattr(pd, read_method):
             error_msg = f"Pandas has no method '{read_method}' for file type '{file_type}'"
             raise ValueError(error_msg)
 
-        reader = getattr(pd, read_method)
-            
-        dataset_path = self.resolve(key)
-        options = resource.get("options", default=dict())
+        return getattr(pd, read_method)
 
-        self.logger.debug(f"Reading dataset '{key}' from path '{dataset_path}' using method '{read_method}' and options={dict(options)}'")
-        
-        return reader(dataset_path, **options)
+    def save(self, key: str, dataset: pd.DataFrame, overwrite: Optional[bool] = True,
+             partition_by: Optional[List[str]] = None, mode: Optional[str] = None,
+             primary_key: Optional[List[str]] = None, **kwargs) -> bool:
+        """
+        Saves a dataset to the underlying storage. Parquet datasets can be partitioned by some columns,
+        given with ``partition_by`` or the ``partition_by`` key of the resource, and written as a directory.
 
-    def save(self, key: str, dataset: pd.DataFrame, overwrite: Optional[bool] = True, **kwargs) -> bool:
-        """Saves a dataset to the underlying storage"""
-        dataset_path = self.resolve(key)
+        ``mode`` can be ``overwrite`` or ``error`` (the default, depending on ``overwrite``), ``append`` or ``upsert``:
 
-        if dataset_path.is_file() and not overwrite:
+        - append: parquet datasets get new part files, without reading the existing ones (a single file dataset is
+          turned into a directory the first time). CSV files, and JSON files with ``lines: true``, are appended to.
+          Other formats are read, and written again with the new rows.
+        - upsert: rows with the same ``primary_key`` (given, or from the resource) as the new ones are replaced,
+          and the others are kept. Partitioned datasets only rewrite the partitions that have new rows.
+        """
+        with self._span("save", "resolve", key):
+            spec = self.spec(key)
+        dataset_path = Path(spec.path)
+        mode = save_mode(mode, overwrite)
+        primary_key = primary_key or spec.primary_key
+
+        if dataset_path.exists() and mode == "error":
             raise ValueError(f"File '{dataset_path}' for dataset '{key}' already exists, and overwrite=False")
         
-        resource = self.resource(key)
-        if resource.get_bool("read_only", False):
+        if spec.read_only:
             raise ValueError(f"Dataset '{key}' is read-only, you can't save to it!")
 
-        file_type = resource.get("type", default=self.default_file_type)
-        save_method = f"to_{file_type.lower()}"
-        if not hasattr(pd, save_method):
+        if mode == "upsert" and not primary_key:
+            raise ValueError(f"Dataset '{key}' has no primary key, it can't be upserted")
+
+        file_type = spec.type
+        save_method = f"to_{file_type}"
+        if not hasattr(pd.DataFrame, save_method):
             error_msg = f"Pandas has no method '{save_method}' for file type '{file_type}'"
             raise ValueError(error_msg)
         
         # This will convert the dataset to pandas, assuming we have a converter for it
-        dataset = self._convert(dataset, pd.DataFrame)
-        writer = getattr(dataset, save_method)
+        dataset = self._convert(dataset, pd.DataFrame, key)
         
-        # This shouldn't be a problem, but just in case, remember that get returns a ConfigTree, not a real dictionary.
-        save_options = resource.get("save_options", default=dict())
+        save_options = dict(spec.save_options)
+        partition_by = list(partition_by or spec.partition_by)
+
+        if partition_by:
+            if file_type != "parquet":
+                raise ValueError(f"Dataset '{key}' can't be partitioned, only parquet datasets can")
+
+            self.logger.debug(f"Partitioning dataset '{key}' by columns '{partition_by}'")
+            save_options["partition_cols"] = partition_by
+
+        self._cleanup_staging(dataset_path.parent)
 
-        self.logger.debug(f"Writing dataset '{key}' to path '{dataset_path}' using method '{save_method}' and options={save_options}'")
+        if dataset_path.exists() and mode == "append":
+            return self._append(key, spec, dataset, save_options)
 
-        writer(dataset_path, **save_options)
+        if dataset_path.exists() and mode == "upsert":
+            if partition_by:
+                return self._upsert_partitions(key, spec, dataset, partition_by, primary_key, save_options)
 
-        return dataset_path.is_file()
+            with self._span("save", "read", key, file_type=file_type):
+                existing = read_dataset(self._get_reader(file_type), spec.path, dict(spec.options))
+            dataset = upsert_pandas(existing, dataset, primary_key)
+        elif mode == "upsert":
+            # The first upsert doesn't keep duplicate primary keys either
+            dataset = upsert_pandas(None, dataset, primary_key)
+
+        return self._write(key, spec, dataset, save_options)
+
+    def _write(self, key: str, spec: ResourceSpec, dataset: pd.DataFrame, save_options: Dict[str, Any]) -> bool:
+        """Writes the whole dataset to a staging path, and moves it into place"""
+        dataset_path = Path(spec.path)
+        save_method = f"to_{spec.type}"
+        writer = getattr(dataset, save_method)
+        skip_unchanged = spec.skip_unchanged if spec.skip_unchanged is not None else self._skip_unchanged
+        meta = read_meta(spec.path) if skip_unchanged or spec.versions else None
+        fingerprint = None
+
+        if skip_unchanged:
+            with self._span("save", "fingerprint", key) as span:
+                fingerprint = pandas_fingerprint(dataset, spec.type, save_options)
+                unchanged = fingerprint is not None and fingerprint == meta.fingerprint and meta.modified_at == modified_at(spec.path)
+                span.set(unchanged=unchanged)
+
+            if unchanged:
+                self.logger.debug(f"Dataset '{key}' didn't change since it was saved, skipping the write")
+                return True
+
+        # The current version of a versioned dataset is moved to the versions directory, instead of being the previous one
+        previous = version_path(spec.path, meta.version) if spec.versions and meta.version is not None else None
+        keep_previous = self._keeps_previous(spec) or previous is not None
+        staging = staging_path(str(dataset_path))
+
+        self.logger.debug(f"Writing dataset '{key}' to staging path '{staging}' using method '{save_method}' and options={save_options}'")
+
+        try:
+            with self._span("save", "write", key, file_type=spec.type) as span:
+                writer(staging, **save_options)
+                if span:
+                    span.set(**dataset_stats(dataset))
+
+            with self._span("save", "publish", key):
+                publish(staging, str(dataset_path), keep_previous=keep_previous, previous=previous)
+        except BaseException:
+            remove(staging)
+            raise
+
+        if meta is not None:
+            meta, dropped_versions = meta.saved(fingerprint, modified_at(spec.path), spec.versions)
+            for dropped_version in dropped_versions:
+                self.logger.debug(f"Removing version {dropped_version} of dataset '{key}'")
+                remove(version_path(spec.path, dropped_version))
+            write_meta(spec.path, meta)
+
+        return dataset_path.exists()
+
+    def versions(self, key: str) -> List[VersionInfo]:
+        """Returns the kept versions of a dataset, oldest first. The last one is the current dataset"""
+        return list(read_meta(self.spec(key).path).versions)
+
+    def _versioned_spec(self, key: str, version: Optional[int]) -> ResourceSpec:
+        spec = self.spec(key)
+        if version is None:
+            return spec
+
+        meta = read_meta(spec.path)
+        if version not in {info.version for info in meta.versions}:
+            raise ValueError(f"Version {version} of dataset '{key}' doesn't exist, the kept versions are {[info.version for info in meta.versions]}")
+
+        return spec if version == meta.version else spec._replace(path=version_path(spec.path, version))
+
+    def _append(self, key: str, spec: ResourceSpec, dataset: pd.DataFrame, save_options: Dict[str, Any]) -> bool:
+        dataset_path = Path(spec.path)
+
+        if spec.type == "parquet":
+            return self._append_parquet(key, spec, dataset, save_options)
+
+        if spec.type == "csv" or (spec.type == "json" and save_options.get("lines")):
+            size = dataset_path.stat().st_size
+            self.logger.debug(f"Appending {len(dataset)} rows to dataset '{key}' at path '{dataset_path}'")
+
+            try:
+                with self._span("save", "write", key, file_type=spec.type, mode="append") as span:
+                    append_options = {**save_options, "mode": "a"}
+                    if spec.type == "csv":
+                        append_options["header"] = False
+                    getattr(dataset, f"to_{spec.type}")(dataset_path, **append_options)
+                    if span:
+                        span.set(**dataset_stats(dataset))
+            except BaseException:
+                # Appending is done in place: cut the rows of the failed write
+                with open(dataset_path, "r+b") as f:
+                    f.truncate(size)
+                raise
+
+            return True
+
+        self.logger.debug(f"Dataset '{key}' of type '{spec.type}' can't be appended to, rewriting it")
+        with self._span("save", "read", key, file_type=spec.type):
+            existing = read_dataset(self._get_reader(spec.type), spec.path, dict(spec.options))
+
+        return self._write(key, spec, pd.concat([existing, dataset], ignore_index=True), save_options)
+
+    def _append_parquet(self, key: str, spec: ResourceSpec, dataset: pd.DataFrame, save_options: Dict[str, Any]) -> bool:
+        """
+        Adds the dataset as new part files. The files are written to a staging directory first, and then moved
+        into the dataset directory one by one (each move is atomic).
+        """
+        dataset_path = Path(spec.path)
+        staging = Path(staging_path(str(dataset_path)))
+
+        try:
+            with self._span("save", "write", key, file_type=spec.type, mode="append") as span:
+                if "partition_cols" in save_options:
+                    dataset.to_parquet(staging, **save_options)
+                else:
+                    staging.mkdir()
+                    dataset.to_parquet(staging / _part_file_name(), **save_options)
+                if span:
+                    span.set(**dataset_stats(dataset))
+
+            with self._span("save", "publish", key):
+                if dataset_path.is_dir():
+                    part_files = [Path(root) / file_name for root, _, file_names in os.walk(staging) for file_name in file_names]
+                    self.logger.debug(f"Appending {len(part_files)} part files to dataset '{key}' at path '{dataset_path}'")
+
+                    for part_file in part_files:
+                        destination = dataset_path / part_file.relative_to(staging)
+                        destination.parent.mkdir(parents=True, exist_ok=True)
+                        os.replace(part_file, destination)
+
+                    # Files added to partition directories don't change the dataset's modification time
+                    os.utime(dataset_path)
+                    remove(str(staging))
+                else:
+                    if "partition_cols" in save_options:
+                        raise ValueError(f"Dataset '{key}' is a single file, it can't be appended to as a partitioned dataset")
+
+                    self.logger.debug(f"Turning dataset '{key}' at path '{dataset_path}' into a directory of part files")
+                    link_or_copy(str(dataset_path), str(staging / _part_file_name()))
+                    publish(str(staging), str(dataset_path), keep_previous=self._keeps_previous(spec))
+        except BaseException:
+            remove(str(staging))
+            raise
+
+        return True
+
+    def _upsert_partitions(self, key: str, spec: ResourceSpec, dataset: pd.DataFrame, partition_by: List[str],
+                           primary_key: List[str], save_options: Dict[str, Any]) -> bool:
+        """Merges the new rows into the partitions they belong to, rewriting only those partitions"""
+        # Every row of a partition has the same values for the partition columns
+        row_key = [column for column in primary_key if column not in partition_by]
+        save_options = {option: value for option, value in save_options.items() if option != "partition_cols"}
+
+        for values, partition_dataset in dataset.groupby(partition_by, sort=False, observed=True, dropna=False):
+            partition_dirs, _ = partition_paths(spec.path, partition_by, dict(zip(partition_by, values)))
+            partition_dir = partition_dirs[0]
+            partition_dataset = partition_dataset.drop(columns=partition_by)
+
+            if row_key:
+                existing = None
+                if os.path.isdir(partition_dir):
+                    with self._span("save", "read", key, file_type=spec.type, partition=partition_dir):
+                        existing = read_partitions(spec.path, [partition_dir], options=spec.options).drop(columns=partition_by, errors="ignore")
+                # New partitions are de-duplicated too
+                partition_dataset = upsert_pandas(existing, partition_dataset, row_key)
+            else:
+                # The primary key is made of the partition columns: the last row replaces the partition
+                partition_dataset = partition_dataset.tail(1)
+
+            self.logger.debug(f"Rewriting partition '{partition_dir}' of dataset '{key}' with {len(partition_dataset)} rows")
+            staging = Path(staging_path(partition_dir))
+
+            try:
+                with self._span("save", "write", key, file_type=spec.type, mode="upsert") as span:
+                    staging.mkdir(parents=True)
+                    partition_dataset.to_parquet(staging / _part_file_name(), **save_options)
+                    if span:
+                        span.set(**dataset_stats(partition_dataset))
+
+                with self._span("save", "publish", key):
+                    publish(str(staging), partition_dir, keep_previous=False)
+            except BaseException:
+                remove(str(staging))
+                raise
+
+        os.utime(spec.path)
+
+        return True
+
+    def rollback(self, key: str) -> bool:
+        """
+        Swaps a dataset with the version it replaced, if it was kept.
+        Rolling back twice restores the current version.
+
+        Versioned resources restore the version before the current one instead, and the current one is deleted:
+        rolling back twice goes back two versions. Returns False if there is no version to go back to.
+        """
+        spec = self.spec(key)
+        if spec.read_only:
+            raise ValueError(f"Dataset '{key}' is read-only, you can't roll it back!")
+
+        if spec.versions:
+            return self._rollback_version(key, spec)
+
+        self.logger.debug(f"Rolling back dataset '{key}' at path '{spec.path}'")
+
+        return rollback(spec.path)
+
+    def _rollback_version(self, key: str, spec: ResourceSpec) -> bool:
+        meta = read_meta(spec.path)
+        if len(meta.versions) < 2:
+            return False
+
+        restored = meta.versions[-2].version
+        self.logger.debug(f"Rolling back dataset '{key}' at path '{spec.path}' to version {restored}")
+
+        # The current version is moved to a staging path, and deleted
+        publish(version_path(spec.path, restored), spec.path, keep_previous=False, previous=staging_path(spec.path))
+        write_meta(spec.path, meta.rolled_back(modified_at(spec.path)))
+
+        return True
+
+    def _keeps_previous(self, spec: ResourceSpec) -> bool:
+        return spec.keep_previous if spec.keep_previous is not None else self._keep_previous
+
+    def _cleanup_staging(self, directory: Path):
+        if str(directory) in self._cleaned_staging_dirs:
+            return
+
+        for path in cleanup_staging(str(directory), older_than=self._stale_staging_seconds):
+            self.logger.debug(f"Removed stale staging path '{path}'")
+
+        self._cleaned_staging_dirs.add(str(directory))
 
     def delete(self, key: str, **kwargs) -> bool:
         """Deletes a dataset from the underlying storage"""
-        resource = self.resource(key)
-        if resource.get_bool("read_only", False):
+        spec = self.spec(key)
+        if spec.read_only:
             raise ValueError(f"Dataset '{key}' is read-only, you can't delete it!")
 
-        dataset_path = self.resolve(key)
+        dataset_path = Path(spec.path)
+
+        with self._span("delete", "delete", key):
+            if dataset_path.is_dir():
+                shutil.rmtree(dataset_path)
+            else:
+                dataset_path.unlink()
+
+        return not dataset_path.exists()
+
+
+# Parquet read options that pyarrow.dataset.dataset accepts, for chunked loads
+_PARQUET_DATASET_OPTIONS = ("partitioning", "filesystem", "ignore_prefixes", "exclude_invalid_files", "schema")
+
+
+def _arrow_to_pandas_options(dtype_backend: Optional[str]) -> Dict[str, Any]:
+    """The Table.to_pandas options that give the same dtypes as pd.read_parquet with a dtype_backend"""
+    if dtype_backend == "pyarrow":
+        return {"types_mapper": pd.ArrowDtype}
+
+    if dtype_backend == "numpy_nullable":
+        import pyarrow as pa
+
+        nullable_dtypes = {
+            pa.int8(): pd.Int8Dtype(), pa.int16(): pd.Int16Dtype(), pa.int32(): pd.Int32Dtype(), pa.int64(): pd.Int64Dtype(),
+            pa.uint8(): pd.UInt8Dtype(), pa.uint16(): pd.UInt16Dtype(), pa.uint32(): pd.UInt32Dtype(), pa.uint64(): pd.UInt64Dtype(),
+            pa.bool_(): pd.BooleanDtype(), pa.float32(): pd.Float32Dtype(), pa.float64(): pd.Float64Dtype(),
+            pa.string(): pd.StringDtype(), pa.large_string(): pd.StringDtype(),
+        }
+
+        return {"types_mapper": nullable_dtypes.get}
+
+    return dict()
+
+
+def _part_file_name() -> str:
+    return f"part-{uuid.uuid4().hex}.parquet"
+
+
+def read_dataset(reader: Callable, dataset_path: str, read_options: Dict[str, Any], columns: Optional[List[str]] = None,
+                 filters: Optional[List[List[FILTER]]] = None) -> pd.DataFrame:
+    """Reads a dataset, applying the columns and filters that the reader couldn't. Kept at module level so it can be pickled"""
+    return apply_pandas(reader(dataset_path, **read_options), columns, filters)
+
+
+def read_partitions(dataset_path: str, partition_dirs: List[str], columns: Optional[List[str]] = None,
+                    filters: Optional[List[List[FILTER]]] = None, options: Optional[Mapping[str, Any]] = None) -> pd.DataFrame:
+    """
+    Reads some partition directories of a parquet dataset, keeping the partition columns. The parquet ``options``
+    of the resource are used as in :func:`load_iter`. If none of the directories exist, returns an empty dataset
+    with the schema of the whole dataset.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    options = options or dict()
+    dataset_options = {"partitioning": "hive"}
+    dataset_options.update((option, value) for option, value in options.items() if option in _PARQUET_DATASET_OPTIONS)
+    to_pandas_options = _arrow_to_pandas_options(options.get("dtype_backend"))
+
+    files = [
+        os.path.join(root, file_name)
+        for partition_dir in partition_dirs
+        for root, _, file_names in os.walk(partition_dir)
+        for file_name in file_names
+        # Skip metadata files, like _SUCCESS or .crc files
+        if not file_name.startswith(("_", "."))
+    ]
+
+    if not files:
+        schema = ds.dataset(str(dataset_path), format="parquet", **dataset_options).schema if os.path.exists(dataset_path) else None
+        if schema is None or not schema.names:
+            return pd.DataFrame(columns=columns)
+
+        table = schema.empty_table()
+        return (table.select(columns) if columns is not None else table).to_pandas(**to_pandas_options)
+
+    try:
+        dataset = ds.dataset(files, format="parquet", partition_base_dir=str(dataset_path), **dataset_options)
+    except pa.ArrowInvalid:
+        # The type of a partition column can't be inferred from null partitions only, so the whole dataset is inspected
+        schema = ds.dataset(str(dataset_path), format="parquet", **dataset_options).schema
+        dataset = ds.dataset(files, format="parquet", partition_base_dir=str(dataset_path), **{**dataset_options, "schema": schema})
 
-        dataset_path.unlink()
+    expression = pq.filters_to_expression(filters) if filters else None
 
-        return not dataset_path.is_file()
+    return dataset.to_table(columns=columns, filter=expression).to_pandas(**to_pandas_options)
@@ -1,27 +1,80 @@
-from pathlib import Path
-from typing import List, Optional, TypeVar, Generic
-
-from pyspark.sql import DataFrame
-from pyspark.sql import SparkSession
+import math
+import posixpath
+import time
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set, Tuple, Union
 
 from ..interfaces.abstract_storage_manager import AbstractStorageManager 
+from ..utils.dataset_meta import DatasetMeta, VersionInfo, meta_path, spark_fingerprint, version_path
+from ..utils.filters import FILTERS, resource_projection, spark_condition
+from ..utils.hadoop_fs import FileInfo, HadoopFileSystem
+from ..utils.lru_cache import LRUCache
+from ..utils.partitions import PARTITIONS, partition_paths, spark_partition_value, with_partition_filters
+from ..utils.resource_spec import ResourceSpec
+from ..utils.save_modes import save_mode
+from ..utils.staging import STALE_STAGING_SECONDS, is_staging_name, previous_path, staging_path
 from .with_dataset_converter import WithDatasetConverter
 
+if TYPE_CHECKING:
+    from pyspark.sql import DataFrame
+    from pyspark.sql import SparkSession
+
+DEFAULT_TARGET_FILE_SIZE_MB = 128
+DEFAULT_STORAGE_LEVEL = "MEMORY_AND_DISK"
+# Spark's default size for plans without statistics is Long.MaxValue, anything close to it is unknown
+_UNKNOWN_SIZE = 2 ** 62
+
 
-class SparkStorageManager(WithDatasetConverter, AbstractStorageManager[DataFrame]):
+class SparkStorageManager(WithDatasetConverter, AbstractStorageManager["DataFrame"]):
     """
-    Uses Pandas as the underlying storage. Note that this storage manager
-    will only work when mixed together with a resource manager.
+    Uses Spark (and the Hadoop file systems it can access) as the underlying storage. Note that this storage
+    manager will only work when mixed together with a resource manager.
+
+    pyspark is only imported, and the SparkSession only created, on the first operation that needs them.
+
+    Datasets are written to a staging directory next to them, and then renamed into place, so a failed job never
+    leaves a partial dataset behind (see :class:`PandasStorageManager` for ``keep_previous`` and
+    ``stale_staging_seconds``). Renames are only atomic on file systems like HDFS, not on object stores like S3.
+
+    ``target_file_size_mb`` and ``max_records_per_file`` (for the data manager, or in the resource) control the size
+    of the written files: datasets are repartitioned or coalesced before the write, to avoid lots of small files.
+    :func:`compact_files` rewrites the small files of an existing dataset.
+
+    ``skip_unchanged`` and versioned resources work as in :class:`PandasStorageManager`. The fingerprint of a
+    Spark dataset is an aggregate (row count and sum of row hashes), so checking it runs a job over the dataset.
     """
-    def __init__(self, spark: Optional[SparkSession] = None, **kwargs):
+    def __init__(self, spark: Optional["SparkSession"] = None, keep_previous: bool = True,
+                 stale_staging_seconds: float = STALE_STAGING_SECONDS, skip_unchanged: bool = False,
+                 target_file_size_mb: Optional[float] = None, max_records_per_file: Optional[int] = None,
+                 persist_budget_mb: Optional[float] = None, **kwargs):
         super().__init__(**kwargs)
-        self._spark = spark or SparkSession.builder.getOrCreate()
-        
-        sc = self._spark.sparkContext
-        self._hadoopPath = sc._gateway.jvm.org.apache.hadoop.fs.Path
-        jFileSystem = sc._gateway.jvm.org.apache.hadoop.fs.FileSystem
-        self._hadoopConf = sc._jsc.hadoopConfiguration()
-        self._hdfs = jFileSystem.get(self._hadoopConf)
+        self._spark_session = spark
+        self._filesystem = None
+        self._keep_previous = keep_previous
+        self._skip_unchanged = skip_unchanged
+        self._target_file_size_mb = target_file_size_mb
+        self._max_records_per_file = max_records_per_file
+        self._persisted: LRUCache[Tuple[str, str], "DataFrame"] = LRUCache(
+            max_bytes=int(persist_budget_mb * 1024 * 1024) if persist_budget_mb is not None else None,
+            sizeof=self._persisted_size,
+            on_evict=self._on_persisted_evict,
+        )
+        self._stale_staging_seconds = stale_staging_seconds
+        self._cleaned_staging_dirs: Set[str] = set()
+
+    @property
+    def _spark(self) -> "SparkSession":
+        if self._spark_session is None:
+            from pyspark.sql import SparkSession
+            self._spark_session = SparkSession.builder.getOrCreate()
+
+        return self._spark_session
+
+    @property
+    def _fs(self) -> HadoopFileSystem:
+        if self._filesystem is None:
+            self._filesystem = HadoopFileSystem(self._spark)
+
+        return self._filesystem
 
     def exists(self, key: str) -> bool:
         """Checks if the resource with the given key exists in the underlying storage"""
@@ -30,53 +83,570 @@ class SparkStorageManager(WithDatasetConverter, AbstractStorageManager[DataFrame
         
         dataset_path = self.resolve(key)
 
-        return self._hdfs.exists(self._hadoopPath(dataset_path))
+        with self._span("exists", "exists", key):
+            return self._fs.exists(dataset_path)
 
-    def load(self, key: str, **kwargs) -> DataFrame:
-        """Loads a resource from the underlying storage"""
-        resource = self.resource(key)
+    def exists_many(self, keys: Iterable[str]) -> Dict[str, bool]:
+        """Checks which resources exist in the underlying storage, listing each parent directory once"""
+        paths = {key: self.resolve(key) for key in keys}
+        exists = self._fs.exists_many(paths.values())
 
-        path = self.resolve(key)
-        file_type = resource.get_string("type", default=self.default_file_type)
-        options = resource.get("options", default=dict())
+        return {key: exists[path] for key, path in paths.items()}
+
+    def list_status(self, key: str) -> List[FileInfo]:
+        """Lists the files of a dataset"""
+        return self._fs.list_status(self.resolve(key))
+
+    def load(self, key: str, columns: Optional[List[str]] = None, filters: Optional[FILTERS] = None,
+             partitions: Optional[PARTITIONS] = None, version: Optional[int] = None,
+             persist: Optional[Union[bool, str]] = None, **kwargs) -> "DataFrame":
+        """
+        Loads a resource from the underlying storage. For versioned resources, ``version`` loads one of the kept
+        versions instead of the current one (see :func:`versions`).
+
+        Only the given ``columns``, and only the rows matching the ``filters`` are returned (see
+        :func:`datamanager.utils.filters.normalize_filters`). Both can also be set with the ``columns`` and
+        ``filters`` keys of the resource. They are applied right after the read, so Spark pushes them down to the source.
+
+        For datasets partitioned by the columns in the ``partition_by`` key of the resource, ``partitions``
+        (e.g. ``{"date": ["2021-01-01", "2021-01-02"]}``) selects the ``col=value`` directories to read, so
+        Spark doesn't list the others.
+
+        Resources with ``cache: <storage level>`` (e.g. ``MEMORY_AND_DISK``, or ``true`` for that one) or
+        ``checkpoint: true`` (or ``local``) are persisted (or checkpointed) on load. Later loads of the same key,
+        with the same arguments, return the same DataFrame, until the dataset is saved or deleted, or it's evicted
+        to stay within ``persist_budget_mb``. ``persist`` overrides the resource: a storage level, True or False.
+        """
+        with self._span("load", "resolve", key):
+            spec = self._versioned_spec(key, version)
+
+        storage_level, checkpoint = self._persist_policy(spec, persist)
+        if storage_level is None and checkpoint is None:
+            return self._read(key, spec, columns, filters, partitions)
+
+        persisted_key = (key, repr((columns, filters, partitions, version, storage_level, checkpoint)))
+
+        with self._span("load", "persisted", key) as span:
+            df = self._persisted.get(persisted_key)
+            span.set(hit=df is not None)
+
+        if df is not None:
+            self.logger.debug(f"Dataset '{key}' loaded from the persisted DataFrames")
+            return df
+
+        df = self._read(key, spec, columns, filters, partitions)
+
+        with self._span("load", "persist", key, storage_level=storage_level, checkpoint=checkpoint):
+            if checkpoint is not None:
+                self.logger.debug(f"Checkpointing dataset '{key}' ({checkpoint})")
+                df = df.localCheckpoint(eager=True) if checkpoint == "local" else df.checkpoint(eager=True)
+
+            if storage_level is not None:
+                from pyspark import StorageLevel
+
+                if not isinstance(getattr(StorageLevel, storage_level, None), StorageLevel):
+                    raise ValueError(f"Unknown storage level '{storage_level}' for dataset '{key}'")
+
+                self.logger.debug(f"Persisting dataset '{key}' with storage level {storage_level}")
+                df = df.persist(getattr(StorageLevel, storage_level))
+
+        self._persisted.put(persisted_key, df)
+
+        return df
+
+    def _read(self, key: str, spec: ResourceSpec, columns: Optional[List[str]], filters: Optional[FILTERS],
+              partitions: Optional[PARTITIONS]) -> "DataFrame":
+        path = spec.path
+        file_type = spec.type
+        options = spec.options
+        columns, filters = resource_projection(spec, columns, filters)
+        paths = [path]
+
+        if partitions:
+            partition_dirs, _ = partition_paths(path, spec.partition_by, partitions, escape=spark_partition_value)
+            # Filtering by the partitions as well keeps the result right if none of the directories exist
+            filters = with_partition_filters(filters, partitions)
+            existing_dirs = [partition_dir for partition_dir, exists in self._fs.exists_many(partition_dirs or []).items() if exists]
+
+            if existing_dirs:
+                paths = existing_dirs
+                options = {**options, "basePath": path}
 
         reader = self._spark.read.format(file_type)
 
         if any(options):
             reader = reader.options(**options)
 
-        print(f"Reading dataset from path '{path}'")
-        df = reader.load(path)
+        self.logger.debug(f"Reading dataset '{key}' from paths {paths}")
+        # Spark reads lazily, so this only times the planning (and the schema inference, if any)
+        with self._span("load", "read", key, file_type=file_type):
+            df = reader.load(paths[0] if len(paths) == 1 else paths)
+
+        if filters:
+            df = df.where(spark_condition(filters))
+
+        if columns is not None:
+            df = df.select(*columns)
 
         return df
 
-    def save(self, key: str, dataset: DataFrame, overwrite: Optional[bool] = True, partition_by: Optional[List[str]] = None, **kwargs) -> bool:
-        """Saves a dataset to the underlying storage"""
-        print(f"{self.__class__.__name__} - save")
-        resource = self.resource(key)
-        path = self.resolve(key)
-        file_type = resource.get("type", default=self.default_file_type)
-        options = resource.get("options", default=dict())
+    def save(self, key: str, dataset: "DataFrame", overwrite: Optional[bool] = True, partition_by: Optional[List[str]] = None,
+             mode: Optional[str] = None, primary_key: Optional[List[str]] = None, **kwargs) -> bool:
+        """
+        Saves a dataset to the underlying storage.
 
-        self.logger.debug(f"Saving dataset '{key}' at path '{path}'")
+        ``mode`` can be ``overwrite`` or ``error`` (the default, depending on ``overwrite``), ``append`` or ``upsert``:
 
-        # This will convert the dataset to pandas, assuming we have a converter for it
-        dataset = self._convert(dataset, DataFrame)
-        mode = "overwrite" if overwrite else "error"
-        
-        writer = dataset.write.mode(mode).format(file_type)
+        - append: Spark adds new part files to the dataset, without reading it.
+        - upsert: rows with the same ``primary_key`` (given, or from the resource) as the new ones are replaced,
+          and the others are kept. Partitioned datasets only rewrite the partitions that have new rows.
+
+        The persisted DataFrames of the key are released after the save, as they no longer match the dataset.
+        """
+        try:
+            return self._save(key, dataset, overwrite=overwrite, partition_by=partition_by, mode=mode, primary_key=primary_key)
+        finally:
+            # Not before: the dataset being saved may be computed from them
+            self.unpersist(key)
+
+    def _save(self, key: str, dataset: "DataFrame", overwrite: Optional[bool], partition_by: Optional[List[str]],
+              mode: Optional[str], primary_key: Optional[List[str]]) -> bool:
+        with self._span("save", "resolve", key):
+            spec = self.spec(key)
+        path = spec.path
+        file_type = spec.type
+        partition_by = list(partition_by or spec.partition_by)
+        primary_key = list(primary_key or spec.primary_key)
+        mode = save_mode(mode, overwrite)
+
+        self.logger.debug(f"Saving dataset '{key}' at path '{path}' with mode '{mode}'")
+
+        if mode == "upsert" and not primary_key:
+            raise ValueError(f"Dataset '{key}' has no primary key, it can't be upserted")
+
+        exists = self._fs.exists(path)
+        if mode == "error" and exists:
+            raise ValueError(f"Dataset '{key}' already exists at path '{path}', and overwrite is False")
+
+        from pyspark.sql import DataFrame
+
+        # This will convert the dataset to Spark, assuming we have a converter for it
+        dataset = self._convert(dataset, DataFrame, key)
+
+        if exists and mode == "append":
+            # Spark commits the new part files when the job succeeds, the existing ones are never touched
+            with self._span("save", "write", key, file_type=file_type, mode=mode):
+                self._writer(key, spec, dataset, partition_by, "append").save(path)
+            return True
+
+        self._cleanup_staging(posixpath.dirname(path.rstrip("/")))
+
+        if exists and mode == "upsert":
+            existing = self._spark.read.format(file_type).options(**spec.options).load(path)
+
+            if partition_by:
+                return self._upsert_partitions(key, spec, existing, dataset, partition_by, primary_key)
+
+            dataset = self._upsert(existing, dataset, primary_key)
+        elif mode == "upsert":
+            # The first upsert doesn't keep duplicate primary keys either
+            dataset = self._upsert(None, dataset, primary_key)
+
+        return self._write(key, spec, dataset, partition_by)
+
+    def _write(self, key: str, spec: ResourceSpec, dataset: "DataFrame", partition_by: List[str]) -> bool:
+        """Writes the whole dataset to a staging directory, and moves it into place"""
+        path = spec.path
+        skip_unchanged = spec.skip_unchanged if spec.skip_unchanged is not None else self._skip_unchanged
+        meta = self._read_meta(path) if skip_unchanged or spec.versions else None
+        fingerprint = None
+
+        if skip_unchanged:
+            with self._span("save", "fingerprint", key) as span:
+                fingerprint = spark_fingerprint(dataset, spec.type, dict(spec.save_options), partition_by)
+                unchanged = fingerprint == meta.fingerprint and meta.modified_at == self._fs.modification_time(path)
+                span.set(unchanged=unchanged)
+
+            if unchanged:
+                self.logger.debug(f"Dataset '{key}' didn't change since it was saved, skipping the write")
+                return True
+
+        # The current version of a versioned dataset is moved to the versions directory, instead of being the previous one
+        previous = version_path(path, meta.version) if spec.versions and meta.version is not None else None
+        staging = staging_path(path)
+
+        # Spark raises if the write fails, no need to check that the path exists
+        try:
+            with self._span("save", "write", key, file_type=spec.type):
+                # The staging directory is new, the mode only matters if a previous attempt left it behind
+                self._writer(key, spec, dataset, partition_by, "overwrite").save(staging)
+
+            with self._span("save", "publish", key):
+                self._publish(staging, path, keep_previous=self._keeps_previous(spec) or previous is not None, previous=previous)
+        except BaseException:
+            self._fs.delete(staging)
+            raise
+
+        if meta is not None:
+            meta, dropped_versions = meta.saved(fingerprint, self._fs.modification_time(path), spec.versions)
+            for dropped_version in dropped_versions:
+                self.logger.debug(f"Removing version {dropped_version} of dataset '{key}'")
+                self._fs.delete(version_path(path, dropped_version))
+            self._fs.write_text(meta_path(path), meta.to_json())
+
+        return True
+
+    def versions(self, key: str) -> List[VersionInfo]:
+        """Returns the kept versions of a dataset, oldest first. The last one is the current dataset"""
+        return list(self._read_meta(self.resolve(key)).versions)
+
+    def _read_meta(self, path: str) -> DatasetMeta:
+        text = self._fs.read_text(meta_path(path))
+
+        return DatasetMeta.from_json(text) if text is not None else DatasetMeta()
+
+    def _versioned_spec(self, key: str, version: Optional[int]) -> ResourceSpec:
+        spec = self.spec(key)
+        if version is None:
+            return spec
+
+        meta = self._read_meta(spec.path)
+        if version not in {info.version for info in meta.versions}:
+            raise ValueError(f"Version {version} of dataset '{key}' doesn't exist, the kept versions are {[info.version for info in meta.versions]}")
+
+        return spec if version == meta.version else spec._replace(path=version_path(spec.path, version))
+
+    def _writer(self, key: str, spec: ResourceSpec, dataset: "DataFrame", partition_by: List[str], mode: str):
+        target_file_size_mb = spec.target_file_size_mb or self._target_file_size_mb
+        max_records_per_file = spec.max_records_per_file or self._max_records_per_file
+
+        if target_file_size_mb:
+            dataset = self._sized(key, dataset, target_file_size_mb, partition_by)
+
+        writer = dataset.write.mode(mode).format(spec.type)
+
+        if max_records_per_file:
+            writer = writer.option("maxRecordsPerFile", max_records_per_file)
 
         if partition_by:
             self.logger.debug(f"Partitioning dataset '{key}' by columns '{partition_by}'")
-            writer = writer.partitionBy(partition_by)
-        
-        writer.save(path)
-        
-        return self.exists(key)
+            writer = writer.partitionBy(*partition_by)
+
+        return writer
+
+    def _sized(self, key: str, dataset: "DataFrame", target_file_size_mb: float, partition_by: List[str]) -> "DataFrame":
+        """
+        Repartitions (or coalesces) a dataset so each task writes about ``target_file_size_mb``, estimating its size
+        from Spark's plan statistics. Partitioned datasets are repartitioned by the partition columns instead, so
+        each partition directory is written by a single task.
+        """
+        size = self._estimated_size(dataset)
+        if size is None:
+            self.logger.debug(f"Can't estimate the size of dataset '{key}', writing it with its current partitions")
+            return dataset
+
+        num_files = _files_for_size(size, target_file_size_mb)
+        num_partitions = dataset.rdd.getNumPartitions()
+        self.logger.debug(f"Dataset '{key}' has {num_partitions} partitions and an estimated size of {size} bytes, writing it in {num_files} tasks")
+
+        if partition_by:
+            return dataset.repartition(num_files, *partition_by)
+
+        if num_files < num_partitions:
+            # Coalescing merges the partitions without a shuffle
+            return dataset.coalesce(num_files)
+
+        if num_files > num_partitions:
+            return dataset.repartition(num_files)
+
+        return dataset
+
+    @staticmethod
+    def _estimated_size(dataset: "DataFrame") -> Optional[int]:
+        """Size of a dataset from the optimized plan statistics: the size of the files it reads, or an estimate"""
+        try:
+            size = int(dataset._jdf.queryExecution().optimizedPlan().stats().sizeInBytes().toString())
+        except Exception:
+            return None
+
+        # Plans without statistics get Spark's default size, which is way too large to mean anything
+        return size if 0 < size < _UNKNOWN_SIZE else None
+
+    def compact_files(self, key: str, target_file_size_mb: Optional[float] = None) -> Dict[str, int]:
+        """
+        Rewrites an existing dataset into files of about ``target_file_size_mb`` (given, from the resource, from the
+        data manager, or 128 MB). Partitioned datasets are compacted partition by partition, skipping the ones that
+        already have the right number of files. Each rewrite goes through a staging directory, like saves.
+        Returns the number of files of each rewritten path after the compaction.
+        """
+        spec = self.spec(key)
+        if spec.read_only:
+            raise ValueError(f"Dataset '{key}' is read-only, you can't compact it!")
+
+        target_file_size_mb = target_file_size_mb or spec.target_file_size_mb or self._target_file_size_mb or DEFAULT_TARGET_FILE_SIZE_MB
+        path = spec.path.rstrip("/")
+        self._cleanup_staging(posixpath.dirname(path))
+
+        if spec.partition_by:
+            paths = [f"{path}/{partition_dir}" for partition_dir in self._partition_dirs(path, len(spec.partition_by))]
+        else:
+            paths = [path]
+
+        # The compacted files replace the ones the persisted DataFrames would read from
+        self.unpersist(key)
+
+        compacted = dict()
+        for data_path in paths:
+            files = self._data_files(data_path)
+            num_files = _files_for_size(sum(info.size for info in files), target_file_size_mb)
+
+            if len(files) <= num_files:
+                continue
+
+            self.logger.debug(f"Compacting {len(files)} files of dataset '{key}' at path '{data_path}' into {num_files}")
+            staging = staging_path(data_path)
+
+            try:
+                with self._span("compact_files", "write", key, file_type=spec.type, files=len(files)):
+                    reader = self._spark.read.format(spec.type).options(**spec.options)
+                    writer = reader.load(data_path).coalesce(num_files).write.mode("overwrite").format(spec.type)
+                    if spec.max_records_per_file or self._max_records_per_file:
+                        writer = writer.option("maxRecordsPerFile", spec.max_records_per_file or self._max_records_per_file)
+                    writer.save(staging)
+
+                with self._span("compact_files", "publish", key):
+                    # Partitions replace each other in place, like upserts. A whole dataset keeps its previous version
+                    self._publish(staging, data_path, keep_previous=not spec.partition_by and self._keeps_previous(spec))
+            except BaseException:
+                self._fs.delete(staging)
+                raise
+
+            compacted[data_path] = num_files
+
+        # The content didn't change: the fingerprint of the last save is still valid
+        meta = self._read_meta(path)
+        if compacted and meta.fingerprint is not None:
+            self._fs.write_text(meta_path(path), meta._replace(modified_at=self._fs.modification_time(path)).to_json())
+
+        return compacted
+
+    def _data_files(self, path: str) -> List[FileInfo]:
+        """Lists the data files under a path, recursively, skipping metadata files like _SUCCESS or .crc files"""
+        files = []
+        for info in self._fs.list_status(path):
+            name = posixpath.basename(info.path.rstrip("/"))
+            if name.startswith(("_", ".")):
+                continue
+
+            files.extend(self._data_files(info.path) if info.is_dir else [info])
+
+        return files
+
+    @staticmethod
+    def _upsert(existing: Optional["DataFrame"], dataset: "DataFrame", primary_key: List[str]) -> "DataFrame":
+        """
+        Replaces the existing rows with the same primary key as the new ones, keeping the others. If the dataset
+        has several rows with the same primary key, the last one wins, as in :func:`upsert_pandas`.
+        """
+        from pyspark.sql import Window, functions as F
+
+        source, order, rank = "__upsert_source", "__upsert_order", "__upsert_rank"
+        rows = dataset.withColumn(source, F.lit(1))
+        if existing is not None:
+            rows = existing.withColumn(source, F.lit(0)).unionByName(rows)
+
+        # New rows first, and among them the last one, in the order of the dataset
+        window = Window.partitionBy(*primary_key).orderBy(F.col(source).desc(), F.col(order).desc())
+
+        return (
+            rows.withColumn(order, F.monotonically_increasing_id())
+            .withColumn(rank, F.row_number().over(window))
+            .filter(F.col(rank) == 1)
+            .drop(source, order, rank)
+        )
+
+    def _upsert_partitions(self, key: str, spec: ResourceSpec, existing: "DataFrame", dataset: "DataFrame",
+                           partition_by: List[str], primary_key: List[str]) -> bool:
+        """
+        Merges the new rows into the partitions they belong to. The merged partitions are written to a staging
+        directory, and each of them then replaces the existing one, so the other partitions are never rewritten.
+        """
+        path = spec.path.rstrip("/")
+        touched = dataset.select(*partition_by).distinct()
+        # The semi join keeps the rows of the touched partitions, and Spark prunes the others when reading
+        merged = self._upsert(existing.join(touched, on=partition_by, how="left_semi"), dataset, primary_key)
+        staging = staging_path(path)
+
+        try:
+            with self._span("save", "write", key, file_type=spec.type, mode="upsert"):
+                self._writer(key, spec, merged, partition_by, "overwrite").save(staging)
+
+            with self._span("save", "publish", key):
+                for partition_dir in self._partition_dirs(staging, len(partition_by)):
+                    destination = f"{path}/{partition_dir}"
+                    self.logger.debug(f"Replacing partition '{destination}' of dataset '{key}'")
+
+                    self._fs.mkdirs(posixpath.dirname(destination))
+                    self._publish(f"{staging}/{partition_dir}", destination, keep_previous=False)
+        finally:
+            self._fs.delete(staging)
+
+        return True
+
+    def _partition_dirs(self, path: str, depth: int) -> List[str]:
+        """Returns the ``col=value/...`` directories, ``depth`` levels deep, relative to the path"""
+        partition_dirs = [""]
+
+        for _ in range(depth):
+            partition_dirs = [
+                posixpath.join(partition_dir, posixpath.basename(status.path.rstrip("/")))
+                for partition_dir in partition_dirs
+                for status in self._fs.list_status(f"{path}/{partition_dir}".rstrip("/"))
+                if status.is_dir and "=" in posixpath.basename(status.path.rstrip("/"))
+            ]
+
+        return partition_dirs
+
+    def rollback(self, key: str) -> bool:
+        """
+        Swaps a dataset with the version it replaced, if it was kept.
+        Rolling back twice restores the current version. Versioned resources go back to the version before the
+        current one, as in :func:`PandasStorageManager.rollback`.
+        """
+        spec = self.spec(key)
+        if spec.read_only:
+            raise ValueError(f"Dataset '{key}' is read-only, you can't roll it back!")
+
+        path = spec.path
+        if spec.versions:
+            return self._rollback_version(key, spec)
+
+        previous = previous_path(path)
+
+        if not self._fs.exists(previous):
+            return False
+
+        self.unpersist(key)
+
+        self.logger.debug(f"Rolling back dataset '{key}' at path '{path}'")
+
+        if not self._fs.exists(path):
+            self._rename(previous, path)
+            return True
+
+        swap = staging_path(path)
+        self._rename(path, swap)
+        self._rename(previous, path)
+        self._rename(swap, previous)
+
+        return True
+
+    def _rollback_version(self, key: str, spec: ResourceSpec) -> bool:
+        meta = self._read_meta(spec.path)
+        if len(meta.versions) < 2:
+            return False
+
+        restored = meta.versions[-2].version
+        self.unpersist(key)
+        self.logger.debug(f"Rolling back dataset '{key}' at path '{spec.path}' to version {restored}")
+
+        # The current version is moved to a staging path, and deleted
+        self._publish(version_path(spec.path, restored), spec.path, keep_previous=False, previous=staging_path(spec.path))
+        self._fs.write_text(meta_path(spec.path), meta.rolled_back(self._fs.modification_time(spec.path)).to_json())
+
+        return True
+
+    def _publish(self, staging: str, path: str, keep_previous: bool, previous: Optional[str] = None):
+        """Moves a staged dataset into place. The dataset is missing between the two renames, but never partial"""
+        previous = previous or previous_path(path)
+        self._fs.delete(previous)
+
+        if self._fs.exists(path):
+            self._fs.mkdirs(posixpath.dirname(previous))
+            self._rename(path, previous)
+
+        self._rename(staging, path)
+
+        if not keep_previous:
+            self._fs.delete(previous)
+
+    def _rename(self, source: str, destination: str):
+        # Hadoop returns False instead of raising when it can't rename
+        if not self._fs.rename(source, destination):
+            raise RuntimeError(f"Couldn't rename '{source}' to '{destination}'")
+
+    def unpersist(self, key: str):
+        """Releases the persisted DataFrames of a key"""
+        for df in self._persisted.pop_where(lambda persisted_key: persisted_key[0] == key):
+            self.logger.debug(f"Unpersisting dataset '{key}'")
+            df.unpersist()
+
+    def unpersist_all(self):
+        """Releases all the persisted DataFrames"""
+        for df in self._persisted.clear():
+            df.unpersist()
+
+    def _on_persisted_evict(self, persisted_key: Tuple[str, str], df: "DataFrame"):
+        self.logger.debug(f"Unpersisting dataset '{persisted_key[0]}', to stay within the persist budget")
+        df.unpersist()
+
+    def _persisted_size(self, df: "DataFrame") -> int:
+        return self._estimated_size(df) or 0
+
+    @staticmethod
+    def _persist_policy(spec: ResourceSpec, persist: Optional[Union[bool, str]]) -> Tuple[Optional[str], Optional[str]]:
+        """Returns the storage level and the kind of checkpoint to apply on load, if any"""
+        if persist is False:
+            return None, None
+
+        storage_level = spec.cache
+        if isinstance(persist, str):
+            storage_level = persist.upper()
+        elif persist is True:
+            storage_level = storage_level or DEFAULT_STORAGE_LEVEL
+
+        return storage_level, spec.checkpoint
+
+    def _keeps_previous(self, spec: ResourceSpec) -> bool:
+        return spec.keep_previous if spec.keep_previous is not None else self._keep_previous
+
+    def _cleanup_staging(self, directory: str):
+        if directory in self._cleaned_staging_dirs:
+            return
+
+        try:
+            statuses = self._fs.list_status(directory)
+        except FileNotFoundError:
+            statuses = []
+
+        # Modification times are in milliseconds
+        limit = (time.time() - self._stale_staging_seconds) * 1000
+        for status in statuses:
+            if is_staging_name(posixpath.basename(status.path.rstrip("/"))) and status.modification_time < limit:
+                self.logger.debug(f"Removing stale staging path '{status.path}'")
+                self._fs.delete(status.path)
+
+        self._cleaned_staging_dirs.add(directory)
 
     def delete(self, key: str, **kwargs) -> bool:
         """Deletes a dataset from the underlying storage"""
+        self.unpersist(key)
         path = self.resolve(key)
         self.logger.debug(f"Deleting dataset '{key}' at path '{path}'")
         
-        return self._hdfs.delete(self._hadoopPath(path), True)
+        with self._span("delete", "delete", key):
+            return self._fs.delete(path)
+
+    def delete_many(self, keys: Iterable[str], **kwargs) -> Dict[str, bool]:
+        """Deletes several datasets, skipping the ones that don't exist. Returns whether each of them is gone"""
+        paths = {key: self.resolve(key) for key in keys}
+        for key in paths:
+            self.unpersist(key)
+        self.logger.debug(f"Deleting datasets at paths {list(paths.values())}")
+        deleted = self._fs.delete_many(paths.values())
+
+        return {key: deleted[path] for key, path in paths.items()}
+
+
+def _files_for_size(size: int, target_file_size_mb: float) -> int:
+    return max(1, math.ceil(size / (target_file_size_mb * 1024 * 1024)))
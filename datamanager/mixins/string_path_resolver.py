@@ -1,19 +1,38 @@
-from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 
 from ..interfaces.abstract_resource_resolver import AbstractResourceResolver
+from ..utils.resource_spec import ResourceSpec
 
 
 class StringPathResolver(AbstractResourceResolver[str]):
+    """
+    Resolves keys to the "path" of their resource. Resources are compiled into :class:`ResourceSpec`
+    the first time they're used, and the specs are kept until the resource is added or removed again.
+    """
     _DEFAULT_FILE_TYPE: str = "parquet"
     
     def __init__(self, default_file_type: Optional[str] = None, **kwargs):
         super().__init__(**kwargs)
         self._default_file_type = default_file_type or self._DEFAULT_FILE_TYPE
+        self._specs: Dict[str, ResourceSpec] = dict()
+        self.add_listener(self._forget_spec)
     
     @property
     def default_file_type(self) -> str:
         return self._default_file_type
 
+    def spec(self, key: str) -> ResourceSpec:
+        """Returns the compiled configuration of a resource"""
+        spec = self._specs.get(key)
+
+        if spec is None:
+            spec = ResourceSpec.from_resource(key, self.resource(key), default_file_type=self.default_file_type)
+            self._specs[key] = spec
+
+        return spec
+
     def resolve(self, key: str) -> str:
-        return self.resource(key).get_string("path")
+        return self.spec(key).path
+
+    def _forget_spec(self, key: str):
+        self._specs.pop(key, None)
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Any, Optional, Type
 
 from ..utils.dataset_converter import DatasetConverter
 from ..interfaces.abstract_dataset_converter import AbstractDatasetConverter
@@ -9,5 +9,14 @@ class WithDatasetConverter:
         super().__init__(**kwargs)
         self._dataset_converter = dataset_converter or DatasetConverter()
 
-    def _convert(self, *args, **kwargs):
-        return self._dataset_converter.convert(*args, **kwargs)
\ No newline at end of file
+    def _convert(self, dataset: Any, to_type: Type, key: Optional[str] = None) -> Any:
+        if isinstance(dataset, to_type):
+            return dataset
+
+        with self._span("save", "convert", key, converter=f"{_type_name(type(dataset))}->{_type_name(to_type)}"):
+            return self._dataset_converter.convert(dataset, to_type)
+
+
+def _type_name(dataset_type: Type) -> str:
+    """Short name of a dataset type, e.g. pandas.DataFrame or pyspark.DataFrame"""
+    return f"{dataset_type.__module__.split('.')[0]}.{dataset_type.__name__}"
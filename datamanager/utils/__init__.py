@@ -1 +1,3 @@
 from .dataset_converter import DatasetConverter
+from .sqlite_catalog import SQLiteCatalog
+from .metrics import MetricsAggregator
@@ -0,0 +1,27 @@
+from concurrent.futures import Executor, Future, as_completed
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+
+def submit_all(executor: Executor, tasks: Dict[str, Callable[[], Any]]) -> Dict[Future, str]:
+    """Submits one task per key to the executor, returning the key for each future"""
+    return {executor.submit(task): key for key, task in tasks.items()}
+
+
+def collect(futures: Dict[Future, str]) -> Tuple[Dict[str, Any], Dict[str, BaseException]]:
+    """Waits for all futures, returning the results and the errors per key"""
+    results = dict()
+    errors = dict()
+
+    for future in as_completed(futures):
+        key = futures[future]
+        try:
+            results[key] = future.result()
+        except Exception as e:
+            errors[key] = e
+
+    return results, errors
+
+
+def ordered(values: Dict[str, Any], keys: Iterable[str]) -> Dict[str, Any]:
+    """Returns the values in the order of the given keys"""
+    return {key: values[key] for key in keys if key in values}
@@ -1,15 +1,42 @@
-from typing import Any, Callable, Dict, Optional, Tuple, Type
-
-from pandas import DataFrame as PandasDataFrame
-from pyspark.sql import DataFrame as SparkDataFrame
-from pyspark.sql import SparkSession
+import heapq
+import sys
+import weakref
+from collections import defaultdict
+from contextlib import contextmanager
+from itertools import count
+from threading import Lock
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple, Type
 
 from ..interfaces.abstract_dataset_converter import AbstractDatasetConverter
+from .lru_cache import LRUCache
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from pandas import DataFrame as PandasDataFrame
+    from pyarrow import Table as ArrowTable
+    from pyarrow.dataset import Dataset as ArrowDataset
+    from pyspark.sql import DataFrame as SparkDataFrame
+    from pyspark.sql import SparkSession
+    from pyspark.sql import types as T
 
 
 TYPE_IN = TYPE_OUT = Type
 CONVERTER_KEY = Tuple[TYPE_IN , TYPE_OUT]
 CONVERTER_FUNCTION = Callable[[TYPE_IN], TYPE_OUT]
+ROUTE = List[CONVERTER_KEY]
+
+DEFAULT_COST = 1.0
+
+ARROW_ENABLED_CONF = "spark.sql.execution.arrow.pyspark.enabled"
+ARROW_FALLBACK_CONF = "spark.sql.execution.arrow.pyspark.fallback.enabled"
+ARROW_BATCH_SIZE_CONF = "spark.sql.execution.arrow.maxRecordsPerBatch"
+
+# Import paths ("module:Class") of the types of the default converters
+PANDAS_DATAFRAME = "pandas:DataFrame"
+SPARK_DATAFRAME = "pyspark.sql:DataFrame"
+ARROW_TABLE = "pyarrow:Table"
+ARROW_DATASET = "pyarrow.dataset:Dataset"
+
 
 class DatasetConverter(AbstractDatasetConverter):
     """
@@ -21,39 +48,390 @@ class DatasetConverter(AbstractDatasetConverter):
     _converters = {
         (A, B): convert
     }
+
+    The converters are the edges of a graph between types, each with a cost (relative, e.g. 1.0 for a pandas to
+    Arrow conversion). A dataset is converted through the cheapest chain of converters, e.g. a pyarrow Dataset
+    to pandas goes through an Arrow Table. Converters of a class also apply to its subclasses. Routes are
+    computed once per pair of types, and kept until a converter is registered.
+
+    With ``cache_results``, the results of that many recent conversions are kept while their source dataset is
+    alive (through a weak reference), so converting the same dataset again returns the same result. The cache
+    can't tell if the source dataset was modified in place since: don't enable it if you do that.
+
+    Conversions between pandas and Spark go through Apache Arrow by default (``use_arrow=True``).
+    Before handing a pandas DataFrame to Spark, the converter maps every column to a Spark type itself,
+    so Spark doesn't need to infer the schema row by row. If any column has a dtype without an Arrow
+    mapping (mixed-type ``object`` columns, periods, intervals, complex numbers...), the whole frame goes
+    through the fallback path instead: the classic, non-Arrow ``createDataFrame``, with Spark inferring
+    the schema. The same applies when Spark itself rejects the Arrow conversion, as long as
+    ``arrow_fallback`` is True.
+
+    Arrow tables and datasets (``pyarrow.dataset.Dataset``) are converted to and from pandas and Spark too (straight
+    from and to Arrow in Spark 4). Converting a lazy dataset reads all of it.
+
+    The converter never imports pandas or pyspark itself, and the SparkSession is only created for
+    the first conversion to Spark, so using only pandas never starts a JVM.
     """
-    def __init__(self, converters: Optional[Dict[CONVERTER_KEY, CONVERTER_FUNCTION]] = None, spark: Optional[SparkSession] = None):
-        self._converters = converters or dict()
-        self._spark = spark or SparkSession.builder.getOrCreate()
+    def __init__(self, converters: Optional[Dict[CONVERTER_KEY, CONVERTER_FUNCTION]] = None, spark: Optional["SparkSession"] = None,
+                 use_arrow: bool = True, arrow_batch_size: Optional[int] = None, arrow_fallback: bool = True,
+                 cache_results: int = 0):
+        self._converters = dict(converters or dict())
+        self._costs: Dict[CONVERTER_KEY, float] = {key: DEFAULT_COST for key in self._converters}
+        self._lazy_converters: List[Tuple[str, str, CONVERTER_FUNCTION, float]] = []
+        self._routes: Dict[CONVERTER_KEY, Optional[ROUTE]] = dict()
+        self._routes_lock = Lock()
+        self._results: Optional[LRUCache[Tuple[int, TYPE_OUT], Tuple[weakref.ref, Any]]] = LRUCache(max_entries=cache_results) if cache_results else None
+        self._spark_session = spark
+        self._use_arrow = use_arrow
+        self._arrow_batch_size = arrow_batch_size
+        self._arrow_fallback = arrow_fallback
 
         if converters is None:
-            self.register(PandasDataFrame, SparkDataFrame, self.pandas_to_spark)
-            self.register(SparkDataFrame, PandasDataFrame, self.spark_to_pandas)
+            self.register_lazy(PANDAS_DATAFRAME, SPARK_DATAFRAME, self.pandas_to_spark, cost=3.0)
+            self.register_lazy(SPARK_DATAFRAME, PANDAS_DATAFRAME, self.spark_to_pandas, cost=3.0)
+            self.register_lazy(PANDAS_DATAFRAME, ARROW_TABLE, self.pandas_to_arrow, cost=1.0)
+            self.register_lazy(ARROW_TABLE, PANDAS_DATAFRAME, self.arrow_to_pandas, cost=1.0)
+            self.register_lazy(ARROW_TABLE, SPARK_DATAFRAME, self.arrow_to_spark, cost=3.0)
+            self.register_lazy(SPARK_DATAFRAME, ARROW_TABLE, self.spark_to_arrow, cost=3.0)
+            # Wrapping a table in a dataset is free, but reading a dataset reads all of its files
+            self.register_lazy(ARROW_TABLE, ARROW_DATASET, self.arrow_to_arrow_dataset, cost=0.1)
+            self.register_lazy(ARROW_DATASET, ARROW_TABLE, self.arrow_dataset_to_arrow, cost=1.0)
+
+    @property
+    def _spark(self) -> "SparkSession":
+        if self._spark_session is None:
+            from pyspark.sql import SparkSession
+            self._spark_session = SparkSession.builder.getOrCreate()
 
-    def register(self, from_type: TYPE_IN, to_type: TYPE_OUT, converter: CONVERTER_FUNCTION):
+        return self._spark_session
+
+    @property
+    def use_arrow(self) -> bool:
+        return self._use_arrow
+
+    @property
+    def arrow_batch_size(self) -> Optional[int]:
+        return self._arrow_batch_size
+
+    def register(self, from_type: TYPE_IN, to_type: TYPE_OUT, converter: CONVERTER_FUNCTION, cost: float = DEFAULT_COST):
+        """Registers a converter between two types, replacing the previous one. The cost must be positive"""
+        _check_cost(cost)
+
+        with self._routes_lock:
+            self._add_converter(from_type, to_type, converter, cost)
+
+    def register_lazy(self, from_type: str, to_type: str, converter: CONVERTER_FUNCTION, cost: float = DEFAULT_COST):
+        """
+        Registers a converter between two types given by their import path (e.g. ``"pandas:DataFrame"``).
+        It is only registered for real once both modules have been imported, so registering it doesn't import them.
+        """
+        _check_cost(cost)
+
+        with self._routes_lock:
+            self._lazy_converters.append((from_type, to_type, converter, cost))
+
+    def _add_converter(self, from_type: TYPE_IN, to_type: TYPE_OUT, converter: CONVERTER_FUNCTION, cost: float):
+        """Call with the routes lock held"""
         self._converters[(from_type, to_type)] = converter
-    
+        self._costs[(from_type, to_type)] = cost
+        self._routes.clear()
+
+    def _resolve_lazy_converters(self):
+        """Registers the lazy converters whose types have been imported. Call with the routes lock held"""
+        pending = []
+
+        for from_path, to_path, converter, cost in self._lazy_converters:
+            from_type, to_type = _imported_type(from_path), _imported_type(to_path)
+
+            if from_type is None or to_type is None:
+                pending.append((from_path, to_path, converter, cost))
+            else:
+                self._add_converter(from_type, to_type, converter, cost)
+
+        self._lazy_converters = pending
+
     def convert(self, dataset: Any, to_type: TYPE_OUT) -> TYPE_OUT:
         from_type = type(dataset)
         # No conversion needed
-        if from_type == to_type:
+        if issubclass(from_type, to_type):
             return dataset
-        
-        key = (from_type, to_type)
 
-        if key not in self._converters:
+        if self._results is not None:
+            entry = self._results.get((id(dataset), to_type))
+            # Ids are reused once a dataset is gone, so the entry must still point to this dataset
+            if entry is not None and entry[0]() is dataset:
+                return entry[1]
+
+        route = self.route(from_type, to_type)
+
+        if route is None:
             raise ValueError(f"There is no converter registerd to go from class {from_type} to class {to_type}")
-        
-        converter = self._converters[key]
 
-        return converter(dataset)
-    
-    def spark_to_pandas(self, spark_df: SparkDataFrame) -> PandasDataFrame:
-        return spark_df.toPandas()
-    
-    def pandas_to_spark(self, pandas_df: PandasDataFrame) -> SparkDataFrame:
-        self._spark = SparkSession.builder.getOrCreate()
+        result = dataset
+        for key in route:
+            result = self._converters[key](result)
+
+        if self._results is not None:
+            self._cache_result(dataset, to_type, result)
+
+        return result
+
+    def route(self, from_type: TYPE_IN, to_type: TYPE_OUT) -> Optional[ROUTE]:
+        """Returns the cheapest chain of converters (as their type pairs) between two types, or None if there's none"""
+        key = (from_type, to_type)
+
+        with self._routes_lock:
+            if self._lazy_converters:
+                self._resolve_lazy_converters()
+
+            if key not in self._routes:
+                self._routes[key] = self._shortest_route(from_type, to_type)
+
+            return self._routes[key]
+
+    def _shortest_route(self, from_type: TYPE_IN, to_type: TYPE_OUT) -> Optional[ROUTE]:
+        """Dijkstra's shortest path, where the converters of a type can be used for any of its subclasses"""
+        converters_by_type = defaultdict(list)
+        for (source, target), cost in self._costs.items():
+            converters_by_type[source].append((target, cost))
+
+        # The counter breaks the ties between routes of the same cost, as types can't be compared
+        tie_breaker = count()
+        queue = [(0.0, next(tie_breaker), from_type, [])]
+        visited = set()
+
+        while queue:
+            cost, _, current_type, route = heapq.heappop(queue)
+
+            if issubclass(current_type, to_type):
+                return route
+
+            if current_type in visited:
+                continue
+            visited.add(current_type)
+
+            for base_type in getattr(current_type, "__mro__", (current_type,)):
+                for target, edge_cost in converters_by_type.get(base_type, []):
+                    if target not in visited:
+                        heapq.heappush(queue, (cost + edge_cost, next(tie_breaker), target, route + [(base_type, target)]))
+
+        return None
+
+    def _cache_result(self, dataset: Any, to_type: TYPE_OUT, result: Any):
+        key = (id(dataset), to_type)
+
+        try:
+            # The entry goes away with the dataset
+            reference = weakref.ref(dataset, lambda _: self._results.pop(key))
+        except TypeError:
+            return
+
+        self._results.put(key, (reference, result))
+
+    def spark_to_pandas(self, spark_df: "SparkDataFrame") -> "PandasDataFrame":
+        if not self._use_arrow:
+            return spark_df.toPandas()
+
+        with self._arrow_conf(spark_df.sparkSession, enabled=True):
+            return spark_df.toPandas()
+
+    def pandas_to_spark(self, pandas_df: "PandasDataFrame") -> "SparkDataFrame":
+        if not self._use_arrow:
+            return self._spark.createDataFrame(pandas_df)
+
+        schema, unsupported = pandas_schema_to_spark(pandas_df)
+
+        if unsupported:
+            return self._pandas_to_spark_fallback(pandas_df, unsupported)
+
+        pandas_df = _prepare_for_arrow(pandas_df)
+
+        with self._arrow_conf(self._spark, enabled=True):
+            return self._spark.createDataFrame(pandas_df, schema=schema)
+
+    @staticmethod
+    def arrow_to_pandas(table: "ArrowTable") -> "PandasDataFrame":
+        return table.to_pandas()
+
+    @staticmethod
+    def pandas_to_arrow(pandas_df: "PandasDataFrame") -> "ArrowTable":
+        import pyarrow as pa
+
+        return pa.Table.from_pandas(pandas_df)
+
+    @staticmethod
+    def arrow_to_arrow_dataset(table: "ArrowTable") -> "ArrowDataset":
+        import pyarrow.dataset as ds
+
+        return ds.dataset(table)
+
+    @staticmethod
+    def arrow_dataset_to_arrow(dataset: "ArrowDataset") -> "ArrowTable":
+        return dataset.to_table()
+
+    def arrow_to_spark(self, table: "ArrowTable") -> "SparkDataFrame":
+        # Spark 4 creates DataFrames straight from Arrow tables
+        if self._use_arrow and _spark_major_version() >= 4:
+            with self._arrow_conf(self._spark, enabled=True):
+                return self._spark.createDataFrame(table)
+
+        return self.pandas_to_spark(table.to_pandas())
+
+    def spark_to_arrow(self, spark_df: "SparkDataFrame") -> "ArrowTable":
+        import pyarrow as pa
+
+        # Spark 4 collects straight to Arrow
+        if hasattr(spark_df, "toArrow"):
+            return spark_df.toArrow()
+
+        return pa.Table.from_pandas(self.spark_to_pandas(spark_df))
+
+    def _pandas_to_spark_fallback(self, pandas_df: "PandasDataFrame", unsupported: List[str]) -> "SparkDataFrame":
+        if not self._arrow_fallback:
+            raise ValueError(f"Columns {unsupported} can't be converted with Arrow, and arrow_fallback=False")
+
+        with self._arrow_conf(self._spark, enabled=False):
+            return self._spark.createDataFrame(pandas_df)
+
+    @contextmanager
+    def _arrow_conf(self, spark: "SparkSession", enabled: bool) -> Iterator[None]:
+        """Sets the Arrow options on the session for the duration of a conversion, restoring the previous ones after"""
+        settings = {
+            ARROW_ENABLED_CONF: str(enabled).lower(),
+            ARROW_FALLBACK_CONF: str(self._arrow_fallback).lower(),
+        }
+        if self._arrow_batch_size is not None:
+            settings[ARROW_BATCH_SIZE_CONF] = str(self._arrow_batch_size)
+
+        previous = {conf_key: spark.conf.get(conf_key, None) for conf_key in settings}
+
+        for conf_key, value in settings.items():
+            spark.conf.set(conf_key, value)
+
+        try:
+            yield
+        finally:
+            for conf_key, value in previous.items():
+                if value is None:
+                    spark.conf.unset(conf_key)
+                else:
+                    spark.conf.set(conf_key, value)
+
+
+_NUMPY_TO_SPARK = {
+    "bool": "BooleanType",
+    "boolean": "BooleanType",
+    "int8": "ByteType",
+    "int16": "ShortType",
+    "int32": "IntegerType",
+    "int64": "LongType",
+    "uint8": "ShortType",
+    "uint16": "IntegerType",
+    "uint32": "LongType",
+    "Int8": "ByteType",
+    "Int16": "ShortType",
+    "Int32": "IntegerType",
+    "Int64": "LongType",
+    "UInt8": "ShortType",
+    "UInt16": "IntegerType",
+    "UInt32": "LongType",
+    "float16": "FloatType",
+    "float32": "FloatType",
+    "float64": "DoubleType",
+    "Float32": "FloatType",
+    "Float64": "DoubleType",
+}
+
+# Inferred kinds of ``object`` columns (see ``pd.api.types.infer_dtype``) that Arrow can convert
+_OBJECT_TO_SPARK = {
+    "string": "StringType",
+    "empty": "StringType",
+    "bytes": "BinaryType",
+    "date": "DateType",
+    "datetime": "TimestampType",
+    "boolean": "BooleanType",
+}
+
+
+def _spark_type(column: "pd.Series") -> Optional["T.DataType"]:
+    """Returns the Spark type for a pandas column, or None if it can't go through Arrow"""
+    import pandas as pd
+    from pyspark.sql import types as T
+
+    dtype = column.dtype
+
+    if isinstance(dtype, pd.CategoricalDtype):
+        return _spark_type(column.cat.categories.to_series())
+
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return T.TimestampType()
+
+    if pd.api.types.is_object_dtype(dtype):
+        type_name = _OBJECT_TO_SPARK.get(pd.api.types.infer_dtype(column, skipna=True))
+    elif pd.api.types.is_string_dtype(dtype):
+        # The "string" dtypes, and "str", the default for strings since pandas 3
+        type_name = "StringType"
+    else:
+        type_name = _NUMPY_TO_SPARK.get(str(dtype))
+
+    return getattr(T, type_name)() if type_name is not None else None
+
+
+def pandas_schema_to_spark(pandas_df: "PandasDataFrame") -> Tuple["T.StructType", List[str]]:
+    """
+    Maps the columns of a pandas DataFrame to a Spark schema. Returns the schema, and the
+    list of columns that have no Arrow-compatible mapping.
+    """
+    from pyspark.sql import types as T
+
+    fields = []
+    unsupported = []
+
+    for column_name, column in pandas_df.items():
+        spark_type = _spark_type(column)
+        if spark_type is None:
+            unsupported.append(column_name)
+            continue
+
+        fields.append(T.StructField(str(column_name), spark_type, nullable=True))
+
+    return T.StructType(fields), unsupported
+
+
+def _prepare_for_arrow(pandas_df: "PandasDataFrame") -> "PandasDataFrame":
+    """Decodes categorical columns, which Spark's Arrow path doesn't handle in every version"""
+    import pandas as pd
+
+    categorical_columns = [
+        column_name
+        for column_name, dtype in pandas_df.dtypes.items()
+        if isinstance(dtype, pd.CategoricalDtype)
+    ]
+
+    if not categorical_columns:
+        return pandas_df
+
+    # Missing values can't be decoded to the dtype of the categories when it has no missing value (e.g. int64)
+    return pandas_df.astype({
+        column_name: object if pandas_df[column_name].hasnans else pandas_df[column_name].cat.categories.dtype
+        for column_name in categorical_columns
+    })
+
+
+def _check_cost(cost: float):
+    if cost <= 0:
+        raise ValueError(f"The cost of a converter must be positive, got {cost}")
+
+
+def _spark_major_version() -> int:
+    import pyspark
+
+    return int(pyspark.__version__.split(".")[0])
 
-        return self._spark.createDataFrame(pandas_df)
 
+def _imported_type(import_path: str) -> Optional[Type]:
+    """Returns the type for a "module:Class" import path, or None if the module hasn't been imported yet"""
+    module_name, type_name = import_path.split(":")
+    module = sys.modules.get(module_name)
 
+    return getattr(module, type_name, None) if module is not None else None
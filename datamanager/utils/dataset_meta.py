@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import posixpath
+import time
+from typing import TYPE_CHECKING, Any, List, NamedTuple, Optional, Tuple
+
+from .staging import staging_path
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from pyspark.sql import DataFrame
+
+_META_PREFIX = ".meta."
+_VERSIONS_DIR = ".versions"
+
+
+class VersionInfo(NamedTuple):
+    version: int
+    fingerprint: Optional[str]
+    saved_at: float
+
+
+class DatasetMeta(NamedTuple):
+    """
+    What the storage managers remember about a dataset, in a sidecar file next to it: the fingerprint of the
+    last saved content, the modification time of the dataset after that save (to notice later changes), and the
+    kept versions, oldest first. The last version, if any, is the current dataset.
+    """
+    fingerprint: Optional[str] = None
+    modified_at: Optional[int] = None
+    versions: Tuple[VersionInfo, ...] = ()
+
+    @property
+    def version(self) -> Optional[int]:
+        """The version of the current dataset"""
+        return self.versions[-1].version if self.versions else None
+
+    def saved(self, fingerprint: Optional[str], modified_at: Optional[int], keep_versions: int) -> Tuple["DatasetMeta", List[int]]:
+        """Returns the meta after a new save, and the versions that have to be deleted"""
+        if keep_versions <= 0:
+            return self._replace(fingerprint=fingerprint, modified_at=modified_at), []
+
+        new_version = VersionInfo((self.version or 0) + 1, fingerprint, time.time())
+        versions = self.versions + (new_version,)
+
+        return DatasetMeta(fingerprint, modified_at, versions[-keep_versions:]), [info.version for info in versions[:-keep_versions]]
+
+    def rolled_back(self, modified_at: Optional[int]) -> "DatasetMeta":
+        """Returns the meta after the current version is dropped, and the one before it restored"""
+        versions = self.versions[:-1]
+
+        return DatasetMeta(versions[-1].fingerprint, modified_at, versions)
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "fingerprint": self.fingerprint,
+            "modified_at": self.modified_at,
+            "versions": [info._asdict() for info in self.versions],
+        })
+
+    @classmethod
+    def from_json(cls, text: str) -> "DatasetMeta":
+        meta = json.loads(text)
+
+        return cls(meta["fingerprint"], meta["modified_at"], tuple(VersionInfo(**info) for info in meta["versions"]))
+
+
+def meta_path(path: str) -> str:
+    """Returns the path of the sidecar meta file of a dataset"""
+    parent, name = posixpath.split(path.rstrip("/"))
+
+    return posixpath.join(parent, f"{_META_PREFIX}{name}.json")
+
+
+def version_path(path: str, version: int) -> str:
+    """Returns the path where a version of a dataset is kept, once it's replaced. It ends with the dataset name"""
+    parent, name = posixpath.split(path.rstrip("/"))
+
+    return posixpath.join(parent, _VERSIONS_DIR, name, f"{version}.{name}")
+
+
+def read_meta(path: str) -> DatasetMeta:
+    """Reads the meta of a local dataset, or returns an empty one if it has none"""
+    try:
+        with open(meta_path(path)) as f:
+            return DatasetMeta.from_json(f.read())
+    except FileNotFoundError:
+        return DatasetMeta()
+
+
+def write_meta(path: str, meta: DatasetMeta):
+    """Writes the meta of a local dataset, replacing the previous one atomically"""
+    staging = staging_path(meta_path(path))
+    with open(staging, "w") as f:
+        f.write(meta.to_json())
+
+    os.replace(staging, meta_path(path))
+
+
+def modified_at(path: str) -> Optional[int]:
+    """Modification time of a local dataset, in nanoseconds, or None if it doesn't exist"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def pandas_fingerprint(dataset: "pd.DataFrame", *extra: Any) -> Optional[str]:
+    """
+    Fingerprints the content of a DataFrame: its columns, dtypes, and a vectorized hash of every row (and index).
+    ``extra`` values, like the save options, are part of the fingerprint too. Returns None for datasets that
+    can't be hashed (e.g. with lists in a column).
+    """
+    import pandas as pd
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr([(str(column), str(dtype)) for column, dtype in dataset.dtypes.items()]).encode())
+    digest.update(repr((len(dataset), extra)).encode())
+
+    try:
+        digest.update(pd.util.hash_pandas_object(dataset, index=True).to_numpy().tobytes())
+    except TypeError:
+        return None
+
+    return digest.hexdigest()
+
+
+def spark_fingerprint(dataset: "DataFrame", *extra: Any) -> str:
+    """
+    Fingerprints the content of a Spark DataFrame: its schema, row count, and the sum of the xxhash64 of every row,
+    computed in a single aggregation. The sum doesn't depend on the order of the rows, which Spark doesn't keep anyway.
+    """
+    from pyspark.sql import functions as F
+
+    row = dataset.select(
+        F.count(F.lit(1)).alias("rows"),
+        # Summed as decimals, so the sum of the 64-bit hashes doesn't overflow
+        F.sum(F.xxhash64(*dataset.columns).cast("decimal(38,0)")).alias("hash"),
+    ).first()
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((dataset.schema.simpleString(), row["rows"], str(row["hash"]), extra)).encode())
+
+    return digest.hexdigest()
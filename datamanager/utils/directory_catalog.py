@@ -0,0 +1,175 @@
+import os
+import posixpath
+import time
+from bisect import bisect_left
+from pathlib import Path
+from threading import RLock
+from typing import TYPE_CHECKING, Callable, List, Optional, Set, Union
+from urllib.parse import urlparse
+
+if TYPE_CHECKING:
+    from .hadoop_fs import HadoopFileSystem
+
+
+def is_local_path(path: Union[str, Path]) -> bool:
+    """Whether a path is a local one, i.e. it has no URI scheme (one letter schemes are Windows drives)"""
+    return isinstance(path, Path) or len(urlparse(path).scheme) <= 1
+
+
+class DirectoryCatalog:
+    """
+    Index of the datasets stored in a directory, as ``<key><suffix>`` files or directories.
+
+    The directory is scanned on first use. After that, its modification time is checked at most once every
+    ``refresh_interval`` seconds, and it's only scanned again if it changed, i.e. if entries were added, removed
+    or renamed, possibly by other processes. With ``watch=True``, file system events (through the optional
+    ``watchdog`` package) mark the index as stale instead, and the directory is never polled.
+
+    Entries starting with "." or "_" (staging files, _SUCCESS markers...) are ignored. ``on_change`` is called
+    with the key of every dataset that appears or disappears on a rescan.
+
+    With a ``filesystem``, the directory (e.g. ``hdfs://`` or ``s3a://``) is listed through Hadoop instead. Object
+    stores don't keep directory modification times, so it's listed again every ``refresh_interval`` seconds,
+    and it can't be watched.
+    """
+    def __init__(self, base_path: Union[str, Path], suffix: str, refresh_interval: float = 1.0, watch: bool = False,
+                 on_change: Optional[Callable[[str], None]] = None, filesystem: Optional["HadoopFileSystem"] = None):
+        if filesystem is not None and watch:
+            raise ValueError(f"Only local directories can be watched, not '{base_path}'")
+
+        self._base_path = Path(base_path) if filesystem is None else str(base_path).rstrip("/")
+        self._filesystem = filesystem
+        self._suffix = suffix
+        self._refresh_interval = refresh_interval
+        self._on_change = on_change
+        self._lock = RLock()
+        self._keys: Optional[Set[str]] = None
+        self._sorted_keys: Optional[List[str]] = None
+        self._dir_mtime: Optional[int] = None
+        self._checked_at = 0.0
+        self._stale = False
+        self._observer = self._watch() if watch else None
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._fresh_keys()
+
+    def __len__(self) -> int:
+        return len(self._fresh_keys())
+
+    def keys(self) -> List[str]:
+        """Returns all keys, sorted"""
+        return list(self._sorted())
+
+    def keys_with_prefix(self, prefix: str) -> List[str]:
+        """Returns the (sorted) keys starting with the given prefix"""
+        sorted_keys = self._sorted()
+        start = bisect_left(sorted_keys, prefix)
+        end = start
+
+        while end < len(sorted_keys) and sorted_keys[end].startswith(prefix):
+            end += 1
+
+        return sorted_keys[start:end]
+
+    def add(self, key: str):
+        with self._lock:
+            self._fresh_keys().add(key)
+            self._sorted_keys = None
+
+    def discard(self, key: str):
+        with self._lock:
+            self._fresh_keys().discard(key)
+            self._sorted_keys = None
+
+    def refresh(self, force: bool = False):
+        """Scans the directory again if it changed since the last scan (or always, if force=True)"""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            self._stale = False
+
+            try:
+                dir_mtime = os.stat(self._base_path).st_mtime_ns if self._filesystem is None else None
+            except FileNotFoundError:
+                dir_mtime = None
+
+            if not force and self._keys is not None and dir_mtime is not None and dir_mtime == self._dir_mtime:
+                return
+
+            keys = self._scan()
+
+            if self._keys is not None and self._on_change is not None:
+                for key in keys ^ self._keys:
+                    self._on_change(key)
+
+            self._keys = keys
+            self._sorted_keys = None
+            # Changes in the same clock tick as the scan wouldn't change the mtime, so a recent one isn't trusted
+            self._dir_mtime = dir_mtime if dir_mtime is not None and time.time_ns() - dir_mtime > 2e9 else None
+
+    def close(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+    def _fresh_keys(self) -> Set[str]:
+        with self._lock:
+            needs_check = (
+                self._keys is None
+                or self._stale
+                or (self._observer is None and time.monotonic() - self._checked_at >= self._refresh_interval)
+            )
+            if needs_check:
+                self.refresh()
+
+            return self._keys
+
+    def _sorted(self) -> List[str]:
+        with self._lock:
+            keys = self._fresh_keys()
+            if self._sorted_keys is None:
+                self._sorted_keys = sorted(keys)
+
+            return self._sorted_keys
+
+    def _scan(self) -> Set[str]:
+        suffix_length = len(self._suffix)
+
+        try:
+            names = self._list_names()
+        except FileNotFoundError:
+            return set()
+
+        return {
+            name[:-suffix_length] if suffix_length else name
+            for name in names
+            if name.endswith(self._suffix) and not name.startswith((".", "_"))
+        }
+
+    def _list_names(self) -> List[str]:
+        if self._filesystem is not None:
+            return [posixpath.basename(info.path.rstrip("/")) for info in self._filesystem.list_status(self._base_path)]
+
+        with os.scandir(self._base_path) as entries:
+            return [entry.name for entry in entries]
+
+    def _watch(self):
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            raise ValueError("Watching directories needs the 'watchdog' package, install it or use watch=False")
+
+        catalog = self
+
+        class StaleOnChange(FileSystemEventHandler):
+            def on_any_event(self, event):
+                catalog._stale = True
+
+        self._base_path.mkdir(parents=True, exist_ok=True)
+        observer = Observer()
+        observer.schedule(StaleOnChange(), str(self._base_path), recursive=False)
+        observer.daemon = True
+        observer.start()
+
+        return observer
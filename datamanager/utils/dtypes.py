@@ -0,0 +1,140 @@
+from typing import TYPE_CHECKING, Dict, Mapping, NamedTuple, Optional
+
+import numpy as np
+
+from .memory import memory_usage
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DTYPES = Dict[str, str]
+
+# Smallest first, so the first one that fits is used
+_INTEGER_TYPES = ["int8", "uint8", "int16", "uint16", "int32", "uint32", "int64"]
+
+
+class CompactResult(NamedTuple):
+    dataset: "pd.DataFrame"
+    # The dtypes that were applied, to be reused on later loads
+    dtypes: DTYPES
+    bytes_before: int
+    bytes_after: int
+
+
+def infer_compact_dtypes(dataset: "pd.DataFrame", category_ratio: float = 0.5, arrow_strings: bool = False) -> DTYPES:
+    """
+    Returns the smallest dtypes that can hold the values of each column, for the columns that can be made smaller:
+
+    - Integers are downcast to the smallest (signed or unsigned) integer type that fits their range
+    - Floats are downcast to float32 only if that doesn't lose precision
+    - Strings with at most ``category_ratio`` distinct values per row become categoricals. The others become
+      Arrow-backed strings if ``arrow_strings`` is True
+    """
+    import pandas as pd
+
+    dtypes = dict()
+
+    for column_name, column in dataset.items():
+        dtype = column.dtype
+        compact_dtype = None
+
+        if pd.api.types.is_bool_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
+            continue
+
+        if pd.api.types.is_integer_dtype(dtype):
+            compact_dtype = _integer_dtype(column)
+        elif pd.api.types.is_float_dtype(dtype) and dtype == np.float64:
+            as_float32 = column.astype("float32")
+            if ((as_float32 == column) | column.isna()).all():
+                compact_dtype = "float32"
+        elif _is_string(column):
+            distinct_values = column.nunique(dropna=True)
+            if len(column) and distinct_values / len(column) <= category_ratio:
+                compact_dtype = "category"
+            elif arrow_strings and not (isinstance(dtype, pd.StringDtype) and dtype.storage == "pyarrow"):
+                compact_dtype = "string[pyarrow]"
+
+        if compact_dtype is not None and compact_dtype != str(dtype):
+            dtypes[str(column_name)] = compact_dtype
+
+    return dtypes
+
+
+def compact(dataset: "pd.DataFrame", dtypes: Optional[Mapping[str, str]] = None, category_ratio: float = 0.5,
+            arrow_strings: bool = False) -> CompactResult:
+    """
+    Converts the columns of a dataset to the given dtypes, or to the ones from :func:`infer_compact_dtypes`
+    if none are given. Columns that are not in the dataset are ignored.
+    """
+    bytes_before = memory_usage(dataset)
+
+    if dtypes is None:
+        dtypes = infer_compact_dtypes(dataset, category_ratio=category_ratio, arrow_strings=arrow_strings)
+
+    # Given dtypes may come from an older version of the dataset, whose values had a smaller range or no nulls
+    dtypes = {
+        column: _nullable(dataset[column], dtype)
+        for column, dtype in dtypes.items()
+        if column in dataset.columns and _fits(dataset[column], dtype)
+    }
+    if dtypes:
+        dataset = dataset.astype(dtypes)
+
+    return CompactResult(dataset, dict(dtypes), bytes_before, memory_usage(dataset))
+
+
+def _integer_dtype(column: "pd.Series") -> Optional[str]:
+    if column.isna().all():
+        return None
+
+    min_value, max_value = column.min(), column.max()
+    nullable = column.dtype.name[0].isupper()
+
+    for integer_type in _INTEGER_TYPES:
+        info = np.iinfo(integer_type)
+        if info.min <= min_value and max_value <= info.max:
+            # Nullable integers (Int64...) keep being nullable
+            return _nullable_integer(integer_type) if nullable else integer_type
+
+    return None
+
+
+def _nullable_integer(integer_type: str) -> str:
+    return integer_type.capitalize().replace("Uint", "UInt")
+
+
+def nullable_dtype(dtype: str) -> str:
+    """Returns the nullable version of an integer dtype (Int8 for int8...), or the dtype itself for the others"""
+    return _nullable_integer(dtype) if dtype in _INTEGER_TYPES else dtype
+
+
+def _nullable(column: "pd.Series", dtype: str) -> str:
+    """Integer dtypes can't hold missing values: columns with nulls get the nullable version (Int8...) instead"""
+    return nullable_dtype(dtype) if column.hasnans else dtype
+
+
+def _fits(column: "pd.Series", dtype: str) -> bool:
+    """
+    Checks that the values of a column fit in an integer dtype: whole numbers, within its range.
+    Other dtypes are always considered to fit
+    """
+    import pandas as pd
+
+    if dtype.lower() not in _INTEGER_TYPES or not pd.api.types.is_numeric_dtype(column.dtype) or column.isna().all():
+        return True
+
+    if pd.api.types.is_float_dtype(column.dtype) and not (column.dropna() % 1 == 0).all():
+        return False
+
+    info = np.iinfo(dtype.lower())
+
+    return info.min <= column.min() and column.max() <= info.max
+
+
+def _is_string(column: "pd.Series") -> bool:
+    import pandas as pd
+
+    if pd.api.types.is_object_dtype(column.dtype):
+        return pd.api.types.infer_dtype(column, skipna=True) == "string"
+
+    return pd.api.types.is_string_dtype(column.dtype)
@@ -0,0 +1,137 @@
+import hashlib
+import os
+from pathlib import Path
+from typing import Any, Optional, Union
+
+import pandas as pd
+
+from ..mixins.logger import Logger
+from .staging import STALE_STAGING_SECONDS, cleanup_staging, staging_path
+
+
+class FeatherCache(Logger):
+    """
+    An on-disk cache of parsed datasets, stored as uncompressed Arrow IPC (Feather) files so they
+    can be memory-mapped when loaded again, instead of parsing the source file.
+
+    Entries are looked up by a fingerprint of the source file (path, modification time, size and,
+    if ``hash_source`` is True, a hash of its contents) and of the read options, so changing either
+    of them makes the entry unreachable. When the cache grows beyond ``max_bytes``, the least
+    recently used files are deleted. Files left behind by writes that didn't finish are deleted after
+    ``stale_staging_seconds``.
+    """
+    _FORMAT_VERSION = "1"
+    _SUFFIX = ".feather"
+
+    def __init__(self, cache_dir: Union[str, Path], max_bytes: Optional[int] = None, hash_source: bool = False,
+                 stale_staging_seconds: float = STALE_STAGING_SECONDS, **kwargs):
+        super().__init__(**kwargs)
+        self._cache_dir = Path(cache_dir)
+        self._max_bytes = max_bytes
+        self._hash_source = hash_source
+
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+
+        for path in cleanup_staging(str(self._cache_dir), older_than=stale_staging_seconds):
+            self.logger.debug(f"Removed stale cache file '{path}'")
+
+    @property
+    def cache_dir(self) -> Path:
+        return self._cache_dir
+
+    def fingerprint(self, path: str, options: Any = None) -> Optional[str]:
+        """Returns the fingerprint for a source file and its read options, or None if the file can't be read"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        fingerprint = hashlib.sha1()
+        for part in (self._FORMAT_VERSION, os.path.abspath(path), stat.st_mtime_ns, stat.st_size, repr(options)):
+            fingerprint.update(str(part).encode("utf-8"))
+            fingerprint.update(b"\0")
+
+        if self._hash_source:
+            fingerprint.update(_file_hash(path).encode("utf-8"))
+
+        return fingerprint.hexdigest()
+
+    def get(self, fingerprint: str) -> Optional[pd.DataFrame]:
+        """Returns the cached dataset for a fingerprint, if there is one"""
+        import pyarrow.feather as feather
+
+        cache_file = self._cache_file(fingerprint)
+
+        try:
+            # Touching the file keeps track of the last use, for the LRU cleanup
+            os.utime(cache_file)
+            table = feather.read_table(str(cache_file), memory_map=True)
+        except FileNotFoundError:
+            return None
+
+        self.logger.debug(f"Loaded dataset from cache file '{cache_file}'")
+
+        return table.to_pandas()
+
+    def put(self, fingerprint: str, dataset: pd.DataFrame) -> bool:
+        """Stores a dataset in the cache. Returns False if it can't be written as Feather (e.g. non-string column names)"""
+        import pyarrow as pa
+        import pyarrow.feather as feather
+
+        cache_file = self._cache_file(fingerprint)
+        staging_file = Path(staging_path(str(cache_file)))
+
+        try:
+            # write_feather refuses DataFrames with an index (e.g. from index_col), a table keeps it as columns
+            table = pa.Table.from_pandas(dataset, preserve_index=None)
+            # Uncompressed, so the file can be memory-mapped when read
+            feather.write_feather(table, str(staging_file), compression="uncompressed")
+        except (pa.ArrowException, TypeError, ValueError) as e:
+            self.logger.warning(f"Can't write dataset to the cache: {e}")
+            staging_file.unlink(missing_ok=True)
+            return False
+
+        os.replace(staging_file, cache_file)
+        self.logger.debug(f"Stored dataset in cache file '{cache_file}'")
+        self._cleanup()
+
+        return True
+
+    def clear(self):
+        for cache_file in self._cache_dir.glob(f"*{self._SUFFIX}"):
+            cache_file.unlink(missing_ok=True)
+
+    def _cache_file(self, fingerprint: str) -> Path:
+        return self._cache_dir / f"{fingerprint}{self._SUFFIX}"
+
+    def _cleanup(self):
+        """Deletes the least recently used files until the cache fits in max_bytes"""
+        if self._max_bytes is None:
+            return
+
+        entries = []
+        for cache_file in self._cache_dir.glob(f"*{self._SUFFIX}"):
+            try:
+                stat = cache_file.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, cache_file))
+
+        total_bytes = sum(size for _, size, _ in entries)
+
+        for _, size, cache_file in sorted(entries):
+            if total_bytes <= self._max_bytes:
+                break
+
+            self.logger.debug(f"Evicting cache file '{cache_file}'")
+            cache_file.unlink(missing_ok=True)
+            total_bytes -= size
+
+
+def _file_hash(path: str, block_size: int = 1024 * 1024) -> str:
+    file_hash = hashlib.blake2b()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            file_hash.update(block)
+
+    return file_hash.hexdigest()
@@ -0,0 +1,124 @@
+from typing import TYPE_CHECKING, Any, List, Optional, Sequence, Set, Tuple, Union
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from pyspark.sql import Column
+
+    from .resource_spec import ResourceSpec
+
+FILTER = Tuple[str, str, Any]
+FILTERS = Union[Sequence[FILTER], Sequence[Sequence[FILTER]]]
+
+OPERATORS = ("=", "==", "!=", "<", "<=", ">", ">=", "in", "not in")
+
+
+def normalize_filters(filters: Optional[FILTERS]) -> Optional[List[List[FILTER]]]:
+    """
+    Returns the filters as a list of conjunctions of ``(column, op, value)`` tuples, validating the operators.
+
+    Filters are expressed like pyarrow's (and pandas' ``read_parquet``) ``filters`` argument: a list of tuples
+    is a conjunction (all of them need to match), and a list of such lists is a disjunction of conjunctions.
+    The supported operators are ``=``, ``==``, ``!=``, ``<``, ``<=``, ``>``, ``>=``, ``in`` and ``not in``.
+    """
+    if not filters:
+        return None
+
+    # A single conjunction: its items are filters, whose first element is the column name
+    if isinstance(filters[0][0], str):
+        filters = [filters]
+
+    normalized = []
+    for conjunction in filters:
+        normalized_conjunction = []
+        for column, op, value in conjunction:
+            op = op.lower()
+            if op not in OPERATORS:
+                raise ValueError(f"Unsupported filter operator '{op}' for column '{column}'. Supported ones are: {OPERATORS}")
+
+            if op in ("in", "not in"):
+                value = list(value)
+
+            normalized_conjunction.append((column, op, value))
+        normalized.append(normalized_conjunction)
+
+    return normalized
+
+
+def resource_projection(spec: "ResourceSpec", columns: Optional[List[str]] = None,
+                        filters: Optional[FILTERS] = None) -> Tuple[Optional[List[str]], Optional[List[List[FILTER]]]]:
+    """Returns the columns and (normalized) filters to apply when loading a resource, taking the defaults from its spec"""
+    if columns is None and spec.columns is not None:
+        columns = list(spec.columns)
+
+    if filters is None:
+        filters = spec.filters
+
+    return columns, normalize_filters(filters)
+
+
+def filter_columns(filters: Optional[List[List[FILTER]]]) -> Set[str]:
+    """Returns the names of the columns used by the filters"""
+    return {column for conjunction in filters or [] for column, _, _ in conjunction}
+
+
+def required_columns(columns: Optional[Sequence[str]], filters: Optional[List[List[FILTER]]]) -> Optional[List[str]]:
+    """Returns the columns to read to be able to apply the filters and then keep the given columns"""
+    if columns is None:
+        return None
+
+    return list(columns) + sorted(filter_columns(filters) - set(columns))
+
+
+def apply_pandas(dataset: "pd.DataFrame", columns: Optional[Sequence[str]] = None,
+                 filters: Optional[List[List[FILTER]]] = None) -> "pd.DataFrame":
+    """Applies the filters and then the column projection to a pandas DataFrame, in memory"""
+    if filters:
+        mask = None
+        for conjunction in filters:
+            conjunction_mask = None
+            for column, op, value in conjunction:
+                condition = _condition(dataset[column], op, value)
+                conjunction_mask = condition if conjunction_mask is None else conjunction_mask & condition
+            mask = conjunction_mask if mask is None else mask | conjunction_mask
+
+        dataset = dataset[mask]
+
+    if columns is not None:
+        dataset = dataset[list(columns)]
+
+    return dataset
+
+
+def spark_condition(filters: List[List[FILTER]]) -> "Column":
+    """Translates the filters into a Spark column expression, to be used with ``DataFrame.where``"""
+    from pyspark.sql import functions as F
+
+    condition = None
+    for conjunction in filters:
+        conjunction_condition = None
+        for column, op, value in conjunction:
+            column_condition = _condition(F.col(column), op, value)
+            conjunction_condition = column_condition if conjunction_condition is None else conjunction_condition & column_condition
+        condition = conjunction_condition if condition is None else condition | conjunction_condition
+
+    return condition
+
+
+def _condition(column: Any, op: str, value: Any) -> Any:
+    """Builds the condition for a pandas Series or a Spark Column, which share the same operators"""
+    if op == "in":
+        return column.isin(value)
+    if op == "not in":
+        return ~column.isin(value)
+    if op in ("=", "=="):
+        return column == value
+    if op == "!=":
+        return column != value
+    if op == "<":
+        return column < value
+    if op == "<=":
+        return column <= value
+    if op == ">":
+        return column > value
+
+    return column >= value
@@ -0,0 +1,181 @@
+import posixpath
+import re
+from collections import defaultdict
+from threading import Lock
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlparse
+
+from ..mixins.logger import Logger
+
+if TYPE_CHECKING:
+    from pyspark.sql import SparkSession
+
+# FileSystem handles shared by the whole process, by JVM, URI scheme and authority
+_FILESYSTEMS: Dict[Tuple[int, str, str], Any] = dict()
+_FILESYSTEMS_LOCK = Lock()
+
+# Format of Hadoop's FileStatus.toString(), e.g. "FileStatus{path=hdfs://nn/a; isDirectory=false; length=3; ...}".
+# Subclasses (LocatedFileStatus, S3AFileStatus...) start with their own name, and may add fields
+_FILE_STATUS_PATTERN = re.compile(
+    r"\w+\{path=(?P<path>.*?); isDirectory=(?P<is_dir>true|false)"
+    r"(?:; length=(?P<size>\d+))?.*?; modification_time=(?P<modification_time>\d+)"
+)
+
+
+class FileInfo(NamedTuple):
+    path: str
+    is_dir: bool
+    size: int
+    modification_time: int
+
+
+class HadoopFileSystem(Logger):
+    """
+    File system operations through the Hadoop FileSystem API of a Spark session.
+
+    Each path is handled by the FileSystem of its URI scheme and authority (``hdfs://namenode``, ``s3a://bucket``,
+    ``file://``...), or by the default one for paths without scheme. The handles are created once per process
+    and shared by all instances. Every call to the JVM is a Py4J round-trip, so the bulk operations group paths
+    by directory and list each directory once instead of checking each path.
+    """
+    def __init__(self, spark: "SparkSession", **kwargs):
+        super().__init__(**kwargs)
+        self._spark = spark
+        self._jvm = spark.sparkContext._gateway.jvm
+
+    def handle(self, path: str) -> Any:
+        """Returns the (shared) Java FileSystem for a path"""
+        parsed = urlparse(path)
+        key = (id(self._jvm), parsed.scheme, parsed.netloc)
+
+        with _FILESYSTEMS_LOCK:
+            if key not in _FILESYSTEMS:
+                hadoop_conf = self._spark.sparkContext._jsc.hadoopConfiguration()
+                jFileSystem = self._jvm.org.apache.hadoop.fs.FileSystem
+
+                if parsed.scheme:
+                    _FILESYSTEMS[key] = jFileSystem.get(self._jvm.java.net.URI.create(path), hadoop_conf)
+                else:
+                    _FILESYSTEMS[key] = jFileSystem.get(hadoop_conf)
+
+            return _FILESYSTEMS[key]
+
+    def path(self, path: str) -> Any:
+        return self._jvm.org.apache.hadoop.fs.Path(path)
+
+    def exists(self, path: str) -> bool:
+        return self.handle(path).exists(self.path(path))
+
+    def delete(self, path: str, recursive: bool = True) -> bool:
+        return self.handle(path).delete(self.path(path), recursive)
+
+    def rename(self, source: str, destination: str) -> bool:
+        return self.handle(source).rename(self.path(source), self.path(destination))
+
+    def mkdirs(self, path: str) -> bool:
+        return self.handle(path).mkdirs(self.path(path))
+
+    def modification_time(self, path: str) -> Optional[int]:
+        """Modification time of a path, in milliseconds, or None if it doesn't exist"""
+        if not self.exists(path):
+            return None
+
+        return self.handle(path).getFileStatus(self.path(path)).getModificationTime()
+
+    def read_text(self, path: str) -> Optional[str]:
+        """Reads a (small) UTF-8 text file, or returns None if it doesn't exist"""
+        if not self.exists(path):
+            return None
+
+        stream = self.handle(path).open(self.path(path))
+        try:
+            return self._jvm.org.apache.commons.io.IOUtils.toString(stream, "UTF-8")
+        finally:
+            stream.close()
+
+    def write_text(self, path: str, text: str):
+        """Writes a (small) UTF-8 text file, replacing it if it exists"""
+        stream = self.handle(path).create(self.path(path), True)
+        try:
+            stream.write(bytearray(text.encode("utf-8")))
+        finally:
+            stream.close()
+
+    def list_status(self, path: str) -> List[FileInfo]:
+        """
+        Lists the contents of a directory. The statuses are sent back from the JVM in a single string,
+        instead of one call per attribute of each file. That string is the undocumented ``FileStatus.toString``,
+        so if it can't be parsed, the attributes are asked for each file. Raises FileNotFoundError if the directory
+        doesn't exist.
+        """
+        from py4j.protocol import Py4JJavaError
+
+        try:
+            statuses = self.handle(path).listStatus(self.path(path))
+        except Py4JJavaError as e:
+            if "FileNotFoundException" in str(e.java_exception):
+                raise FileNotFoundError(path) from e
+            raise
+
+        infos = [
+            FileInfo(
+                path=match.group("path"),
+                is_dir=match.group("is_dir") == "true",
+                size=int(match.group("size") or 0),
+                modification_time=int(match.group("modification_time")),
+            )
+            for match in _FILE_STATUS_PATTERN.finditer(self._jvm.java.util.Arrays.toString(statuses))
+        ]
+
+        # Paths with unusual characters, or another format of the statuses, break the parsing
+        if len(infos) != len(statuses):
+            self.logger.debug(
+                f"Couldn't parse the {len(statuses)} statuses of type '{statuses[0].getClass().getName()}' listed in "
+                f"'{path}' (parsed {len(infos)}), getting their attributes one by one"
+            )
+            infos = [
+                FileInfo(
+                    path=status.getPath().toString(),
+                    is_dir=status.isDirectory(),
+                    size=status.getLen(),
+                    modification_time=status.getModificationTime(),
+                )
+                for status in statuses
+            ]
+
+        return infos
+
+    def exists_many(self, paths: Iterable[str]) -> Dict[str, bool]:
+        """Checks which paths exist, listing each parent directory once"""
+        paths = list(paths)
+        by_parent = defaultdict(list)
+        for path in paths:
+            by_parent[posixpath.dirname(path.rstrip("/"))].append(path)
+
+        exists = dict()
+        for parent, children in by_parent.items():
+            if len(children) == 1:
+                exists[children[0]] = self.exists(children[0])
+                continue
+
+            try:
+                names = {posixpath.basename(info.path.rstrip("/")) for info in self.list_status(parent)}
+            except FileNotFoundError:
+                names = set()
+
+            for child in children:
+                exists[child] = posixpath.basename(child.rstrip("/")) in names
+
+        return {path: exists[path] for path in paths}
+
+    def delete_many(self, paths: Iterable[str], recursive: bool = True) -> Dict[str, bool]:
+        """
+        Deletes several paths. Hadoop has no bulk delete, but the paths that don't exist are found
+        with :func:`exists_many`, and skipped. Returns whether each path is gone.
+        """
+        exists = self.exists_many(paths)
+
+        return {
+            path: self.delete(path, recursive) if path_exists else True
+            for path, path_exists in exists.items()
+        }
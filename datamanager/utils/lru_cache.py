@@ -0,0 +1,116 @@
+from collections import OrderedDict
+from threading import RLock
+from typing import Callable, Dict, Generic, Hashable, List, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """
+    A thread-safe, least-recently-used cache, bounded by number of entries and/or by total size.
+    The size of each value is computed with ``sizeof``. When a new value doesn't fit, the least
+    recently used entries are evicted until it does, calling ``on_evict`` for each of them.
+    Values bigger than ``max_bytes`` on their own are not cached at all.
+    """
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 sizeof: Optional[Callable[[V], int]] = None, on_evict: Optional[Callable[[K, V], None]] = None):
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._sizeof = sizeof or (lambda value: 0)
+        self._on_evict = on_evict
+        self._entries: "OrderedDict[K, V]" = OrderedDict()
+        self._sizes: Dict[K, int] = dict()
+        self._bytes = 0
+        self._lock = RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
+
+    @property
+    def total_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._entries
+
+    def keys(self) -> List[K]:
+        with self._lock:
+            return list(self._entries.keys())
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+
+            return self._entries[key]
+
+    def put(self, key: K, value: V) -> bool:
+        """Adds a value to the cache. Returns False if the value is too big to be cached"""
+        size = self._sizeof(value)
+
+        with self._lock:
+            self._remove(key)
+
+            if self._max_bytes is not None and size > self._max_bytes:
+                return False
+
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._bytes += size
+            self._evict()
+
+        return True
+
+    def pop(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        with self._lock:
+            if key not in self._entries:
+                return default
+
+            return self._remove(key)
+
+    def pop_where(self, predicate: Callable[[K], bool]) -> List[V]:
+        """Removes all entries whose key matches the predicate, returning their values"""
+        with self._lock:
+            return [self._remove(key) for key in list(self._entries) if predicate(key)]
+
+    def clear(self) -> List[V]:
+        return self.pop_where(lambda key: True)
+
+    def _remove(self, key: K) -> Optional[V]:
+        value = self._entries.pop(key, None)
+        self._bytes -= self._sizes.pop(key, 0)
+
+        return value
+
+    def _is_full(self) -> bool:
+        too_many = self._max_entries is not None and len(self._entries) > self._max_entries
+        too_big = self._max_bytes is not None and self._bytes > self._max_bytes
+
+        return too_many or too_big
+
+    def _evict(self):
+        while self._entries and self._is_full():
+            key = next(iter(self._entries))
+            value = self._remove(key)
+            self.evictions += 1
+
+            if self._on_evict is not None:
+                self._on_evict(key, value)
@@ -0,0 +1,28 @@
+from typing import Any, Dict
+
+
+def memory_usage(dataset: Any, deep: bool = True) -> int:
+    """
+    Returns the number of bytes a dataset takes in memory, or 0 if it can't be known
+    (e.g. Spark DataFrames, which live in the cluster).
+    """
+    if hasattr(dataset, "memory_usage"):
+        # pandas DataFrame. deep=True also accounts for the contents of object columns (strings)
+        return int(dataset.memory_usage(deep=deep).sum())
+
+    if hasattr(dataset, "nbytes"):
+        # pyarrow Tables / numpy arrays
+        return int(dataset.nbytes)
+
+    return 0
+
+
+def dataset_stats(dataset: Any) -> Dict[str, int]:
+    """
+    Returns the rows and (shallow) bytes of an in-memory dataset, for metrics. Nothing for datasets
+    that would need to be computed to know them, like Spark DataFrames.
+    """
+    if not hasattr(dataset, "__len__"):
+        return dict()
+
+    return {"rows": len(dataset), "bytes": memory_usage(dataset, deep=False)}
@@ -0,0 +1,123 @@
+import math
+from collections import deque
+from threading import Lock
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from ..mixins.instrumented import Span
+
+METRIC_KEY = Tuple[str, str, Optional[str]]
+
+
+class _Metric:
+    __slots__ = ("count", "errors", "seconds", "rows", "bytes", "durations")
+
+    def __init__(self, max_samples: int):
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.durations: Deque[float] = deque(maxlen=max_samples)
+
+
+class MetricsAggregator:
+    """
+    Observer that aggregates spans in memory, by operation, phase and data manager. Register it with
+    ``data_manager.add_observer(aggregator)``. Latency percentiles are computed over the last ``max_samples``
+    spans of each kind, counts and totals over all of them.
+    """
+    def __init__(self, max_samples: int = 10_000):
+        self._max_samples = max_samples
+        self._metrics: Dict[METRIC_KEY, _Metric] = dict()
+        self._lock = Lock()
+
+    def __call__(self, span: Span):
+        metric_key = (span.operation, span.phase, span.manager_id)
+
+        with self._lock:
+            metric = self._metrics.get(metric_key)
+            if metric is None:
+                metric = self._metrics[metric_key] = _Metric(self._max_samples)
+
+            metric.count += 1
+            metric.errors += span.error is not None
+            metric.seconds += span.duration
+            metric.rows += span.attributes.get("rows") or 0
+            metric.bytes += span.attributes.get("bytes") or 0
+            metric.durations.append(span.duration)
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Returns the count, errors, p50/p95 latencies and throughput of every operation phase"""
+        with self._lock:
+            metrics = [(metric_key, metric, sorted(metric.durations)) for metric_key, metric in self._metrics.items()]
+
+        return [
+            {
+                "operation": operation,
+                "phase": phase,
+                "manager_id": manager_id,
+                "count": metric.count,
+                "errors": metric.errors,
+                "seconds": metric.seconds,
+                "p50": _percentile(durations, 0.5),
+                "p95": _percentile(durations, 0.95),
+                "rows": metric.rows,
+                "bytes": metric.bytes,
+                "rows_per_second": metric.rows / metric.seconds if metric.seconds else None,
+                "bytes_per_second": metric.bytes / metric.seconds if metric.seconds else None,
+            }
+            for (operation, phase, manager_id), metric, durations in sorted(metrics, key=lambda item: tuple(map(str, item[0])))
+        ]
+
+    def to_prometheus(self, prefix: str = "datamanager") -> str:
+        """Returns the metrics in the Prometheus text exposition format"""
+        lines = [
+            f"# HELP {prefix}_phase_seconds Time spent in each phase of the data manager operations",
+            f"# TYPE {prefix}_phase_seconds summary",
+        ]
+        counters = {
+            "errors": f"# TYPE {prefix}_phase_errors_total counter",
+            "rows": f"# TYPE {prefix}_phase_rows_total counter",
+            "bytes": f"# TYPE {prefix}_phase_bytes_total counter",
+        }
+        counter_lines = {name: [header] for name, header in counters.items()}
+
+        for row in self.summary():
+            labels = _labels(operation=row["operation"], phase=row["phase"], manager=row["manager_id"] or "")
+
+            for quantile in ("0.5", "0.95"):
+                value = row["p50"] if quantile == "0.5" else row["p95"]
+                lines.append(f'{prefix}_phase_seconds{{{labels},quantile="{quantile}"}} {_number(value)}')
+            lines.append(f"{prefix}_phase_seconds_sum{{{labels}}} {_number(row['seconds'])}")
+            lines.append(f"{prefix}_phase_seconds_count{{{labels}}} {row['count']}")
+
+            for name in counters:
+                counter_lines[name].append(f"{prefix}_phase_{name}_total{{{labels}}} {row[name]}")
+
+        for name in counters:
+            lines.extend(counter_lines[name])
+
+        return "\n".join(lines) + "\n"
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile"""
+    if not sorted_values:
+        return None
+
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+def _labels(**labels: str) -> str:
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return ",".join(f'{name}="{escape(str(value))}"' for name, value in labels.items())
+
+
+def _number(value: Optional[float]) -> str:
+    return "NaN" if value is None else repr(float(value))
@@ -0,0 +1,104 @@
+from itertools import product
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+from .filters import FILTER
+
+PARTITIONS = Dict[str, Any]
+
+# The directory name of the partitions of null values
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+# Spark escapes these characters in partition directory names (spaces and non-ASCII characters are kept as they are)
+_SPARK_ESCAPED = set('"#%\'*/:=?\\\x7f{[]^') | {chr(code) for code in range(1, 32)}
+
+
+def arrow_partition_value(value: Any) -> str:
+    """Returns the directory name of a partition value, the way pyarrow (and pandas) write hive partitions"""
+    if _is_null(value):
+        return NULL_PARTITION
+
+    try:
+        import pyarrow as pa
+        text = pa.scalar(value).cast(pa.string()).as_py()
+    except Exception:
+        text = str(value)
+
+    return quote(text, safe="")
+
+
+def spark_partition_value(value: Any) -> str:
+    """Returns the directory name of a partition value, the way Spark writes hive partitions"""
+    if _is_null(value):
+        return NULL_PARTITION
+
+    if isinstance(value, bool):
+        value = str(value).lower()
+
+    return "".join(f"%{ord(char):02X}" if char in _SPARK_ESCAPED else char for char in str(value))
+
+
+def partition_paths(base_path: str, partition_by: Sequence[str], partitions: PARTITIONS,
+                    escape: Callable[[Any], str] = arrow_partition_value) -> Tuple[Optional[List[str]], PARTITIONS]:
+    """
+    Returns the ``col=value`` directories to read for the requested partitions of a dataset partitioned
+    by ``partition_by``, and the requested partitions that couldn't be turned into directories.
+    The values are turned into directory names with ``escape``, which must match the writer of the dataset.
+
+    Directories can only be built for a prefix of the partition columns: e.g. for a dataset partitioned
+    by ``[year, month]``, requesting months without years has to be done by filtering all partitions.
+    In that case, no directories (None) are returned.
+    """
+    partitions = {column: _as_list(values) for column, values in partitions.items()}
+
+    prefix = []
+    for column in partition_by:
+        if column not in partitions:
+            break
+        prefix.append(column)
+
+    if not prefix:
+        return None, partitions
+
+    base_path = base_path.rstrip("/")
+    paths = [
+        "/".join([base_path] + [f"{column}={escape(value)}" for column, value in zip(prefix, values)])
+        for values in product(*(partitions[column] for column in prefix))
+    ]
+    remaining = {column: values for column, values in partitions.items() if column not in prefix}
+
+    return paths, remaining
+
+
+def partition_filters(partitions: PARTITIONS) -> List[FILTER]:
+    """Returns the filters selecting the requested partitions"""
+    return [(column, "in", _as_list(values)) for column, values in partitions.items()]
+
+
+def with_partition_filters(filters: Optional[List[List[FILTER]]], partitions: PARTITIONS) -> Optional[List[List[FILTER]]]:
+    """Adds the filters for the requested partitions to every conjunction of the (normalized) filters"""
+    if not partitions:
+        return filters
+
+    extra_filters = partition_filters(partitions)
+
+    if not filters:
+        return [extra_filters]
+
+    return [conjunction + extra_filters for conjunction in filters]
+
+
+def _is_null(value: Any) -> bool:
+    try:
+        # NaN is the only value that isn't equal to itself
+        return value is None or bool(value != value)
+    except TypeError:
+        # pd.NA
+        return True
+
+
+def _as_list(values: Any) -> List[Any]:
+    if isinstance(values, (list, tuple, set)):
+        return list(values)
+
+    return [values]
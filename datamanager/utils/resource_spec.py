@@ -0,0 +1,114 @@
+from types import MappingProxyType
+from typing import Any, Mapping, NamedTuple, Optional, Tuple
+
+from pyhocon import ConfigTree
+
+from .filters import FILTER, normalize_filters
+
+
+class ResourceSpec(NamedTuple):
+    """
+    The configuration of a resource, read once from its config tree. Storage managers use it instead of
+    walking the tree on every operation. Specs are immutable, and shared: don't modify their options.
+    """
+    key: str
+    path: str
+    type: str
+    options: Mapping[str, Any]
+    save_options: Mapping[str, Any]
+    read_only: bool
+    partition_by: Tuple[str, ...]
+    # Size of the written files, for the storage managers that support it
+    target_file_size_mb: Optional[float]
+    max_records_per_file: Optional[int]
+    # Columns identifying the rows, for upserts
+    primary_key: Tuple[str, ...]
+    columns: Optional[Tuple[str, ...]]
+    filters: Optional[Tuple[Tuple[FILTER, ...], ...]]
+    chunk_size: Optional[int]
+    disk_cache: bool
+    # Storage level to persist the dataset with on load, and kind of checkpoint ("reliable" or "local"), for Spark
+    cache: Optional[str]
+    checkpoint: Optional[str]
+    # Whether to keep the previous version on save, None to use the storage manager's default
+    keep_previous: Optional[bool]
+    # Whether to skip saves that wouldn't change the content, None to use the storage manager's default
+    skip_unchanged: Optional[bool]
+    # How many versions to keep, 0 if the dataset isn't versioned
+    versions: int
+    # Options of the compact load mode (see datamanager.utils.dtypes), or None if it's disabled
+    compact: Optional[Mapping[str, Any]]
+    dtypes: Optional[Mapping[str, str]]
+    # The config tree itself, for settings that aren't compiled
+    resource: ConfigTree
+
+    @classmethod
+    def from_resource(cls, key: str, resource: ConfigTree, default_file_type: str) -> "ResourceSpec":
+        columns = resource.get_list("columns", default=None)
+        filters = normalize_filters(resource.get_list("filters", default=None))
+
+        return cls(
+            key=key,
+            path=resource.get_string("path"),
+            type=resource.get_string("type", default=default_file_type).lower(),
+            options=_frozen(resource.get("options", default=dict())),
+            save_options=_frozen(resource.get("save_options", default=dict())),
+            read_only=resource.get_bool("read_only", default=False),
+            partition_by=tuple(resource.get_list("partition_by", default=[])),
+            primary_key=tuple(resource.get_list("primary_key", default=[])),
+            target_file_size_mb=resource.get_float("target_file_size_mb", default=None),
+            max_records_per_file=resource.get_int("max_records_per_file", default=None),
+            columns=tuple(columns) if columns is not None else None,
+            filters=tuple(tuple(conjunction) for conjunction in filters) if filters is not None else None,
+            chunk_size=resource.get_int("chunk_size", default=None),
+            disk_cache=resource.get_bool("disk_cache", default=True),
+            cache=_storage_level(resource.get("cache", default=None)),
+            checkpoint=_checkpoint(resource.get("checkpoint", default=None)),
+            keep_previous=resource.get_bool("keep_previous", default=None),
+            skip_unchanged=resource.get_bool("skip_unchanged", default=None),
+            versions=resource.get_int("versions", default=0),
+            compact=_compact_options(resource.get("compact", default=False)),
+            dtypes=_dtypes(resource.get("dtypes", default=None)),
+            resource=resource,
+        )
+
+
+def _storage_level(cache: Any) -> Optional[str]:
+    """``cache`` can be a boolean, or the name of a Spark storage level"""
+    if isinstance(cache, str) and cache.lower() not in ("true", "false"):
+        return cache.upper()
+
+    return "MEMORY_AND_DISK" if str(cache).lower() == "true" else None
+
+
+def _checkpoint(checkpoint: Any) -> Optional[str]:
+    """``checkpoint`` can be a boolean, or "local" for Spark's local checkpoints"""
+    if str(checkpoint).lower() == "local":
+        return "local"
+
+    return "reliable" if str(checkpoint).lower() == "true" else None
+
+
+def _dtypes(dtypes: Any) -> Optional[Mapping[str, str]]:
+    """``dtypes`` can be a map of columns to dtypes, or a list of [column, dtype] pairs (for any column name)"""
+    if dtypes is None:
+        return None
+
+    if isinstance(dtypes, list):
+        return MappingProxyType({str(column): str(dtype) for column, dtype in dtypes})
+
+    return _frozen(dtypes)
+
+
+def _compact_options(compact: Any) -> Optional[Mapping[str, Any]]:
+    """``compact`` can be a boolean, or the options of the compact mode"""
+    if isinstance(compact, (ConfigTree, dict)):
+        return _frozen(compact)
+
+    return MappingProxyType(dict()) if compact else None
+
+
+def _frozen(options: Any) -> Mapping[str, Any]:
+    options = options.as_plain_ordered_dict() if isinstance(options, ConfigTree) else options
+
+    return MappingProxyType(dict(options))
@@ -0,0 +1,44 @@
+from typing import TYPE_CHECKING, Optional, Sequence
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# overwrite: replace the dataset. error: fail if it exists. append: add the rows to it.
+# upsert: replace the rows with the same primary key, and add the others
+SAVE_MODES = ("overwrite", "error", "append", "upsert")
+
+
+def save_mode(mode: Optional[str], overwrite: Optional[bool] = True) -> str:
+    """Returns the save mode to use. Without a mode, ``overwrite`` chooses between overwrite and error"""
+    if mode is None:
+        return "overwrite" if overwrite else "error"
+
+    mode = mode.lower()
+    if mode not in SAVE_MODES:
+        raise ValueError(f"Unknown save mode '{mode}', it must be one of {list(SAVE_MODES)}")
+
+    return mode
+
+
+def upsert_pandas(existing: Optional["pd.DataFrame"], dataset: "pd.DataFrame", primary_key: Sequence[str]) -> "pd.DataFrame":
+    """
+    Merges the rows of a dataset into the existing ones: existing rows with the same primary key are replaced,
+    and the others are kept. If the dataset has several rows with the same primary key, the last one wins.
+    """
+    import pandas as pd
+
+    primary_key = list(primary_key)
+    missing_columns = [column for column in primary_key if column not in dataset.columns]
+    if missing_columns:
+        raise ValueError(f"The dataset doesn't have the primary key columns {missing_columns}")
+
+    dataset = dataset.drop_duplicates(subset=primary_key, keep="last")
+
+    if existing is None or existing.empty:
+        return dataset.reset_index(drop=True)
+
+    existing_keys = pd.MultiIndex.from_frame(existing[primary_key])
+    new_keys = pd.MultiIndex.from_frame(dataset[primary_key])
+    kept = existing[~existing_keys.isin(new_keys)]
+
+    return pd.concat([kept, dataset], ignore_index=True)
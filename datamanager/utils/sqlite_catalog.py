@@ -0,0 +1,230 @@
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS resources (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    definition TEXT NOT NULL,
+    path TEXT,
+    size INTEGER,
+    schema TEXT,
+    modified_at REAL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE TABLE IF NOT EXISTS tags (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (namespace, key, tag)
+);
+CREATE INDEX IF NOT EXISTS tags_by_tag ON tags (namespace, tag);
+CREATE TABLE IF NOT EXISTS sources (
+    source TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    payload TEXT
+);
+"""
+
+
+class SQLiteCatalog:
+    """
+    A persistent catalog of resource definitions, stored in a local SQLite file.
+
+    Resources are grouped in namespaces (one per data manager, by default its id), and stored as JSON along with
+    their path and tags, so single resources can be read without loading the whole catalog, and searched by key
+    prefix or by tag. Stats about the stored datasets (size, schema and last modification time) can be recorded
+    after saving them.
+
+    Each namespace remembers the fingerprint of the config it was synced from, so syncing the same config again
+    is a no-op. Other sources, like config files, can be recorded the same way (with an optional JSON payload),
+    to know when the catalog can be used on its own, without parsing the config again.
+    """
+    def __init__(self, path: Union[str, Path]):
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = Lock()
+        self._connection = sqlite3.connect(str(self._path), check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(_SCHEMA)
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def namespaces(self) -> List[str]:
+        return [row[0] for row in self._query("SELECT DISTINCT namespace FROM resources ORDER BY namespace")]
+
+    def fingerprint(self, source: str) -> Optional[str]:
+        """Returns the recorded fingerprint of a source (e.g. the config a namespace was last synced from)"""
+        rows = self._query("SELECT fingerprint FROM sources WHERE source = ?", (source,))
+
+        return rows[0][0] if rows else None
+
+    def payload(self, source: str) -> Optional[Any]:
+        """Returns the payload recorded with a source"""
+        rows = self._query("SELECT payload FROM sources WHERE source = ?", (source,))
+
+        return json.loads(rows[0][0]) if rows and rows[0][0] is not None else None
+
+    def record_source(self, source: str, fingerprint: str, payload: Optional[Any] = None):
+        with self._transaction() as cursor:
+            self._record_source(cursor, source, fingerprint, payload)
+
+    def sync(self, namespace: str, definitions: Dict[str, Dict[str, Any]], fingerprint: str) -> bool:
+        """
+        Replaces the resources of a namespace, unless they were already synced from a config with the same
+        fingerprint. The stats of the resources that are kept are preserved. Returns whether anything changed.
+        """
+        if self.fingerprint(namespace) == fingerprint:
+            return False
+
+        with self._transaction() as cursor:
+            existing = {row[0] for row in cursor.execute("SELECT key FROM resources WHERE namespace = ?", (namespace,))}
+            removed = existing - definitions.keys()
+
+            cursor.executemany("DELETE FROM resources WHERE namespace = ? AND key = ?", [(namespace, key) for key in removed])
+            cursor.execute("DELETE FROM tags WHERE namespace = ?", (namespace,))
+            self._put_rows(cursor, namespace, definitions)
+            self._record_source(cursor, namespace, fingerprint)
+
+        return True
+
+    def put(self, namespace: str, key: str, definition: Dict[str, Any]):
+        with self._transaction() as cursor:
+            cursor.execute("DELETE FROM tags WHERE namespace = ? AND key = ?", (namespace, key))
+            self._put_rows(cursor, namespace, {key: definition})
+            # The namespace no longer matches its config
+            cursor.execute("DELETE FROM sources WHERE source = ?", (namespace,))
+
+    def delete(self, namespace: str, key: str):
+        with self._transaction() as cursor:
+            cursor.execute("DELETE FROM resources WHERE namespace = ? AND key = ?", (namespace, key))
+            cursor.execute("DELETE FROM tags WHERE namespace = ? AND key = ?", (namespace, key))
+            cursor.execute("DELETE FROM sources WHERE source = ?", (namespace,))
+
+    def drop(self, namespace: str):
+        """Removes all the resources of a namespace"""
+        with self._transaction() as cursor:
+            cursor.execute("DELETE FROM resources WHERE namespace = ?", (namespace,))
+            cursor.execute("DELETE FROM tags WHERE namespace = ?", (namespace,))
+            cursor.execute("DELETE FROM sources WHERE source = ?", (namespace,))
+
+    def get(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        """Returns the definition of a resource, or None if it isn't in the catalog"""
+        rows = self._query("SELECT definition FROM resources WHERE namespace = ? AND key = ?", (namespace, key))
+
+        return json.loads(rows[0][0]) if rows else None
+
+    def has(self, namespace: str, key: str) -> bool:
+        return bool(self._query("SELECT 1 FROM resources WHERE namespace = ? AND key = ?", (namespace, key)))
+
+    def definitions(self, namespace: str) -> Dict[str, Dict[str, Any]]:
+        """Returns the definitions of all resources in a namespace"""
+        rows = self._query("SELECT key, definition FROM resources WHERE namespace = ? ORDER BY key", (namespace,))
+
+        return {key: json.loads(definition) for key, definition in rows}
+
+    def search(self, namespace: str, prefix: Optional[str] = None, tag: Optional[str] = None) -> List[str]:
+        """Returns the (sorted) keys of the resources starting with a prefix and/or having a tag"""
+        query = "SELECT r.key FROM resources r"
+        conditions = ["r.namespace = ?"]
+        params: List[Any] = [namespace]
+
+        if tag is not None:
+            query += " JOIN tags t ON t.namespace = r.namespace AND t.key = r.key"
+            conditions.append("t.tag = ?")
+            params.append(tag)
+
+        if prefix:
+            # A range instead of LIKE, so the primary key index is used
+            conditions.append("r.key >= ? AND r.key < ?")
+            params.extend([prefix, prefix + "\U0010ffff"])
+
+        query += " WHERE " + " AND ".join(conditions) + " ORDER BY r.key"
+
+        return [row[0] for row in self._query(query, params)]
+
+    def record_stats(self, namespace: str, key: str, size: Optional[int] = None,
+                     schema: Optional[Dict[str, str]] = None, modified_at: Optional[float] = None):
+        """Records the stats of a stored dataset"""
+        with self._transaction() as cursor:
+            cursor.execute(
+                "UPDATE resources SET size = ?, schema = ?, modified_at = ?, updated_at = ? WHERE namespace = ? AND key = ?",
+                (size, json.dumps(schema) if schema is not None else None, modified_at, time.time(), namespace, key),
+            )
+
+    def stats(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        """Returns the path and the recorded stats of a resource, or None if it isn't in the catalog"""
+        rows = self._query(
+            "SELECT path, size, schema, modified_at FROM resources WHERE namespace = ? AND key = ?", (namespace, key)
+        )
+        if not rows:
+            return None
+
+        path, size, schema, modified_at = rows[0]
+
+        return {
+            "path": path,
+            "size": size,
+            "schema": json.loads(schema) if schema is not None else None,
+            "modified_at": modified_at,
+        }
+
+    @staticmethod
+    def _record_source(cursor: sqlite3.Cursor, source: str, fingerprint: str, payload: Optional[Any] = None):
+        cursor.execute(
+            "INSERT OR REPLACE INTO sources (source, fingerprint, payload) VALUES (?, ?, ?)",
+            (source, fingerprint, json.dumps(payload) if payload is not None else None),
+        )
+
+    def _put_rows(self, cursor: sqlite3.Cursor, namespace: str, definitions: Dict[str, Dict[str, Any]]):
+        now = time.time()
+        cursor.executemany(
+            """
+            INSERT INTO resources (namespace, key, definition, path, updated_at) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (namespace, key) DO UPDATE SET
+                definition = excluded.definition, path = excluded.path, updated_at = excluded.updated_at
+            """,
+            [
+                (namespace, key, json.dumps(definition), definition.get("path"), now)
+                for key, definition in definitions.items()
+            ],
+        )
+        cursor.executemany(
+            "INSERT OR IGNORE INTO tags (namespace, key, tag) VALUES (?, ?, ?)",
+            [
+                (namespace, key, tag)
+                for key, definition in definitions.items()
+                for tag in definition.get("tags", [])
+            ],
+        )
+
+    def _query(self, query: str, params: Iterable[Any] = ()) -> List[Tuple]:
+        with self._lock:
+            return self._connection.execute(query, tuple(params)).fetchall()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Cursor]:
+        with self._lock:
+            cursor = self._connection.cursor()
+            cursor.execute("BEGIN")
+            try:
+                yield cursor
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                raise
+            else:
+                cursor.execute("COMMIT")
+            finally:
+                cursor.close()
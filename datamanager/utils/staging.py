@@ -0,0 +1,121 @@
+import os
+import posixpath
+import shutil
+import time
+import uuid
+from typing import List, Optional
+
+# Staging entries older than this are considered leftovers of killed writers
+STALE_STAGING_SECONDS = 24 * 60 * 60
+
+_STAGING_PREFIX = ".staging-"
+_PREVIOUS_PREFIX = ".previous."
+
+
+def staging_path(path: str) -> str:
+    """
+    Returns a new staging path for a dataset, next to it (so it's in the same file system, and can be renamed).
+    It keeps the name of the dataset at the end, so writers still infer the format and compression from it.
+    Works for local paths as well as for URIs (``hdfs://namenode/data/x.parquet``).
+    """
+    parent, name = posixpath.split(path.rstrip("/"))
+
+    return posixpath.join(parent, f"{_STAGING_PREFIX}{uuid.uuid4().hex}.{name}")
+
+
+def previous_path(path: str) -> str:
+    """Returns the path where the previous version of a dataset is kept"""
+    parent, name = posixpath.split(path.rstrip("/"))
+
+    return posixpath.join(parent, f"{_PREVIOUS_PREFIX}{name}")
+
+
+def is_staging_name(name: str) -> bool:
+    return name.startswith(_STAGING_PREFIX)
+
+
+def publish(staging: str, path: str, keep_previous: bool = True, previous: Optional[str] = None):
+    """
+    Moves a staged dataset into place, keeping the current version as the previous one, at ``previous``
+    (:func:`previous_path` by default).
+
+    Files are replaced atomically: readers see either the old or the new file. Directories can't be replaced
+    atomically, so they are swapped with two renames, and the dataset is missing in between (but never partial).
+    """
+    previous = previous or previous_path(path)
+
+    if not os.path.lexists(path):
+        os.replace(staging, path)
+        return
+
+    os.makedirs(os.path.dirname(previous) or ".", exist_ok=True)
+
+    if os.path.isdir(path) or os.path.isdir(staging):
+        remove(previous)
+        os.replace(path, previous)
+        os.replace(staging, path)
+    else:
+        if keep_previous:
+            remove(previous)
+            # A hard link keeps the old version without copying it
+            link_or_copy(path, previous)
+        os.replace(staging, path)
+
+    if not keep_previous:
+        remove(previous)
+
+
+def rollback(path: str) -> bool:
+    """
+    Swaps a dataset with its previous version, if there is one, so rolling back twice restores the current version.
+    Returns whether there was a previous version.
+    """
+    previous = previous_path(path)
+
+    if not os.path.lexists(previous):
+        return False
+
+    if not os.path.lexists(path):
+        os.replace(previous, path)
+        return True
+
+    swap = staging_path(path)
+    os.replace(path, swap)
+    os.replace(previous, path)
+    os.replace(swap, previous)
+
+    return True
+
+
+def cleanup_staging(directory: str, older_than: float = STALE_STAGING_SECONDS) -> List[str]:
+    """Removes the staging files and directories older than ``older_than`` seconds. Returns the removed paths"""
+    removed = []
+    limit = time.time() - older_than
+
+    try:
+        with os.scandir(directory) as entries:
+            stale = [entry.path for entry in entries if is_staging_name(entry.name) and entry.stat(follow_symlinks=False).st_mtime < limit]
+    except FileNotFoundError:
+        return removed
+
+    for path in stale:
+        remove(path)
+        removed.append(path)
+
+    return removed
+
+
+def link_or_copy(source: str, destination: str):
+    """Hard links a file, or copies it if the file system doesn't support hard links"""
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+def remove(path: str):
+    """Removes a file or a directory, if it exists"""
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.lexists(path):
+        os.remove(path)